@@ -9,7 +9,7 @@ class AnalystAgent(BaseAgent):
         """
         query = task.get("description", "")
         
-        prompt = f"""
+        prompt = self.prompts.render("""
         You are the Analyst Agent.
         Your goal is to analyze the following topic/data.
         
@@ -17,7 +17,7 @@ class AnalystAgent(BaseAgent):
         Context: {context}
         
         Provide a detailed analysis, identifying key patterns, pros/cons, or insights.
-        """
+        """, query=query, context=context)
         
         analysis = await self.call_llm(prompt)
         return {"agent": self.name, "output": analysis}
\ No newline at end of file
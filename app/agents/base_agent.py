@@ -1,5 +1,6 @@
 import logging
 from ..core.llm_bridge import llm_bridge
+from ..core.prompt_builder import PromptBuilder
 
 logger = logging.getLogger(__name__)
 
@@ -8,6 +9,8 @@ class BaseAgent:
 
     def __init__(self):
         self.llm = llm_bridge
+        # Keeps prompts within PROMPT_TOKEN_BUDGET[_<NAME>] by compacting context
+        self.prompts = PromptBuilder(self.name)
 
     async def run(self, query, context):
         raise NotImplementedError("Agents must implement run()")
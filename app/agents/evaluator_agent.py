@@ -7,17 +7,19 @@ class EvaluatorAgent(BaseAgent):
         """
         Synthesize findings from all previous steps into a final answer.
         """
-        prompt = f"""
+        # One line per step; the oldest steps are compacted first when over budget
+        findings = [f"{step.get('agent', 'step')}: {step.get('output')}" for step in steps]
+        prompt = self.prompts.render("""
         You are the Evaluator Agent.
         Your goal is to synthesize the following execution steps into a final, coherent response for the user.
         
         User Context: {context}
         
         Execution Steps & Findings:
-        {steps}
+        {findings}
         
         Provide a final answer that directly addresses the user's intent.
-        """
+        """, context=context, findings=findings)
         
         final_response = await self.call_llm(prompt)
         return {"agent": self.name, "output": final_response}
\ No newline at end of file
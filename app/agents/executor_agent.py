@@ -12,15 +12,15 @@ class ExecutorAgent(BaseAgent):
         # Here we would normally map to tools["automation"] etc.
         # For now, we simulate execution via LLM description or mock.
         
-        prompt = f"""
+        prompt = self.prompts.render("""
         You are the Executor Agent.
         Your goal is to simulate the execution of the following action.
         
-        Action: {action_desc}
+        Action: {query}
         Context: {context}
         
         Describe the outcome of this action as if it were successfully completed.
-        """
+        """, query=action_desc, context=context)
         
         result = await self.call_llm(prompt)
         return {"agent": self.name, "output": result}
\ No newline at end of file
@@ -6,7 +6,7 @@ class PlannerAgent(BaseAgent):
     name = "planner"
 
     async def run(self, query, context):
-        prompt = f"""
+        prompt = self.prompts.render("""
         You are the Planner Agent for a sophisticated AI Assistant.
         Your goal is to break down the user's request into logical, executable steps.
         
@@ -27,8 +27,11 @@ class PlannerAgent(BaseAgent):
             ]
         }}
         
+        Steps of the same type run in parallel. If a step needs the result of a
+        specific earlier step, add "depends_on": [index of that step, starting at 0].
+        
         Do not include markdown code blocks. Output ONLY raw JSON.
-        """
+        """, query=query, context=context)
         
         raw_response = await self.call_llm(prompt)
         
@@ -6,29 +6,30 @@ class ResearcherAgent(BaseAgent):
     async def run(self, task, context, tools=None):
         """
         Execute research task.
-        task: dict with 'description'
+        task: dict with 'description' and optionally the caller's 'user_id'
         context: dict
         tools: dict of available tools
         """
         query = task.get("description", "")
+        user_id = task.get("user_id")
         search_results = "No tools available for search."
         
         if tools and "search" in tools:
             try:
-                # Assuming SearchTool has a run method taking a query string
-                search_results = await tools["search"].run(query)
+                # Memory entries are only found when searching as their owner
+                search_results = await tools["search"].run(query, user_id=user_id)
             except Exception as e:
                 search_results = f"Search failed: {e}"
         
         # Summarize findings with LLM
-        prompt = f"""
+        prompt = self.prompts.render("""
         You are the Researcher Agent.
         Goal: {query}
         Context: {context}
         Search Results: {search_results}
         
         Summarize the findings relevant to the goal.
-        """
+        """, query=query, context=context, search_results=search_results)
         
         summary = await self.call_llm(prompt)
         return {"agent": self.name, "output": summary}
\ No newline at end of file
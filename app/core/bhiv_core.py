@@ -1,16 +1,161 @@
+import copy
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .bhiv_reasoner import Budget, EventCallback, emit
+from .cache import TTLCache
+from .llm_bridge import is_fallback_output
+from .metrics import metrics
+from ..memory.memory_manager import MemoryManager
+
+_WORD_RE = re.compile(r"\w{3,}")
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(str(text).lower().split()).rstrip(" .?!")
+
+
+def fingerprint(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def relevant_context(context: Any, text: str, query: Optional[str] = None) -> Any:
+    """The part of ``context`` that can plausibly affect an answer about ``text``.
+
+    Dict entries sharing a word with ``text`` are kept; the entry recording a
+    previous answer to ``query`` (default ``text``) is not, since that answer
+    is what gets cached. Other contexts are used whole.
+    """
+    if not isinstance(context, dict):
+        return context
+    words = set(_WORD_RE.findall(normalize_query(text)))
+    own_entry = normalize_query(query if query is not None else text)
+    return {
+        key: value for key, value in context.items()
+        if normalize_query(key) != own_entry
+        and words & set(_WORD_RE.findall(f"{key} {value}".lower()))
+    }
+
+
+class _CachedAgent:
+    """Wraps an agent so identical calls by the same user within the TTL reuse the previous output."""
+
+    def __init__(self, core, agent, query: str, user_id: str):
+        self.core = core
+        self.agent = agent
+        self.name = agent.name
+        self.query = query
+        self.user_id = user_id
+
+    def _key(self, subject, context) -> str:
+        if self.name == "planner":
+            parts = ("plan", self.user_id, normalize_query(subject), fingerprint(relevant_context(context, subject)))
+        elif self.name == "evaluator":
+            parts = ("final", self.user_id, fingerprint(subject), fingerprint(relevant_context(context, self.query)))
+        else:
+            description = subject.get("description", "")
+            parts = ("step", self.name, self.user_id, normalize_query(description), fingerprint(relevant_context(context, description, self.query)))
+        return fingerprint(parts)
+
+    async def run(self, subject, context, **kwargs):
+        key = self._key(subject, context)
+        cached = self.core.cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        result = await self.agent.run(subject, context, **kwargs)
+        # Never keep placeholder answers from a failed provider call
+        if not is_fallback_output(result.get("output")) and not str(result.get("output", "")).startswith("Error processing request"):
+            self.core.remember(self.query, key, copy.deepcopy(result))
+        return result
+
+
 class BHIVCore:
-    def __init__(self, memory_manager, agents, tools, reasoner):
+    def __init__(self, memory_manager, agents, tools, reasoner, cache: Optional[TTLCache] = None):
         self.memory = memory_manager
         self.agents = agents
         self.tools = tools
         self.reasoner = reasoner
+        # Plan and step outputs; None disables caching
+        self.cache = cache if cache is not None else build_bhiv_cache()
+        # normalized query -> cache keys it produced, for invalidate(query)
+        self._keys_by_query: "OrderedDict[str, set]" = OrderedDict()
+
+    async def process(
+        self,
+        input_data,
+        on_event: Optional[EventCallback] = None,
+        deadline: Optional[float] = None,
+        budget: Optional[Budget] = None,
+    ):
+        """Run the query through the reasoner and return the final answer; see ``run``."""
+        return (await self.run(input_data, on_event=on_event, deadline=deadline, budget=budget))["output"]
+
+    async def run(
+        self,
+        input_data,
+        on_event: Optional[EventCallback] = None,
+        deadline: Optional[float] = None,
+        budget: Optional[Budget] = None,
+    ) -> Dict[str, Any]:
+        """Run the query and return ``{"output", "incomplete", "unfinished_steps"}``.
 
-    async def process(self, input_data):
+        ``on_event`` receives progress events ending with ``"final"``.
+        ``budget`` (default: the reasoner's, from BHIV_* settings) bounds total
+        time, each agent call and the plan length; ``deadline`` (loop time)
+        can cap the run further. See ``BHIVReasoner.run``.
+        """
         # Extract query text safely
         query_text = input_data.query if hasattr(input_data, 'query') else str(input_data)
-        
+
         context = self.memory.retrieve_context(input_data)
-        reasoning_steps = await self.reasoner.run(query_text, context, self.agents, self.tools)
+        user_id, _ = MemoryManager.scope(input_data)
+        agents = self.agents
+        if self.cache is not None:
+            agents = {name: _CachedAgent(self, agent, query_text, user_id) for name, agent in self.agents.items()}
+        reasoning_steps = await self.reasoner.run(
+            query_text, context, agents, self.tools, on_event=on_event, deadline=deadline, budget=budget, user_id=user_id
+        )
         final = self.reasoner.finalize(reasoning_steps)
         self.memory.update(input_data, final)
-        return final
\ No newline at end of file
+        outcome = {
+            "output": final,
+            "incomplete": reasoning_steps.get("incomplete", False),
+            "unfinished_steps": reasoning_steps.get("unfinished_steps", 0),
+        }
+        await emit(on_event, "final", outcome)
+        return outcome
+
+    def remember(self, query: str, key: str, result) -> None:
+        self.cache.set(key, result)
+        normalized = normalize_query(query)
+        self._keys_by_query.setdefault(normalized, set()).add(key)
+        self._keys_by_query.move_to_end(normalized)
+        while len(self._keys_by_query) > self.cache.max_entries:
+            self._keys_by_query.popitem(last=False)
+
+    def invalidate(self, query: Optional[str] = None) -> int:
+        """Drop cached plans and steps produced for ``query``, or everything; returns entries removed."""
+        if self.cache is None:
+            return 0
+        if query is None:
+            removed = len(self.cache)
+            self.cache.clear()
+            self._keys_by_query.clear()
+            return removed
+        keys = self._keys_by_query.pop(normalize_query(query), set())
+        return sum(1 for key in keys if self.cache.invalidate(key))
+
+
+def build_bhiv_cache() -> Optional[TTLCache]:
+    if os.getenv("BHIV_CACHE", "true").lower() != "true":
+        return None
+    cache = TTLCache(
+        max_entries=int(os.getenv("BHIV_CACHE_MAX_ENTRIES", "1024")),
+        ttl=float(os.getenv("BHIV_CACHE_TTL", "900")),
+    )
+    metrics.register("bhiv_cache", cache.stats)
+    return cache
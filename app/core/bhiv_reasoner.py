@@ -1,20 +1,242 @@
+import asyncio
+import inspect
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# on_event(event, data): called with "plan", "step-start", "step-result", "step-timeout" (and "final" from BHIVCore)
+EventCallback = Callable[[str, Dict[str, Any]], Any]
+
+
+async def emit(on_event: Optional[EventCallback], event: str, data: Dict[str, Any]) -> None:
+    if on_event is None:
+        return
+    result = on_event(event, data)
+    if inspect.isawaitable(result):
+        await result
+
+
+def resolve_dependencies(plan_steps: List[Dict[str, Any]]) -> List[List[int]]:
+    """Indices each step waits for.
+
+    A step may declare ``depends_on`` as earlier step ids or 0-based indices.
+    Otherwise it waits for every earlier step of a different type, so runs of
+    same-type steps (e.g. several research steps) are independent. Only
+    earlier steps can be referenced, which keeps the graph acyclic.
+    """
+    ids = {step["id"]: index for index, step in enumerate(plan_steps) if "id" in step}
+    dependencies = []
+    for index, step in enumerate(plan_steps):
+        declared = step.get("depends_on")
+        if declared is None:
+            deps = [
+                earlier for earlier in range(index)
+                if plan_steps[earlier].get("type") != step.get("type")
+            ]
+        else:
+            if not isinstance(declared, list):
+                declared = [declared]
+            deps = []
+            for ref in declared:
+                target = ids.get(ref, ref if isinstance(ref, int) else None)
+                if target is not None and 0 <= target < index and target not in deps:
+                    deps.append(target)
+        dependencies.append(deps)
+    return dependencies
+
+
+class Budget:
+    """Time and size limits for one BHIV run; 0 disables a limit.
+
+    ``total`` bounds the whole run, ``agent_timeout`` each agent call
+    (``BHIV_AGENT_TIMEOUT_<AGENT>`` overrides it per agent), ``max_steps``
+    the plan length. Up to ``evaluator_reserve`` seconds (at most a quarter
+    of the run) are held back from the steps so the evaluator can still answer.
+    """
+
+    def __init__(
+        self,
+        total: Optional[float] = None,
+        agent_timeout: Optional[float] = None,
+        max_steps: Optional[int] = None,
+        evaluator_reserve: Optional[float] = None,
+    ):
+        self.total = total if total is not None else float(os.getenv("BHIV_DEADLINE", "120"))
+        self.agent_timeout = agent_timeout if agent_timeout is not None else float(os.getenv("BHIV_AGENT_TIMEOUT", "30"))
+        self.max_steps = max_steps if max_steps is not None else int(os.getenv("BHIV_MAX_STEPS", "10"))
+        self.evaluator_reserve = evaluator_reserve if evaluator_reserve is not None else float(
+            os.getenv("BHIV_EVALUATOR_RESERVE", "10")
+        )
+        self._agent_timeouts = {
+            name: float(os.environ[f"BHIV_AGENT_TIMEOUT_{name.upper()}"])
+            for name in ("planner", "researcher", "analyst", "executor", "evaluator")
+            if f"BHIV_AGENT_TIMEOUT_{name.upper()}" in os.environ
+        }
+
+    def timeout_for(self, agent: str, deadline: Optional[float]) -> Optional[float]:
+        """Seconds ``agent`` may run: its own timeout, capped by what is left before ``deadline``."""
+        timeout = self._agent_timeouts.get(agent, self.agent_timeout) or None
+        if deadline is not None:
+            remaining = max(deadline - asyncio.get_running_loop().time(), 0.0)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+
+# Agent that handles each step type
+STEP_AGENTS = {"research": "researcher", "analyze": "analyst", "execute": "executor"}
+
+
 class BHIVReasoner:
-    async def run(self, query, context, agents, tools):
+    def __init__(self, max_parallel: Optional[int] = None, budget: Optional[Budget] = None):
+        self.max_parallel = max_parallel if max_parallel is not None else int(os.getenv("BHIV_MAX_PARALLEL_STEPS", "4"))
+        self.budget = budget if budget is not None else Budget()
+
+    async def run(
+        self,
+        query,
+        context,
+        agents,
+        tools,
+        on_event: Optional[EventCallback] = None,
+        deadline: Optional[float] = None,
+        budget: Optional[Budget] = None,
+        user_id: Optional[str] = None,
+    ):
+        """Plan, run the steps, then evaluate, within ``budget``.
+
+        ``deadline`` is an ``asyncio`` loop time that further caps the run.
+        Steps still running when time is up are cancelled; steps over
+        ``max_steps`` are dropped; the evaluator is told the findings are
+        partial and the result carries ``"incomplete": True`` with the number
+        of ``unfinished_steps``. If the evaluator itself runs out of time the
+        completed step outputs are returned as they are. ``user_id`` scopes
+        the research steps' searches to the caller's memories.
+        """
+        budget = budget or self.budget
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        if budget.total:
+            deadline = min(deadline, started + budget.total) if deadline is not None else started + budget.total
+
         steps = []
         # Planner
-        plan = await agents["planner"].run(query, context)
+        planner_timed_out = False
+        try:
+            plan = await asyncio.wait_for(agents["planner"].run(query, context), budget.timeout_for("planner", deadline))
+        except asyncio.TimeoutError:
+            plan = {"agent": "planner", "output": {"steps": []}}
+            planner_timed_out = True
         steps.append(plan)
+        plan_steps = plan["output"]["steps"]
+        skipped = 0
+        if budget.max_steps and len(plan_steps) > budget.max_steps:
+            skipped = len(plan_steps) - budget.max_steps
+            plan_steps = plan_steps[:budget.max_steps]
+        await emit(on_event, "plan", {"steps": plan_steps, "skipped": skipped})
+
+        step_deadline = deadline
+        if deadline is not None:
+            step_deadline = deadline - min(budget.evaluator_reserve, (deadline - started) / 4)
+        results, unfinished = await self.execute_plan(plan_steps, context, agents, tools, on_event, step_deadline, budget, user_id)
+        steps.extend(results)
+        unfinished += skipped
 
-        for task in plan["output"]["steps"]:
-            if task["type"] == "research":
-                steps.append(await agents["researcher"].run(task, context, tools=tools))
-            elif task["type"] == "analyze":
-                steps.append(await agents["analyst"].run(task, context))
-            elif task["type"] == "execute":
-                steps.append(await agents["executor"].run(task, context))
+        incomplete = planner_timed_out or unfinished > 0
+        if incomplete:
+            steps.append({
+                "agent": "budget",
+                "output": f"Incomplete: the plan did not finish within its budget ({unfinished} step(s) missing). "
+                          "Answer from the findings above and say what is missing.",
+            })
 
-        final = await agents["evaluator"].run(steps, context)
+        try:
+            final = await asyncio.wait_for(agents["evaluator"].run(steps, context), budget.timeout_for("evaluator", deadline))
+        except asyncio.TimeoutError:
+            findings = "\n\n".join(str(step["output"]) for step in results)
+            final = {"agent": "evaluator", "output": findings or "No results were ready within the time budget."}
+            incomplete = True
+        if incomplete:
+            final = dict(final, incomplete=True, unfinished_steps=unfinished)
         return final
 
+    async def run_steps(self, plan_steps, context, agents, tools, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Run plan steps as a dependency graph; results come back in plan order."""
+        results, _ = await self.execute_plan(plan_steps, context, agents, tools, user_id=user_id)
+        return results
+
+    async def execute_plan(
+        self,
+        plan_steps,
+        context,
+        agents,
+        tools,
+        on_event: Optional[EventCallback] = None,
+        deadline: Optional[float] = None,
+        budget: Optional[Budget] = None,
+        user_id: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Returns (results of completed steps in plan order, number of steps cut off or timed out)."""
+        budget = budget or self.budget
+        dependencies = resolve_dependencies(plan_steps)
+        limit = asyncio.Semaphore(max(self.max_parallel, 1))
+        tasks: List[asyncio.Task] = []
+        timed_out = []
+
+        async def run_one(index: int):
+            if dependencies[index]:
+                await asyncio.gather(*(tasks[dep] for dep in dependencies[index]))
+            task = plan_steps[index]
+            async with limit:
+                await emit(on_event, "step-start", {"index": index, "type": task.get("type"), "description": task.get("description")})
+                try:
+                    result = await asyncio.wait_for(
+                        self.dispatch(task, context, agents, tools, user_id),
+                        budget.timeout_for(STEP_AGENTS.get(task.get("type"), ""), deadline),
+                    )
+                except asyncio.TimeoutError:
+                    timed_out.append(index)
+                    await emit(on_event, "step-timeout", {"index": index})
+                    return None
+            if result is not None:
+                await emit(on_event, "step-result", dict(result, index=index))
+            return result
+
+        for index in range(len(plan_steps)):
+            tasks.append(asyncio.create_task(run_one(index)))
+        if not tasks:
+            return [], 0
+
+        timeout = None if deadline is None else max(deadline - asyncio.get_running_loop().time(), 0)
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_EXCEPTION)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = []
+        unfinished = len(timed_out)
+        for task in tasks:
+            if task.cancelled():
+                unfinished += 1
+            elif task.exception() is not None:
+                raise task.exception()
+            elif task.result() is not None:
+                # Unknown step types produce no result, as before
+                results.append(task.result())
+        return results, unfinished
+
+    async def dispatch(self, task, context, agents, tools, user_id: Optional[str] = None):
+        if task["type"] == "research":
+            return await agents["researcher"].run(dict(task, user_id=user_id), context, tools=tools)
+        elif task["type"] == "analyze":
+            return await agents["analyst"].run(task, context)
+        elif task["type"] == "execute":
+            return await agents["executor"].run(task, context)
+        return None
+
     def finalize(self, result):
-        return result["output"]
\ No newline at end of file
+        return result["output"]
@@ -4,9 +4,14 @@ import os
 import httpx
 import base64
 from io import BytesIO
+import dateutil.parser as date_parser
+
+from .llm_bridge import REMOTE_MODELS
 
 class DecisionHub:
     def __init__(self):
+        # Route remote LLM choices through the bridge's latency-aware router
+        self.llm_routing = os.getenv("LLM_ROUTING", "true").lower() == "true"
         self.memory_file = "data/memory.json"
         os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
         if not os.path.exists(self.memory_file):
@@ -51,12 +56,20 @@ class DecisionHub:
         except Exception as e:
             raise Exception(f"Failed to generate voice output: {str(e)}")
 
-    async def create_task(self, description: str) -> Dict[str, Any]:
+    async def create_task(self, description: str, task: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Create a new task using Task API"""
         try:
             base_url = os.getenv("BASE_URL", "http://localhost:8000")
             async with httpx.AsyncClient() as client:
                 payload = {"description": description}
+                if task:
+                    # Carry TaskFlow's classification so the scheduler can fire timed tasks
+                    parameters = task.get("parameters", {})
+                    payload["task_type"] = task.get("task_type")
+                    payload["parameters"] = parameters
+                    due_at = self._parse_due_at(parameters.get("datetime"))
+                    if due_at:
+                        payload["due_at"] = due_at
                 headers = {"X-API-Key": os.getenv("API_KEY", "localtest")}
                 response = await client.post(f"{base_url}/api/tasks", json=payload, headers=headers)
                 response.raise_for_status()
@@ -66,7 +79,16 @@ class DecisionHub:
         except Exception as e:
             raise Exception(f"Failed to create task: {str(e)}")
 
-    async def generate_response(self, query: str, intent: str, context: Dict[str, Any] = None, model: str = "uniguru") -> Dict[str, Any]:
+    def _parse_due_at(self, value: Any) -> Optional[str]:
+        """Normalize a TaskFlow datetime parameter to an ISO string, or None if unparseable."""
+        if not value or not isinstance(value, str):
+            return None
+        try:
+            return date_parser.parse(value).isoformat()
+        except (ValueError, OverflowError):
+            return None
+
+    async def generate_response(self, query: str, intent: str, context: Dict[str, Any] = None, model: str = "uniguru", route: bool = False) -> Dict[str, Any]:
         """Generate response using Respond or Summarize API based on intent"""
         try:
             base_url = os.getenv("BASE_URL", "http://localhost:8000")
@@ -76,7 +98,7 @@ class DecisionHub:
                     payload = {"text": query, "model": model}
                     response = await client.post(f"{base_url}/api/summarize", json=payload, headers=headers)
                 else:
-                    payload = {"query": query, "context": context or {}, "model": model}
+                    payload = {"query": query, "context": context or {}, "model": model, "route": route}
                     response = await client.post(f"{base_url}/api/respond", json=payload, headers=headers)
                 response.raise_for_status()
                 return response.json()
@@ -172,7 +194,7 @@ class DecisionHub:
         try:
             if intent == "task":
                 # Create a task
-                task_result = await self.create_task(processed_text)
+                task_result = await self.create_task(processed_text, task_data.get("task"))
                 decision["task_created"] = task_result
                 decision["final_decision"] = "task_created"
             elif intent == "summarize":
@@ -182,7 +204,8 @@ class DecisionHub:
                 decision["final_decision"] = "summary_generated"
             else:
                 # Generate general response
-                response_result = await self.generate_response(processed_text, intent, {"platform": platform, "device": device_context}, preferred_llm)
+                route = self.llm_routing and preferred_llm in REMOTE_MODELS
+                response_result = await self.generate_response(processed_text, intent, {"platform": platform, "device": device_context}, preferred_llm, route)
                 decision["response"] = response_result.get("response")
                 decision["final_decision"] = "response_generated"
 
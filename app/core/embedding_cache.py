@@ -0,0 +1,228 @@
+"""
+Embedding Cache Module - Bounded LRU cache of (embedding, obfuscated) pairs.
+
+Vectors live in preallocated NumPy slabs, one per vector shape, as float32 or
+(optionally) int8 with a per-row scale, instead of two Python lists of
+floats per entry. An LRU index maps keys to slab rows. ``max_bytes`` caps
+the memory the slabs allocate, not just the rows in use: least recently used
+entries are evicted before a slab may grow, and a slab that is three
+quarters free is compacted to half its size.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .metrics import metrics
+
+Pair = Tuple[List[float], List[float]]
+
+
+class _Slab:
+    """Rows of one (raw dim, obfuscated dim) shape; freed rows are reused before the slab grows."""
+
+    def __init__(self, dims: Tuple[int, int], dtype, capacity: int, max_rows: int):
+        self.dims = dims
+        self.max_rows = max_rows
+        self.dtype = dtype
+        self.raw = np.empty((capacity, dims[0]), dtype=dtype)
+        self.obfuscated = np.empty((capacity, dims[1]), dtype=dtype)
+        self.scales = np.ones((capacity, 2), dtype=np.float32)
+        self.used = 0
+        self.free: List[int] = []
+
+    @property
+    def capacity(self) -> int:
+        return len(self.raw)
+
+    @property
+    def full(self) -> bool:
+        return not self.free and self.used == self.capacity
+
+    def allocate(self) -> int:
+        if self.free:
+            return self.free.pop()
+        self.used += 1
+        return self.used - 1
+
+    def resize(self, capacity: int, rows: Optional[np.ndarray] = None) -> None:
+        """Reallocate to ``capacity`` rows, keeping ``rows`` (default: all used rows) at the front."""
+        keep = slice(0, self.used) if rows is None else rows
+        for name in ("raw", "obfuscated", "scales"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            kept = old[keep]
+            new[:len(kept)] = kept
+            setattr(self, name, new)
+        if rows is not None:
+            self.used = len(rows)
+            self.free = []
+
+    def nbytes(self) -> int:
+        return self.raw.nbytes + self.obfuscated.nbytes + self.scales.nbytes
+
+
+class EmbeddingCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, quantize: bool = False, initial_rows: int = 256):
+        self.max_bytes = max_bytes
+        self.quantize = quantize
+        self.initial_rows = initial_rows
+        self._dtype = np.int8 if quantize else np.float32
+        self._slabs: Dict[Tuple[int, int], _Slab] = {}
+        self._index: "OrderedDict[Hashable, Tuple[_Slab, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0  # bytes of the vectors currently stored
+        self._allocated = 0  # bytes of every slab's capacity; kept under max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._index
+
+    def entry_bytes(self, dims: Tuple[int, int]) -> int:
+        return (dims[0] + dims[1]) * np.dtype(self._dtype).itemsize + 8
+
+    def get(self, key: Hashable) -> Optional[Pair]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Pair]:
+        """Cached pairs for whichever of ``keys`` are present, under one lock acquisition."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._index.get(key)
+                if entry is None:
+                    self.misses += 1
+                    continue
+                self._index.move_to_end(key)
+                self.hits += 1
+                found[key] = self._read(*entry)
+        return found
+
+    def put(self, key: Hashable, embedding: List[float], obfuscated: List[float]) -> None:
+        dims = (len(embedding), len(obfuscated))
+        size = self.entry_bytes(dims)
+        if size > self.max_bytes:
+            self.rejected += 1
+            return
+        with self._lock:
+            self._discard(key)
+            slab = self._reserve(dims, size)
+            if slab is None:
+                self.rejected += 1
+                return
+            row = slab.allocate()
+            slab.scales[row, 0] = self._store(slab.raw, row, embedding)
+            slab.scales[row, 1] = self._store(slab.obfuscated, row, obfuscated)
+            self._index[key] = (slab, row)
+            self._bytes += size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slabs.clear()
+            self._index.clear()
+            self._bytes = 0
+            self._allocated = 0
+
+    def _reserve(self, dims: Tuple[int, int], size: int) -> Optional[_Slab]:
+        """The slab for ``dims`` with a row available, evicting LRU entries so allocation stays under the cap."""
+        while True:
+            slab = self._slabs.get(dims)
+            if slab is not None and not slab.full:
+                return slab
+            if slab is None:
+                current, wanted = 0, min(self.initial_rows, self.max_bytes // size)
+            else:
+                current, wanted = slab.capacity, min(2 * slab.capacity, slab.max_rows)
+            # Grow by what fits, at least one row; evict the oldest entry while not even that does
+            room = (self.max_bytes - self._allocated) // size
+            capacity = min(wanted, current + room)
+            if capacity > current:
+                if slab is None:
+                    slab = self._slabs[dims] = _Slab(dims, self._dtype, capacity, self.max_bytes // size)
+                else:
+                    slab.resize(capacity)
+                self._allocated += (capacity - current) * size
+                return slab
+            if not self._index:
+                return None
+            self._discard(next(iter(self._index)))
+            self.evictions += 1
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            slab, row = entry
+            slab.free.append(row)
+            size = self.entry_bytes(slab.dims)
+            self._bytes -= size
+            live = slab.used - len(slab.free)
+            if not live:
+                del self._slabs[slab.dims]
+                self._allocated -= slab.capacity * size
+            elif 4 * live <= slab.capacity and slab.capacity > self.initial_rows:
+                self._shrink(slab, size)
+
+    def _shrink(self, slab: _Slab, size: int) -> None:
+        """Move the live rows of a mostly free slab to its front and halve the slab (or more)."""
+        entries = [(row, key) for key, (entry_slab, row) in self._index.items() if entry_slab is slab]
+        entries.sort()
+        capacity = max(2 * len(entries), min(self.initial_rows, slab.max_rows))
+        self._allocated -= (slab.capacity - capacity) * size
+        slab.resize(capacity, np.array([row for row, _ in entries], dtype=np.int64))
+        for new_row, (_, key) in enumerate(entries):
+            self._index[key] = (slab, new_row)
+
+    def _store(self, matrix: np.ndarray, row: int, vector: List[float]) -> float:
+        values = np.asarray(vector, dtype=np.float32)
+        if not self.quantize:
+            matrix[row] = values
+            return 1.0
+        # Symmetric per-row int8: the largest magnitude maps to 127
+        peak = float(np.max(np.abs(values))) if len(values) else 0.0
+        scale = peak / 127.0 if peak else 1.0
+        matrix[row] = np.round(values / scale).astype(np.int8)
+        return scale
+
+    @staticmethod
+    def _read(slab: _Slab, row: int) -> Pair:
+        raw, obfuscated = slab.raw[row], slab.obfuscated[row]
+        if slab.dtype == np.int8:
+            raw = raw.astype(np.float32) * slab.scales[row, 0]
+            obfuscated = obfuscated.astype(np.float32) * slab.scales[row, 1]
+        return raw.tolist(), obfuscated.tolist()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            entries = len(self._index)
+            allocated = sum(slab.nbytes() for slab in self._slabs.values())
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": self._bytes,
+            "allocated_bytes": allocated,
+            "max_bytes": self.max_bytes,
+            "bytes_per_entry": round(self._bytes / entries, 1) if entries else 0,
+            "quantized": self.quantize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "rejected": self.rejected,
+        }
+
+
+# Global instance
+embedding_cache = EmbeddingCache(
+    max_bytes=int(os.getenv("EMBED_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    quantize=os.getenv("EMBED_CACHE_QUANTIZE", "false").lower() == "true",
+)
+metrics.register("embedding_cache", embedding_cache.stats)
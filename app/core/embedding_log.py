@@ -0,0 +1,244 @@
+"""
+Embedding Log Module - Append-only binary log of obfuscated embeddings.
+
+Replaces the CSV log (one JSON float list per cell) with fixed-width float32
+rows in ``vectors.f32`` and one fixed-size record per row in ``rows.bin``
+(timestamp plus indexes into an append-only string table for user, session
+and platform). Readers get memory-mapped NumPy views without parsing;
+writers batch rows in memory and append them from a worker thread.
+"""
+
+import asyncio
+import csv
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .logging import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+RECORD_DTYPE = np.dtype([("timestamp", "<f8"), ("user", "<u4"), ("session", "<u4"), ("platform", "<u4")])
+
+Row = Tuple[float, str, str, str, Sequence[float]]  # (timestamp, user_id, session_id, platform, vector)
+
+
+class EmbeddingLog:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        try:
+            with open(self._path("header.json")) as f:
+                self.dim = json.load(f)["dim"]
+        except (OSError, ValueError, KeyError):
+            pass
+        self._load_strings()
+        self._repair()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _intern(self, value: str) -> int:
+        index = self._string_ids.get(value)
+        if index is None:
+            index = self._string_ids[value] = len(self._strings)
+            self._strings.append(value)
+        return index
+
+    def _load_strings(self) -> None:
+        """Intern the string table, cutting a torn final line so the next append starts on a fresh line."""
+        path = self._path("strings.jsonl")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+        end = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                self._intern(json.loads(line))
+            except ValueError:
+                break  # its string is re-added on next use
+            end += len(line)
+        if end < len(data):
+            with open(path, "r+b") as f:
+                f.truncate(end)
+
+    def _repair(self) -> None:
+        """Drop partial rows left by an interrupted append, so both files hold the same row count."""
+        if self.dim is None:
+            return
+        rows = min(self._file_rows("rows.bin", RECORD_DTYPE.itemsize), self._file_rows("vectors.f32", 4 * self.dim))
+        for name, itemsize in (("rows.bin", RECORD_DTYPE.itemsize), ("vectors.f32", 4 * self.dim)):
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) != rows * itemsize:
+                with open(path, "r+b") as f:
+                    f.truncate(rows * itemsize)
+
+    def _file_rows(self, name: str, itemsize: int) -> int:
+        try:
+            return os.path.getsize(self._path(name)) // itemsize
+        except OSError:
+            return 0
+
+    def __len__(self) -> int:
+        return self._file_rows("rows.bin", RECORD_DTYPE.itemsize) if self.dim is not None else 0
+
+    def append_many(self, rows: Sequence[Row]) -> int:
+        """Append rows; vectors must all have the log's length (fixed by the first append)."""
+        if not rows:
+            return 0
+        vectors = np.asarray([row[4] for row in rows], dtype="<f4")
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                with open(self._path("header.json"), "w") as f:
+                    json.dump({"dim": self.dim, "dtype": "float32"}, f)
+            if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected vectors of length {self.dim}")
+            records = np.empty(len(rows), dtype=RECORD_DTYPE)
+            new_strings = []
+            for i, (timestamp, user_id, session_id, platform, _) in enumerate(rows):
+                ids = []
+                for value in (str(user_id), str(session_id), str(platform)):
+                    if value not in self._string_ids:
+                        new_strings.append(value)
+                    ids.append(self._intern(value))
+                records[i] = (timestamp, *ids)
+            if new_strings:
+                with open(self._path("strings.jsonl"), "a") as f:
+                    f.writelines(json.dumps(value) + "\n" for value in new_strings)
+            # Vectors before records: a row only counts once its record is written
+            with open(self._path("vectors.f32"), "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._path("rows.bin"), "ab") as f:
+                f.write(records.tobytes())
+        return len(rows)
+
+    def vectors(self) -> np.ndarray:
+        """All vectors as a read-only memory-mapped (rows, dim) float32 array."""
+        rows = len(self)
+        if not rows:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.memmap(self._path("vectors.f32"), dtype="<f4", mode="r", shape=(rows, self.dim))
+
+    def records(self) -> np.ndarray:
+        """All row records (timestamp, user, session, platform string ids) as a read-only structured memmap."""
+        rows = len(self)
+        if not rows:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(self._path("rows.bin"), dtype=RECORD_DTYPE, mode="r", shape=(rows,))
+
+    def string_id(self, value: str) -> Optional[int]:
+        return self._string_ids.get(value)
+
+    def string(self, index: int) -> str:
+        return self._strings[index]
+
+    def for_user(self, user_id: str) -> np.ndarray:
+        """Vectors logged for ``user_id`` (a copy, since the rows are not contiguous)."""
+        index = self.string_id(user_id)
+        if index is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self.vectors()[self.records()["user"] == index]
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Rows as dicts with the CSV's columns, for tools that want records rather than arrays."""
+        records, vectors = self.records(), self.vectors()
+        for i in range(start, len(records) if stop is None else min(stop, len(records))):
+            record = records[i]
+            yield {
+                "timestamp": datetime.fromtimestamp(float(record["timestamp"])).isoformat(),
+                "user_id": self._strings[record["user"]],
+                "session_id": self._strings[record["session"]],
+                "platform": self._strings[record["platform"]],
+                "obfuscated_embedding": vectors[i],
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        rows = len(self)
+        return {"rows": rows, "dim": self.dim, "bytes": rows * (RECORD_DTYPE.itemsize + 4 * (self.dim or 0))}
+
+
+class EmbeddingLogWriter:
+    """Collects rows on the event loop and appends them in batches from a worker thread."""
+
+    def __init__(self, log: EmbeddingLog, batch_size: int = 256, interval: float = 1.0, enabled: bool = True):
+        self.log = log
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.interval = interval
+        self._pending: List[Row] = []
+        self._timer: Optional[asyncio.Task] = None  # flushes a partial batch after ``interval``
+        self._flushes: Set[asyncio.Task] = set()
+        self.written = 0
+        self.errors = 0
+
+    def submit(self, user_id: str, session_id: str, platform: str, vectors: Iterable[Sequence[float]]) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        self._pending.extend((now, user_id, session_id, platform, vector) for vector in vectors)
+        loop = asyncio.get_running_loop()
+        if len(self._pending) >= self.batch_size:
+            task = loop.create_task(self.flush())  # takes everything pending, so one task per full batch
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._pending and (self._timer is None or self._timer.done() or self._timer.get_loop() is not loop):
+            self._timer = loop.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        try:
+            self.written += await asyncio.to_thread(self.log.append_many, rows)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Embedding log append of {len(rows)} rows failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.log.stats(), enabled=self.enabled, pending=len(self._pending), written=self.written, errors=self.errors)
+
+
+def convert_csv(csv_path: str, log: EmbeddingLog, batch_size: int = 10000) -> int:
+    """Append the rows of a legacy embedding_log.csv to ``log``; returns rows converted."""
+    converted = 0
+    batch: List[Row] = []
+    csv.field_size_limit(1 << 26)
+    with open(csv_path, newline="") as f:
+        for record in csv.DictReader(f):
+            timestamp = datetime.fromisoformat(record["timestamp"]).timestamp()
+            vector = json.loads(record["obfuscated_embedding"])
+            batch.append((timestamp, record["user_id"], record["session_id"], record["platform"], vector))
+            if len(batch) >= batch_size:
+                converted += log.append_many(batch)
+                batch = []
+    return converted + log.append_many(batch)
+
+
+# Global instances
+embedding_log = EmbeddingLog(os.getenv("EMBEDDING_LOG_DIR", "data/embedding_log"))
+embedding_log_writer = EmbeddingLogWriter(
+    embedding_log,
+    batch_size=int(os.getenv("EMBEDDING_LOG_BATCH_SIZE", "256")),
+    interval=float(os.getenv("EMBEDDING_LOG_FLUSH_INTERVAL", "1.0")),
+    enabled=os.getenv("EMBEDDING_LOG", "true").lower() == "true",
+)
+metrics.register("embedding_log", embedding_log_writer.stats)
@@ -1,21 +1,5 @@
 import os
 import requests
-try:
-    from notion_client import Client as NotionClient
-    from notion_client.errors import APIResponseError as NotionAPIError
-except ImportError:
-    NotionClient = None
-    NotionAPIError = Exception
-try:
-    import gspread
-    from oauth2client.service_account import ServiceAccountCredentials
-except ImportError:
-    gspread = None
-    ServiceAccountCredentials = None
-try:
-    import trello
-except ImportError:
-    trello = None
 from smtplib import SMTP, SMTPException
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -23,8 +7,13 @@ import json
 
 class NotionIntegration:
     def __init__(self):
-        if NotionClient is None:
+        # SDKs are imported when an integration is first used, keeping them off the startup path
+        try:
+            from notion_client import Client as NotionClient
+            from notion_client.errors import APIResponseError
+        except ImportError:
             raise ImportError("notion_client not installed")
+        self.api_error = APIResponseError
         self.token = os.environ.get('NOTION_TOKEN')
         if not self.token:
             raise ValueError("NOTION_TOKEN environment variable not set")
@@ -40,7 +29,7 @@ class NotionIntegration:
                 data["children"] = content
             response = self.client.pages.create(**data)
             return {"status": "success", "page_id": response["id"], "url": response["url"]}
-        except NotionAPIError as e:
+        except self.api_error as e:
             return {"status": "error", "message": str(e)}
         except Exception as e:
             return {"status": "error", "message": f"Unexpected error: {str(e)}"}
@@ -54,14 +43,17 @@ class NotionIntegration:
                 data["children"] = content
             response = self.client.pages.update(page_id, **data)
             return {"status": "success", "page_id": response["id"], "url": response["url"]}
-        except NotionAPIError as e:
+        except self.api_error as e:
             return {"status": "error", "message": str(e)}
         except Exception as e:
             return {"status": "error", "message": f"Unexpected error: {str(e)}"}
 
 class GoogleSheetsIntegration:
     def __init__(self):
-        if gspread is None or ServiceAccountCredentials is None:
+        try:
+            import gspread
+            from oauth2client.service_account import ServiceAccountCredentials
+        except ImportError:
             raise ImportError("gspread or oauth2client not installed")
         creds_json = os.environ.get('GOOGLE_SHEETS_CREDENTIALS')
         if not creds_json:
@@ -81,7 +73,9 @@ class GoogleSheetsIntegration:
 
 class TrelloIntegration:
     def __init__(self):
-        if trello is None:
+        try:
+            import trello
+        except ImportError:
             raise ImportError("trello not installed")
         self.api_key = os.environ.get('TRELLO_API_KEY')
         self.token = os.environ.get('TRELLO_TOKEN')
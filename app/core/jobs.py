@@ -0,0 +1,311 @@
+"""
+Jobs Module - Background execution of long-running workloads.
+
+Submitting a job persists it and returns its id at once; a bounded pool of
+workers takes jobs highest priority first and records the result, so clients
+poll (or receive a webhook) instead of holding a connection open for a whole
+multi-agent run. Jobs live in a local SQLite file, so queued and interrupted
+jobs are picked up again after a restart.
+"""
+
+import asyncio
+import ipaddress
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from .logging import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+Validator = Callable[[Dict[str, Any]], None]
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class JobQueueFullError(Exception):
+    """Raised when the number of queued jobs has reached the configured limit."""
+
+
+def check_webhook_url(url: str, allowed_hosts: Iterable[str] = ()) -> None:
+    """Raise ValueError unless ``url`` is http(s) and its host is allowlisted or resolves only to public addresses."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("webhook_url must be an http or https URL")
+    host = parts.hostname.lower()
+    allowed = {h.lower() for h in allowed_hosts}
+    if allowed:
+        if host not in allowed:
+            raise ValueError(f"webhook host {host} is not allowed")
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parts.port or 80, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"webhook host {host} does not resolve")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"webhook host {host} resolves to a non-public address")
+
+
+class JobStore:
+    """SQLite persistence for job records; results must be JSON-serializable."""
+
+    _COLUMNS = (
+        "id", "kind", "payload", "priority", "status", "result", "error",
+        "webhook_url", "created_at", "started_at", "finished_at",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, priority INTEGER NOT NULL, "
+            "status TEXT NOT NULL, result TEXT, error TEXT, webhook_url TEXT, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def insert(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(self._COLUMNS)}) VALUES ({', '.join('?' * len(self._COLUMNS))})",
+                tuple(self._encode(column, job.get(column)) for column in self._COLUMNS),
+            )
+            self._conn.commit()
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                tuple(self._encode(column, value) for column, value in fields.items()) + (job_id,),
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._decode(row) if row else None
+
+    def unfinished(self):
+        """Queued jobs and jobs interrupted mid-run, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING),
+            ).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (*FINISHED, older_than)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+    @staticmethod
+    def _encode(column: str, value: Any) -> Any:
+        if column in ("payload", "result") and value is not None:
+            return json.dumps(value, default=str)
+        return value
+
+    def _decode(self, row) -> Dict[str, Any]:
+        job = dict(zip(self._COLUMNS, row))
+        for column in ("payload", "result"):
+            if job[column] is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+
+class JobQueue:
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 4,
+        max_queued: int = 1000,
+        job_timeout: Optional[float] = None,
+        retention_seconds: float = 7 * 86400,
+        webhook_hosts: Iterable[str] = (),
+    ):
+        self.store = store
+        self.workers = workers
+        self.max_queued = max_queued
+        self.job_timeout = job_timeout
+        self.retention_seconds = retention_seconds
+        self.webhook_hosts = tuple(webhook_hosts)  # when set, the only hosts webhooks may target
+        self.handlers: Dict[str, Handler] = {}
+        self.validators: Dict[str, Validator] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._order = itertools.count()
+        self._workers: list = []
+        self.running = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def register(self, kind: str, handler: Handler, validate: Optional[Validator] = None) -> None:
+        """Register the coroutine that runs jobs of ``kind``; it receives the job payload.
+
+        ``validate`` is called with the payload at submission and raises
+        ValueError for payloads the handler could not run.
+        """
+        self.handlers[kind] = handler
+        if validate is not None:
+            self.validators[kind] = validate
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    async def validate(self, kind: str, payload: Dict[str, Any], webhook_url: Optional[str] = None) -> None:
+        """Raise ValueError for an unknown kind, a payload its validator rejects or a disallowed webhook_url."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if kind in self.validators:
+            self.validators[kind](payload)
+        if webhook_url is not None:
+            await asyncio.to_thread(check_webhook_url, webhook_url, self.webhook_hosts)
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+        pruned = await asyncio.to_thread(self.store.prune, time.time() - self.retention_seconds)
+        if pruned:
+            logger.info(f"Pruned {pruned} finished jobs")
+        # Jobs queued or running when the process last stopped start over
+        for job in await asyncio.to_thread(self.store.unfinished):
+            if job["status"] == RUNNING:
+                await asyncio.to_thread(self.store.update, job["id"], status=QUEUED, started_at=None)
+            self._enqueue(job["id"], job["priority"])
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        webhook_url: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Persist and enqueue a job; higher ``priority`` runs first. Returns the job record.
+
+        Callers are expected to ``validate`` the job first.
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is not None and self._queue.qsize() >= self.max_queued:
+            raise JobQueueFullError(f"{self.max_queued} jobs already queued")
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "payload": payload,
+            "priority": priority,
+            "status": QUEUED,
+            "webhook_url": webhook_url,
+            "created_at": time.time(),
+        }
+        await asyncio.to_thread(self.store.insert, job)
+        if self._queue is not None:
+            self._enqueue(job["id"], priority)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def _enqueue(self, job_id: str, priority: int) -> None:
+        self._queue.put_nowait((-priority, next(self._order), job_id))
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} could not be run: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+        await asyncio.to_thread(self.store.update, job_id, status=RUNNING, started_at=time.time())
+
+        self.running += 1
+        try:
+            result = await asyncio.wait_for(self.handlers[job["kind"]](job["payload"]), self.job_timeout)
+            fields = {"status": SUCCEEDED, "result": result}
+            self.succeeded += 1
+        except asyncio.TimeoutError:
+            fields = {"status": FAILED, "error": f"Job exceeded {self.job_timeout}s"}
+            self.failed += 1
+        except Exception as e:
+            fields = {"status": FAILED, "error": str(e)}
+            self.failed += 1
+        finally:
+            self.running -= 1
+
+        fields["finished_at"] = time.time()
+        await asyncio.to_thread(self.store.update, job_id, **fields)
+        if job["webhook_url"]:
+            await self._send_webhook(dict(job, **fields))
+
+    async def _send_webhook(self, job: Dict[str, Any]) -> None:
+        body = {key: job.get(key) for key in ("id", "kind", "status", "result", "error", "finished_at")}
+        try:
+            # Checked again at delivery: the host may resolve differently by now
+            await asyncio.to_thread(check_webhook_url, job["webhook_url"], self.webhook_hosts)
+            async with httpx.AsyncClient(timeout=10.0, follow_redirects=False) as client:
+                response = await client.post(job["webhook_url"], json=json.loads(json.dumps(body, default=str)))
+                response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Webhook for job {job['id']} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+        }
+
+
+# Global instance
+job_queue = JobQueue(
+    JobStore(os.getenv("JOBS_DB_PATH", "data/jobs.db")),
+    workers=int(os.getenv("JOBS_WORKERS", "4")),
+    max_queued=int(os.getenv("JOBS_MAX_QUEUED", "1000")),
+    job_timeout=float(os.getenv("JOBS_TIMEOUT", "600")) or None,
+    retention_seconds=float(os.getenv("JOBS_RETENTION_SECONDS", str(7 * 86400))),
+    webhook_hosts=[h.strip() for h in os.getenv("JOBS_WEBHOOK_ALLOWED_HOSTS", "").split(",") if h.strip()],
+)
+metrics.register("jobs", job_queue.stats)
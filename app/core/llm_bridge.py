@@ -1,97 +1,451 @@
 import os
+import re
+import time
 import asyncio
 import hashlib
+from contextlib import nullcontext
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
-from openai import AsyncOpenAI
-from groq import AsyncGroq
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
-try:
-    from mistralai.client import MistralClient
-except ImportError:
-    MistralClient = None
+from .cache import SQLiteCache, TieredCache, TTLCache
+from .logging import get_logger
+from .metrics import metrics
+from .providers import ProviderRegistry, providers as default_providers
+from .resilience import CircuitBreaker, ProviderGuard
+from .routing import ProviderStats, rank_providers
+from .semantic_cache import build_semantic_cache
+
+logger = get_logger(__name__)
+
+# Remote providers get a concurrency limiter and circuit breaker; uniguru is local
+REMOTE_MODELS = ("chatgpt", "groq", "gemini", "mistral")
+# Pseudo-model: let the bridge pick the fastest healthy provider
+AUTO_MODEL = "auto"
+# Prefix of the placeholder answer returned when a provider call fails
+FALLBACK_RE = re.compile(r"\[\w+ Mock\] Response to: ")
+# Registry entry holding each remote model's SDK client
+PROVIDER_FOR_MODEL = {"chatgpt": "openai", "groq": "groq", "gemini": "gemini", "mistral": "mistral"}
+
+
+def build_response_cache() -> TieredCache:
+    """Bounded memory tier, plus a SQLite tier when LLM_CACHE_DISK_PATH is set."""
+    ttl = float(os.getenv("LLM_CACHE_TTL", "3600"))
+    memory = TTLCache(
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048")),
+        ttl=ttl,
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    )
+    disk = None
+    disk_path = os.getenv("LLM_CACHE_DISK_PATH")
+    if disk_path:
+        disk = SQLiteCache(
+            disk_path,
+            max_entries=int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "50000")),
+            ttl=float(os.getenv("LLM_CACHE_DISK_TTL", str(ttl * 24))),
+        )
+    return TieredCache(memory, disk)
+
+
+def is_fallback_output(text: Any) -> bool:
+    """True if ``text`` contains a provider-failure placeholder rather than a model answer."""
+    return bool(FALLBACK_RE.search(str(text)))
+
+
+def _chunk_text(text: str) -> Iterator[str]:
+    """Split text into word-sized tokens, keeping trailing whitespace with each word."""
+    return iter(re.findall(r"\S+\s*", text) or [text])
+
+
+async def _iterate_in_thread(iterator) -> AsyncIterator[Any]:
+    """Drain a blocking SDK iterator without stalling the event loop."""
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            return
+        yield item
 
 
 class LLMBridge:
-    def __init__(self):
-        self.openai_client = None
-        if os.getenv("OPENAI_API_KEY"):
-            self.openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            
-        self.groq_client = None
-        if os.getenv("GROQ_API_KEY"):
-            self.groq_client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
-            
-        self.google_key = os.getenv("GOOGLE_API_KEY")
-        self.mistral_client = MistralClient(api_key=os.getenv("MISTRAL_API_KEY")) if MistralClient and os.getenv("MISTRAL_API_KEY") else None
-
-        if genai and self.google_key:
-            genai.configure(api_key=self.google_key)
-
-        self.cache = {}
-
-    async def call_llm(self, model: str, prompt: str) -> str:
+    def __init__(self, cache=None, semantic_cache=None, providers: Optional[ProviderRegistry] = None):
+        # SDKs are imported and clients built on first use, not at import time
+        self.providers = providers if providers is not None else default_providers
+        # Per-bridge client overrides (tests, scripts) that leave the shared registry alone
+        self._client_overrides: Dict[str, Any] = {}
+
+        # Needs async aget(key) / aset(key, value) plus stats(); wrap a plain get/set cache in TieredCache
+        self.cache = cache if cache is not None else build_response_cache()
+        # Optional paraphrase tier, consulted after an exact-match miss
+        self.semantic_cache = semantic_cache if semantic_cache is not None else build_semantic_cache()
+
+        # Single-flight: concurrent identical prompts share one provider call
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.provider_calls = 0
+        self.coalesced_calls = 0
+
+        self.guards: Dict[str, ProviderGuard] = {model: ProviderGuard(model) for model in REMOTE_MODELS}
+
+        # Latency-aware routing with optional hedging to the runner-up provider
+        self.provider_stats: Dict[str, ProviderStats] = {model: ProviderStats() for model in REMOTE_MODELS}
+        self.hedging_enabled = os.getenv("LLM_HEDGING", "true").lower() == "true"
+        self.hedge_delay = float(os.getenv("LLM_HEDGE_DELAY", "2.0"))
+        self.hedge_min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+
+    async def call_llm(self, model: str, prompt: str, route: bool = False, tenant: str = "default_user") -> str:
+        """Complete ``prompt`` with ``model``.
+
+        With ``route=True`` (or ``model="auto"``) the bridge picks the fastest
+        healthy provider, treating ``model`` only as a tie-breaking preference.
+        ``tenant`` scopes the semantic cache so answers never cross users.
+        """
+        if not prompt or not isinstance(prompt, str):
+            raise ValueError("Prompt must be a non-empty string")
+
+        prompt = prompt.strip()
+        routed = route or model == AUTO_MODEL
+        key = hashlib.sha256(f"{AUTO_MODEL if routed else model}:{prompt}".encode()).hexdigest()
+
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            return cached
+
+        cache_model = AUTO_MODEL if routed else model
+        vector = None
+        if self.semantic_cache is not None:
+            cached, vector = await self.semantic_cache.lookup(tenant, cache_model, prompt)
+            if cached is not None:
+                return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced_calls += 1
+        else:
+            inflight = asyncio.create_task(self._call_and_cache(key, model, prompt, routed))
+            if self.semantic_cache is not None:
+                inflight.add_done_callback(
+                    lambda task: self._store_semantic(task, tenant, cache_model, vector)
+                )
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda task: self._forget_inflight(key, task))
+
+        # Shield so one caller disconnecting does not cancel the call for the others
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            output, _ = await asyncio.shield(inflight)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                # Every caller gave up (deadline, disconnect): stop paying for the provider call
+                if not inflight.done():
+                    inflight.cancel()
+                    self._forget_inflight(key, inflight)
+        return output
+
+    async def stream_llm(self, model: str, prompt: str, route: bool = False) -> AsyncIterator[str]:
+        """Yield completion tokens as the provider produces them.
+
+        With ``route=True`` (or ``model="auto"``) the stream comes from the
+        fastest healthy provider, ``model`` being the preference; streams are
+        not hedged. Cache hits are yielded as a single chunk. If the provider
+        fails before the first token, the mock fallback is streamed instead
+        (and not cached).
+        """
         if not prompt or not isinstance(prompt, str):
             raise ValueError("Prompt must be a non-empty string")
 
         prompt = prompt.strip()
+        if route or model == AUTO_MODEL:
+            preferred = None if model == AUTO_MODEL else model
+            model = (self.rank_models(preferred) or [preferred or "uniguru"])[0]
         key = hashlib.sha256(f"{model}:{prompt}".encode()).hexdigest()
 
-        if key in self.cache:
-            return self.cache[key]
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            yield cached
+            return
 
+        started = time.perf_counter()
+        parts = []
+        cacheable = True
+        guard = self.guards.get(model)
         try:
-            # ----- OPENAI -----
-            if model == "chatgpt":
-                response = await self.openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                output = response.choices[0].message.content
+            async with (guard.protect() if guard is not None else nullcontext()):
+                async for token in self._stream_provider(model, prompt):
+                    if not token:
+                        continue
+                    if not parts:
+                        metrics.observe(f"llm.ttft_seconds.{model}", time.perf_counter() - started)
+                    parts.append(token)
+                    yield token
+        except Exception as e:
+            logger.warning(f"LLM stream from {model} failed: {e}")
+            cacheable = False
+            if not parts:
+                for token in _chunk_text(self._fallback_output(model, prompt)):
+                    yield token
 
-            # ----- GROQ -----
-            elif model == "groq":
-                response = await self.groq_client.chat.completions.create(
-                    model="mixtral-8x7b-instruct",
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                output = response.choices[0].message.content
-
-            # ----- GEMINI -----
-            elif model == "gemini":
-                if not genai:
-                    raise ImportError("google-generativeai not installed")
-                gemini_model = genai.GenerativeModel("gemini-pro")
-                result = await asyncio.to_thread(gemini_model.generate_content, prompt)
-                output = result.text
-
-            # ----- MISTRAL -----
-            elif model == "mistral":
-                if not self.mistral_client:
-                    raise ImportError("mistralai not installed")
-                result = await asyncio.to_thread(
-                    self.mistral_client.chat,
-                    model="mistral-medium",
-                    messages=[{"role": "user", "content": prompt}],
-                )
-                output = result.choices[0].message["content"]
+        if cacheable and parts:
+            await self.cache.aset(key, "".join(parts))
 
-            # ----- UNIGURU -----
-            elif model == "uniguru":
-                output = f"[UniGuru Mock] Local response to: {prompt[:50]}..."
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider_calls": self.provider_calls,
+            "coalesced_calls": self.coalesced_calls,
+            "inflight": len(self._inflight),
+            "providers": {
+                model: {**guard.stats(), "routing": self.provider_stats[model].stats()}
+                for model, guard in self.guards.items()
+            },
+            "hedged_calls": self.hedged_calls,
+            "hedge_wins": self.hedge_wins,
+        }
 
-            else:
-                raise ValueError(f"Unsupported model: {model}")
+    def _forget_inflight(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
 
+    def _store_semantic(self, task: asyncio.Task, tenant: str, model: str, vector) -> None:
+        if task.cancelled() or task.exception() is not None:
+            return
+        output, cacheable = task.result()
+        if cacheable and output is not None:
+            self.semantic_cache.store(tenant, model, vector, output)
+
+    def rank_models(self, preferred: Optional[str] = None) -> List[str]:
+        """Configured remote providers whose breaker is not open, fastest first."""
+        eligible = [
+            model for model in REMOTE_MODELS
+            if self._is_configured(model) and self.guards[model].breaker.state != CircuitBreaker.OPEN
+        ]
+        return rank_providers(eligible, self.provider_stats, preferred)
+
+    def _is_configured(self, model: str) -> bool:
+        provider = PROVIDER_FOR_MODEL.get(model)
+        if provider is None:
+            return model == "uniguru"
+        if provider in self._client_overrides:
+            return self._client_overrides[provider] is not None
+        return self.providers.is_configured(provider)
+
+    def _client(self, provider: str) -> Optional[Any]:
+        if provider in self._client_overrides:
+            return self._client_overrides[provider]
+        return self.providers.get(provider)
+
+    async def _get_client(self, model: str) -> Any:
+        """Client for ``model``; the first build (SDK import) runs off the event loop."""
+        provider = PROVIDER_FOR_MODEL[model]
+        if provider in self._client_overrides:
+            client = self._client_overrides[provider]
+        else:
+            client = await asyncio.to_thread(self.providers.get, provider)
+        if client is None:
+            raise RuntimeError(f"{model} provider is not configured or its SDK is not installed")
+        return client
+
+    @property
+    def openai_client(self):
+        return self._client("openai")
+
+    @openai_client.setter
+    def openai_client(self, client):
+        self._client_overrides["openai"] = client
+
+    @property
+    def groq_client(self):
+        return self._client("groq")
+
+    @groq_client.setter
+    def groq_client(self, client):
+        self._client_overrides["groq"] = client
+
+    @property
+    def mistral_client(self):
+        return self._client("mistral")
+
+    @mistral_client.setter
+    def mistral_client(self, client):
+        self._client_overrides["mistral"] = client
+
+    def _hedge_delay_for(self, model: str) -> float:
+        latency = self.provider_stats[model].latency
+        if latency.count >= self.hedge_min_samples:
+            return latency.percentile(0.95)
+        return self.hedge_delay
+
+    async def _call_and_cache(self, key: str, model: str, prompt: str, routed: bool = False) -> Tuple[str, bool]:
+        if routed:
+            output, cacheable = await self._call_routed(prompt, preferred=None if model == AUTO_MODEL else model)
+        else:
+            output, cacheable = await self._call_provider(model, prompt)
+        if cacheable and output is not None:
+            await self.cache.aset(key, output)
+        return output, cacheable
+
+    async def _call_routed(self, prompt: str, preferred: Optional[str] = None) -> Tuple[str, bool]:
+        """Call the fastest provider; hedge to the next one once the first passes its p95.
+
+        The first non-fallback answer wins and the other call is cancelled. A
+        provider that fails fast is replaced by the next candidate immediately.
+        """
+        candidates = self.rank_models(preferred)
+        if not candidates:
+            return await self._call_provider(preferred or "uniguru", prompt)
+
+        launched: List[asyncio.Task] = []
+        started: List[float] = []
+        pending = set()
+        fallback: Optional[Tuple[str, bool]] = None
+
+        def launch() -> None:
+            model = candidates[len(launched)]
+            task = asyncio.create_task(self._call_provider(model, prompt))
+            launched.append(task)
+            started.append(time.perf_counter())
+            pending.add(task)
+
+        launch()
+        try:
+            while pending:
+                can_hedge = self.hedging_enabled and len(launched) == 1 and len(candidates) > 1
+                timeout = self._hedge_delay_for(candidates[0]) if can_hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedged_calls += 1
+                    launch()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    output, cacheable = task.result()
+                    if cacheable:
+                        if task is not launched[0]:
+                            self.hedge_wins += 1
+                        return output, True
+                    fallback = fallback or (output, cacheable)
+                if not pending and len(launched) < len(candidates):
+                    launch()
+            return fallback
+        finally:
+            for index, task in enumerate(launched):
+                if not task.done():
+                    task.cancel()
+                    # The loser's elapsed time is a lower bound on its latency; recording it
+                    # keeps a persistently slow provider from looking unsampled forever
+                    self.provider_stats[candidates[index]].record(time.perf_counter() - started[index], ok=True)
+
+    async def _call_provider(self, model: str, prompt: str) -> Tuple[str, bool]:
+        """Run one provider call. Returns (output, cacheable); fallbacks are not cacheable."""
+        self.provider_calls += 1
+        stats = self.provider_stats.get(model)
+        started = time.perf_counter()
+        try:
+            guard = self.guards.get(model)
+            if guard is not None:
+                output = await guard.run(self._invoke(model, prompt))
+            else:
+                output = await self._invoke(model, prompt)
+            if stats is not None:
+                stats.record(time.perf_counter() - started, ok=True)
+            return output, True
         except Exception as e:
-            # Fallback to mock response on any error
-            print(f"LLM Call Failed: {e}")
-            output = f"[{model.capitalize()} Mock] Response to: Context: {prompt[:50]}..."
+            if stats is not None:
+                stats.record(None, ok=False)
+            # Fallback to mock response on any error, breaker rejection or backpressure
+            logger.warning(f"LLM call to {model} failed: {e}")
+            # Never cache fallbacks, so the next call retries the provider
+            return self._fallback_output(model, prompt), False
+
+    async def _invoke(self, model: str, prompt: str) -> str:
+        # ----- OPENAI -----
+        if model == "chatgpt":
+            client = await self._get_client(model)
+            response = await client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[{"role": "user", "content": prompt}]
+            )
+            output = response.choices[0].message.content
+
+        # ----- GROQ -----
+        elif model == "groq":
+            client = await self._get_client(model)
+            response = await client.chat.completions.create(
+                model="mixtral-8x7b-instruct",
+                messages=[{"role": "user", "content": prompt}]
+            )
+            output = response.choices[0].message.content
+
+        # ----- GEMINI -----
+        elif model == "gemini":
+            genai = await self._get_client(model)
+            gemini_model = genai.GenerativeModel("gemini-pro")
+            result = await asyncio.to_thread(gemini_model.generate_content, prompt)
+            output = result.text
+
+        # ----- MISTRAL -----
+        elif model == "mistral":
+            client = await self._get_client(model)
+            result = await asyncio.to_thread(
+                client.chat,
+                model="mistral-medium",
+                messages=[{"role": "user", "content": prompt}],
+            )
+            output = result.choices[0].message["content"]
+
+        # ----- UNIGURU -----
+        elif model == "uniguru":
+            output = f"[UniGuru Mock] Local response to: {prompt[:50]}..."
+
+        else:
+            raise ValueError(f"Unsupported model: {model}")
 
-        self.cache[key] = output
         return output
 
+    async def _stream_provider(self, model: str, prompt: str) -> AsyncIterator[str]:
+        self.provider_calls += 1
+        messages = [{"role": "user", "content": prompt}]
+
+        # ----- OPENAI / GROQ -----
+        if model in ("chatgpt", "groq"):
+            client = await self._get_client(model)
+            provider_model = "gpt-3.5-turbo" if model == "chatgpt" else "mixtral-8x7b-instruct"
+            stream = await client.chat.completions.create(model=provider_model, messages=messages, stream=True)
+            async for chunk in stream:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+
+        # ----- GEMINI -----
+        elif model == "gemini":
+            genai = await self._get_client(model)
+            gemini_model = genai.GenerativeModel("gemini-pro")
+            response = await asyncio.to_thread(gemini_model.generate_content, prompt, stream=True)
+            async for chunk in _iterate_in_thread(iter(response)):
+                yield chunk.text
+
+        # ----- MISTRAL -----
+        elif model == "mistral":
+            client = await self._get_client(model)
+            stream = client.chat_stream(model="mistral-medium", messages=messages)
+            async for chunk in _iterate_in_thread(iter(stream)):
+                yield chunk.choices[0].delta.content or ""
+
+        # ----- UNIGURU -----
+        elif model == "uniguru":
+            for token in _chunk_text(f"[UniGuru Mock] Local response to: {prompt[:50]}..."):
+                yield token
+
+        else:
+            raise ValueError(f"Unsupported model: {model}")
+
+    def _fallback_output(self, model: str, prompt: str) -> str:
+        return f"[{model.capitalize()} Mock] Response to: Context: {prompt[:50]}..."
+
 
 llm_bridge = LLMBridge()
+metrics.register("llm_cache", llm_bridge.cache.stats)
+metrics.register("llm_bridge", llm_bridge.stats)
+metrics.register("providers", llm_bridge.providers.stats)
+if llm_bridge.semantic_cache is not None:
+    metrics.register("llm_semantic_cache", llm_bridge.semantic_cache.stats)
@@ -0,0 +1,91 @@
+"""
+Metrics Module - In-process registry for component statistics.
+Components register a stats callable; /metrics collects them on demand.
+Point observations (latencies, sizes) are kept in rolling windows.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+
+def _nearest_rank(sorted_values, q: float) -> float:
+    return sorted_values[min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)]
+
+
+class RollingWindow:
+    """Keeps the last ``size`` observations and summarizes them on demand."""
+
+    def __init__(self, size: int = 1024):
+        self._values: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._values.append(value)
+            self.count += 1
+            self.total += value
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            values = sorted(self._values)
+        return _nearest_rank(values, q) if values else None
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            values = sorted(self._values)
+        if not values:
+            return {"count": self.count}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "p50": _nearest_rank(values, 0.50),
+            "p95": _nearest_rank(values, 0.95),
+            "max": values[-1],
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._windows: Dict[str, RollingWindow] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, source: Callable[[], Dict[str, Any]]) -> None:
+        """Register (or replace) a named stats source."""
+        with self._lock:
+            self._sources[name] = source
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._sources.pop(name, None)
+
+    def observe(self, name: str, value: float) -> None:
+        """Record one observation (e.g. a latency in seconds) under ``name``."""
+        window = self._windows.get(name)
+        if window is None:
+            with self._lock:
+                window = self._windows.setdefault(name, RollingWindow())
+        window.observe(value)
+
+    def collect(self) -> Dict[str, Any]:
+        """Snapshot every registered source; a failing source reports its error."""
+        with self._lock:
+            sources = dict(self._sources)
+            windows = dict(self._windows)
+
+        snapshot = {}
+        for name, source in sources.items():
+            try:
+                snapshot[name] = source()
+            except Exception as e:
+                snapshot[name] = {"error": str(e)}
+        if windows:
+            snapshot["observations"] = {name: window.summary() for name, window in sorted(windows.items())}
+        return snapshot
+
+
+# Global instance
+metrics = MetricsRegistry()
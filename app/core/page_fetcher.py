@@ -0,0 +1,437 @@
+"""
+Page Fetcher Module - Pooled, cached web page retrieval for the browser tool.
+
+Pages are fetched through one shared ``httpx.AsyncClient`` (keep-alive pool,
+bounded concurrency per host) and streamed through an incremental HTML to
+text extractor that stops reading once the size cap is hit. Extracted text
+is stored on disk under its SHA-256, with a small per-URL record holding the
+validators; a fresh record is served without a request, a stale one is
+revalidated with If-None-Match / If-Modified-Since so an unchanged page costs
+a 304 instead of a download. Records older than ``max_age`` are pruned, and
+the oldest go first whenever the cache outgrows ``max_bytes``.
+
+URLs come from user queries, so every request, including each redirect hop,
+is refused unless its host resolves only to public addresses or is listed
+in ``trusted_hosts``.
+"""
+
+import asyncio
+import codecs
+import hashlib
+import ipaddress
+import json
+import os
+import re
+import socket
+import threading
+import time
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from .logging import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+_BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "pre", "table"}
+_SPACE_RE = re.compile(r"[ \t\r\f\v]+")
+
+
+def check_page_url(url: str, trusted_hosts: Iterable[str] = ()) -> None:
+    """Raise ValueError unless ``url`` is http(s) and its host is trusted or resolves only to public addresses."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Unsupported URL: {url}")
+    host = parts.hostname.lower()
+    if host in {h.lower() for h in trusted_hosts}:
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parts.port or 80, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"host {host} does not resolve")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"host {host} resolves to a non-public address")
+
+
+class HTMLTextExtractor(HTMLParser):
+    """Incremental HTML to text: feed chunks, stops collecting after ``max_chars``."""
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.title = ""
+        self._skip = 0
+        self._in_title = False
+
+    @property
+    def full(self) -> bool:
+        return self.length >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        elif tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag in _BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag in _SKIP_TAGS:
+            self._skip = max(self._skip - 1, 0)
+        elif tag in _BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title = (self.title + data)[:200]
+        elif not self._skip:
+            self._append(data)
+
+    def _append(self, text: str) -> None:
+        if not self.full:
+            text = text[:self.max_chars - self.length]
+            self.parts.append(text)
+            self.length += len(text)
+
+    def text(self) -> str:
+        lines = (_SPACE_RE.sub(" ", line).strip() for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+class PageCache:
+    """On-disk page store: text objects named by their SHA-256 plus one JSON record per URL."""
+
+    PRUNE_EVERY = 256  # puts between age-based prunes when the size cap is not hit
+
+    def __init__(self, directory: str, ttl: float = 300.0, max_bytes: int = 256 * 1024 * 1024, max_age: float = 7 * 86400.0):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "urls"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._bytes: Optional[int] = None  # measured on the first put, then tracked
+        self._puts = 0
+        self.evicted = 0
+
+    def _record_path(self, url: str) -> str:
+        return os.path.join(self.directory, "urls", hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """The URL's record with its ``text`` loaded, or None when missing or unreadable."""
+        try:
+            with open(self._record_path(url)) as f:
+                record = json.load(f)
+            with open(self._object_path(record["sha256"]), encoding="utf-8") as f:
+                record["text"] = f.read()
+            return record
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def is_fresh(self, record: Dict[str, Any]) -> bool:
+        return time.time() - record.get("fetched_at", 0) < self.ttl
+
+    def put(self, url: str, text: str, **fields: Any) -> Dict[str, Any]:
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        record = dict(fields, url=url, sha256=digest, fetched_at=time.time())
+        encoded = json.dumps(record)
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(size for _, size in self._files())
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._write(path, text)
+                self._bytes += len(data)
+            self._write(self._record_path(url), encoded)
+            self._bytes += len(encoded)
+            self._puts += 1
+            if self._bytes > self.max_bytes or self._puts >= self.PRUNE_EVERY:
+                self._prune()
+        return dict(record, text=text)
+
+    def prune(self) -> None:
+        with self._lock:
+            self._prune()
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    yield path, os.path.getsize(path)
+                except OSError:
+                    pass
+
+    def _prune(self) -> None:
+        """Drop records older than ``max_age``, then the oldest until under ``max_bytes``, then orphaned objects."""
+        self._puts = 0
+        objects = {}
+        for root, _, names in os.walk(os.path.join(self.directory, "objects")):
+            for name in names:
+                try:
+                    objects[name] = os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        records = []
+        for name in os.listdir(os.path.join(self.directory, "urls")):
+            path = os.path.join(self.directory, "urls", name)
+            try:
+                with open(path) as f:
+                    digest = json.load(f)["sha256"]
+                records.append((os.path.getmtime(path), os.path.getsize(path), path, digest))
+            except (OSError, ValueError, KeyError):
+                records.append((0.0, 0, path, None))  # unreadable: evicted first
+        records.sort()
+        refs: Dict[str, int] = {}
+        for _, _, _, digest in records:
+            refs[digest] = refs.get(digest, 0) + 1
+        total = sum(objects.values()) + sum(size for _, size, _, _ in records)
+        cutoff = time.time() - self.max_age
+        for mtime, size, path, digest in records:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evicted += 1
+            except OSError:
+                pass
+            total -= size
+            refs[digest] -= 1
+            if not refs[digest]:
+                total -= objects.get(digest, 0)
+        for digest in objects:
+            if not refs.get(digest):
+                path = self._object_path(digest)
+                try:
+                    os.remove(path)
+                    os.rmdir(os.path.dirname(path))  # fails while the prefix holds other objects
+                except OSError:
+                    pass
+        self._bytes = total
+
+    def touch(self, record: Dict[str, Any]) -> None:
+        """Mark a revalidated record fresh again."""
+        record = {key: value for key, value in record.items() if key != "text"}
+        record["fetched_at"] = time.time()
+        self._write(self._record_path(record["url"]), json.dumps(record))
+
+    @staticmethod
+    def _write(path: str, content: str) -> None:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp, path)
+
+
+class PageFetcher:
+    def __init__(
+        self,
+        cache: Optional[PageCache] = None,
+        max_connections: int = 20,
+        per_host: int = 4,
+        max_bytes: int = 2 * 1024 * 1024,
+        max_chars: int = 20000,
+        timeout: float = 10.0,
+        max_redirects: int = 5,
+        trusted_hosts: Iterable[str] = (),
+    ):
+        self.cache = cache
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.trusted_hosts = list(trusted_hosts)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.requests = 0
+        self.cache_hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+        self.truncated = 0
+        self.errors = 0
+        self.bytes_read = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # Clients and semaphores are bound to the loop that created them
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                timeout=self.timeout,
+                follow_redirects=False,  # each hop is checked in _fetch
+                headers={"User-Agent": "AssistantCore/3.0 (+page fetcher)"},
+            )
+            self._loop = loop
+            self._hosts = {}
+            self._inflight = {}
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, url: str) -> Dict[str, Any]:
+        """Fetch ``url`` as ``{url, status, title, text, truncated, cached}``; concurrent calls for one URL share a request."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        self.requests += 1
+        self._get_client()
+        task = self._inflight.get(url)
+        if task is None:
+            task = self._inflight[url] = asyncio.create_task(self._fetch(url, parts.hostname))
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return dict(await asyncio.shield(task))
+
+    async def _fetch(self, url: str, host: str) -> Dict[str, Any]:
+        record = await asyncio.to_thread(self.cache.get, url) if self.cache is not None else None
+        if record is not None and self.cache.is_fresh(record):
+            self.cache_hits += 1
+            return self._result(record, cached=True)
+
+        headers = {}
+        if record is not None:
+            if record.get("etag"):
+                headers["If-None-Match"] = record["etag"]
+            if record.get("last_modified"):
+                headers["If-Modified-Since"] = record["last_modified"]
+
+        semaphore = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        target = url
+        try:
+            async with semaphore:
+                for _ in range(self.max_redirects + 1):
+                    await asyncio.to_thread(check_page_url, target, self.trusted_hosts)
+                    async with self._get_client().stream("GET", target, headers=headers) as response:
+                        if response.is_redirect and "Location" in response.headers:  # 304 counts as a redirect
+                            target = urljoin(target, response.headers["Location"])
+                            continue
+                        if response.status_code == 304 and record is not None:
+                            self.revalidated += 1
+                            await asyncio.to_thread(self.cache.touch, record)
+                            return self._result(record, cached=True)
+                        text, title, truncated = await self._read_text(response)
+                        break
+                else:
+                    raise httpx.TooManyRedirects(f"More than {self.max_redirects} redirects fetching {url}")
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+
+        self.downloads += 1
+        self.truncated += truncated
+        fields = {
+            "status": response.status_code,
+            "title": title,
+            "truncated": truncated,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        if self.cache is not None and response.status_code == 200:
+            stored = await asyncio.to_thread(self.cache.put, url, text, **fields)
+            return self._result(stored, cached=False)
+        return self._result(dict(fields, url=url, text=text), cached=False)
+
+    async def _read_text(self, response: httpx.Response):
+        """Decode the body as it streams in; stops once ``max_bytes`` were read or ``max_chars`` extracted."""
+        content_type = response.headers.get("Content-Type", "text/html").lower()
+        if not content_type.startswith(("text/", "application/xhtml", "application/xml", "application/json")):
+            return f"[{content_type.split(';')[0]} content not extracted]", "", False
+        try:
+            decoder = codecs.getincrementaldecoder(response.charset_encoding or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")  # unknown charset label
+        is_html = "html" in content_type
+        extractor = HTMLTextExtractor(self.max_chars) if is_html else None
+        plain = []
+        read = 0
+        truncated = False
+        async for chunk in response.aiter_bytes():
+            chunk = chunk[:self.max_bytes - read]
+            read += len(chunk)
+            self.bytes_read += len(chunk)
+            text = decoder.decode(chunk)
+            if extractor is not None:
+                extractor.feed(text)
+                full = extractor.full
+            else:
+                plain.append(text)
+                full = sum(map(len, plain)) >= self.max_chars
+            if full or read >= self.max_bytes:
+                truncated = True
+                break
+        if extractor is not None:
+            extractor.close()
+            return extractor.text(), extractor.title.strip(), truncated
+        return "".join(plain)[:self.max_chars], "", truncated
+
+    @staticmethod
+    def _result(record: Dict[str, Any], cached: bool) -> Dict[str, Any]:
+        return {
+            "url": record["url"],
+            "status": record.get("status", 200),
+            "title": record.get("title", ""),
+            "text": record.get("text", ""),
+            "truncated": record.get("truncated", False),
+            "cached": cached,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "revalidated": self.revalidated,
+            "downloads": self.downloads,
+            "truncated": self.truncated,
+            "errors": self.errors,
+            "bytes_read": self.bytes_read,
+            "hosts": len(self._hosts),
+            "cache_evicted": self.cache.evicted if self.cache is not None else 0,
+        }
+
+
+def build_page_fetcher() -> PageFetcher:
+    cache = None
+    if os.getenv("PAGE_CACHE", "true").lower() == "true":
+        cache = PageCache(
+            os.getenv("PAGE_CACHE_DIR", "data/page_cache"),
+            ttl=float(os.getenv("PAGE_CACHE_TTL", "300")),
+            max_bytes=int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            max_age=float(os.getenv("PAGE_CACHE_MAX_AGE", str(7 * 86400))),
+        )
+    return PageFetcher(
+        cache,
+        max_connections=int(os.getenv("PAGE_FETCH_MAX_CONNECTIONS", "20")),
+        per_host=int(os.getenv("PAGE_FETCH_PER_HOST", "4")),
+        max_bytes=int(os.getenv("PAGE_FETCH_MAX_BYTES", str(2 * 1024 * 1024))),
+        max_chars=int(os.getenv("PAGE_FETCH_MAX_CHARS", "20000")),
+        timeout=float(os.getenv("PAGE_FETCH_TIMEOUT", "10")),
+        max_redirects=int(os.getenv("PAGE_FETCH_MAX_REDIRECTS", "5")),
+        trusted_hosts=[h.strip() for h in os.getenv("PAGE_FETCH_TRUSTED_HOSTS", "").split(",") if h.strip()],
+    )
+
+
+# Global instance
+page_fetcher = build_page_fetcher()
+metrics.register("page_fetcher", page_fetcher.stats)
@@ -0,0 +1,168 @@
+"""
+Prompt Builder Module - Fills prompt templates within a token budget.
+
+Token counts are a fast local estimate (no tokenizer download): every word
+costs one token per four characters and every punctuation mark one token,
+which tracks BPE tokenizers closely enough for budgeting. The query may use
+at most its own share of the budget and is truncated past it. Fields that do
+not fit are compacted: entries least relevant to the query, and oldest, are
+dropped first and long entries are cut down to a leading excerpt.
+"""
+
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .metrics import metrics
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"\w{3,}")
+
+TRUNCATION_MARK = " ...[truncated]"
+# Smallest excerpt worth keeping when an entry has to be cut down
+MIN_ENTRY_TOKENS = 24
+
+
+def estimate_tokens(text: str) -> int:
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_RE.findall(text))
+
+
+_MARK_TOKENS = estimate_tokens(TRUNCATION_MARK)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the leading ``max_tokens`` (estimated) of ``text``."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max_tokens - _MARK_TOKENS
+    if limit <= 0:
+        return ""
+    used = 0
+    for match in _TOKEN_RE.finditer(text):
+        used += (len(match.group()) + 3) // 4
+        if used > limit:
+            return text[:match.start()].rstrip() + TRUNCATION_MARK
+    return text
+
+
+def _render_entry(key: Any, value: Any) -> str:
+    return f"- {value}" if key is None else f"- {key}: {value}"
+
+
+def _entries(value: Any) -> List[Tuple[Any, Any]]:
+    if isinstance(value, dict):
+        return list(value.items())
+    return [(None, item) for item in value]
+
+
+def compact(value: Any, query: str, budget: int) -> Tuple[str, int, bool]:
+    """Render ``value`` within ``budget`` tokens; returns (text, entries dropped, whether anything was cut).
+
+    Strings are truncated. Dicts and lists become one line per entry, ranked
+    by word overlap with ``query`` and then by recency (later entries are
+    newer); the best entries are kept, in their original order, with long
+    ones cut down to an excerpt so a single entry cannot take the whole budget.
+    """
+    if value is None or value == {} or value == []:
+        return "none", 0, False
+    if not isinstance(value, (dict, list, tuple)):
+        text = str(value)
+        if estimate_tokens(text) <= budget:
+            return text, 0, False
+        return truncate_to_tokens(text, budget), 0, True
+
+    entries = _entries(value)
+    rendered = [_render_entry(key, item) for key, item in entries]
+    sizes = [estimate_tokens(line) for line in rendered]
+    if sum(sizes) <= budget:
+        return "\n".join(rendered), 0, False
+
+    query_words = set(_WORD_RE.findall(query.lower()))
+
+    def score(index: int) -> Tuple[int, int]:
+        overlap = len(query_words & set(_WORD_RE.findall(rendered[index].lower()))) if query_words else 0
+        return overlap, index
+
+    # Leave room for the omission note
+    remaining = budget - estimate_tokens("(+0000 entries omitted)")
+    entry_cap = max(remaining // min(len(rendered), 4), MIN_ENTRY_TOKENS)
+    kept: Dict[int, str] = {}
+    for index in sorted(range(len(rendered)), key=score, reverse=True):
+        allowed = min(entry_cap, remaining)
+        if sizes[index] <= allowed:
+            kept[index] = rendered[index]
+            remaining -= sizes[index]
+        elif allowed >= MIN_ENTRY_TOKENS:
+            kept[index] = truncate_to_tokens(rendered[index], allowed)
+            remaining -= estimate_tokens(kept[index])
+
+    dropped = len(rendered) - len(kept)
+    lines = [kept[index] for index in sorted(kept)]
+    if dropped:
+        lines.append(f"(+{dropped} entries omitted)")
+    return "\n".join(lines), dropped, True
+
+
+class PromptBuilder:
+    """Per-agent template renderer that keeps prompts under a token budget."""
+
+    def __init__(self, name: str, budget: Optional[int] = None, query_share: Optional[float] = None):
+        self.name = name
+        self.budget = budget if budget is not None else int(
+            os.getenv(f"PROMPT_TOKEN_BUDGET_{name.upper()}", os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+        )
+        self.query_share = query_share if query_share is not None else float(os.getenv("PROMPT_QUERY_SHARE", "0.5"))
+
+    def render(self, template: str, query: str = "", **fields: Any) -> str:
+        """Format ``template`` with ``query`` and every other field compacted to fit.
+
+        The query gets at most ``query_share`` of the budget (split between
+        its placeholders) and is truncated past that. The fixed text and the
+        query are charged first; the rest of the budget is shared between
+        fields, smallest first, so space a small field does not use passes on
+        to the larger ones.
+        """
+        query = str(query)
+        query_cap = int(self.budget * self.query_share) // max(template.count("{query}"), 1)
+        compacted = estimate_tokens(query) > query_cap
+        if compacted:
+            query = truncate_to_tokens(query, query_cap)
+        fixed = template.format(query=query, **{name: "" for name in fields})
+        remaining = max(self.budget - estimate_tokens(fixed), 0)
+
+        values: Dict[str, str] = {}
+        dropped = 0
+        order = sorted(fields, key=lambda name: estimate_tokens(str(fields[name])))
+        for position, name in enumerate(order):
+            share = remaining // (len(order) - position)
+            text, lost, cut = compact(fields[name], query, share)
+            values[name] = text
+            dropped += lost
+            compacted = compacted or cut
+            remaining -= min(estimate_tokens(text), remaining)
+
+        prompt = template.format(query=query, **values)
+        _record(self.name, estimate_tokens(prompt), dropped, compacted)
+        return prompt
+
+
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(name: str, tokens: int, dropped: int, compacted: bool) -> None:
+    metrics.observe(f"prompt_tokens.{name}", tokens)
+    with _stats_lock:
+        entry = _stats.setdefault(name, {"prompts": 0, "compacted": 0, "dropped_entries": 0})
+        entry["prompts"] += 1
+        entry["compacted"] += int(compacted)
+        entry["dropped_entries"] += dropped
+
+
+def prompt_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return {name: dict(entry) for name, entry in _stats.items()}
+
+
+metrics.register("prompts", prompt_stats)
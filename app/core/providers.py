@@ -0,0 +1,123 @@
+"""
+Providers Module - Lazy registry of provider SDK clients.
+
+SDKs such as openai, groq, google.generativeai and mistralai cost hundreds of
+milliseconds to import. The registry only records how to build each client;
+the SDK is imported and the client constructed on first ``get``. Whether a
+provider is configured is answered from the environment alone, so routing
+decisions never trigger an import.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class ProviderRegistry:
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._env: Dict[str, str] = {}
+        self._clients: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._build_seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any], env: str) -> None:
+        """Register a client factory; ``env`` names the variable that must be set for it to be usable."""
+        with self._lock:
+            self._factories[name] = factory
+            self._env[name] = env
+            self._clients.pop(name, None)
+            self._errors.pop(name, None)
+
+    def is_configured(self, name: str) -> bool:
+        if name in self._clients:
+            return self._clients[name] is not None
+        return name in self._factories and bool(os.getenv(self._env[name]))
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return the client, building it on first use; None if unconfigured or the SDK is missing."""
+        if name in self._clients:
+            return self._clients[name]
+        if not self.is_configured(name):
+            return None
+        with self._lock:
+            if name not in self._clients:
+                started = time.perf_counter()
+                try:
+                    self._clients[name] = self._factories[name]()
+                except Exception as e:
+                    self._clients[name] = None
+                    self._errors[name] = str(e)
+                self._build_seconds[name] = time.perf_counter() - started
+        return self._clients[name]
+
+    def set(self, name: str, client: Any) -> None:
+        """Install a prebuilt client (or None to disable the provider)."""
+        with self._lock:
+            self._clients[name] = client
+
+    def reset(self, name: Optional[str] = None) -> None:
+        """Forget built clients so the next ``get`` rebuilds them (e.g. after rotating keys)."""
+        with self._lock:
+            for key in ([name] if name else list(self._clients)):
+                self._clients.pop(key, None)
+                self._errors.pop(key, None)
+
+    def preload(self, names: Optional[Iterable[str]] = None) -> None:
+        """Build every configured client now; meant to run off the request path after startup."""
+        for name in names or list(self._factories):
+            self.get(name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "configured": self.is_configured(name),
+                "loaded": name in self._clients and self._clients[name] is not None,
+                "build_seconds": self._build_seconds.get(name),
+                "error": self._errors.get(name),
+            }
+            for name in self._factories
+        }
+
+
+def _openai_async():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def _openai_sync():
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def _groq():
+    from groq import AsyncGroq
+    return AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+
+
+def _gemini():
+    # The SDK is configured globally, so the module itself acts as the client
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    return genai
+
+
+def _mistral():
+    from mistralai.client import MistralClient
+    return MistralClient(api_key=os.getenv("MISTRAL_API_KEY"))
+
+
+def build_provider_registry() -> ProviderRegistry:
+    registry = ProviderRegistry()
+    registry.register("openai", _openai_async, "OPENAI_API_KEY")
+    registry.register("openai_sync", _openai_sync, "OPENAI_API_KEY")
+    registry.register("groq", _groq, "GROQ_API_KEY")
+    registry.register("gemini", _gemini, "GOOGLE_API_KEY")
+    registry.register("mistral", _mistral, "MISTRAL_API_KEY")
+    return registry
+
+
+# Global instance
+providers = build_provider_registry()
@@ -0,0 +1,265 @@
+"""
+Resilience Module - Per-provider concurrency limits and circuit breakers.
+
+AdaptiveLimiter caps in-flight calls and adjusts the cap AIMD-style: it grows
+by ~1 per window of fast successes and halves on 429s, timeouts or slow calls.
+CircuitBreaker opens once the error rate over a rolling window crosses a
+threshold, fails fast while open, and closes again after a half-open probe
+succeeds.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+
+class BackpressureError(Exception):
+    """Raised when a provider's concurrency limit is saturated past the queue timeout."""
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is rejecting calls."""
+
+
+def is_throttled(error: Exception) -> bool:
+    """True for provider 429s and timeouts, the signals that should shrink the limit."""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or "429" in str(error)
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        latency_target: float = 10.0,
+        max_queue: int = 256,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 1.0,
+    ):
+        self.limit = float(initial)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.latency_target = latency_target
+        self.max_queue = max_queue
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.inflight = 0
+        self.rejected = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        # Plain futures rather than an asyncio.Semaphore so the limiter is not tied to one event loop
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise BackpressureError("provider queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self.rejected += 1
+            raise BackpressureError(f"no provider slot within {timeout}s")
+        except asyncio.CancelledError:
+            self._discard(waiter)
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0, overloaded=False)
+            raise
+
+    def release(self, latency: float, overloaded: bool) -> None:
+        self.inflight -= 1
+        now = time.monotonic()
+        if overloaded or latency > self.latency_target:
+            if now - self._last_decrease >= self.decrease_cooldown:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                self.decreases += 1
+                self._last_decrease = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _wake(self) -> None:
+        while self._waiters and self.inflight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.inflight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "queued": len(self._waiters),
+            "rejected": self.rejected,
+            "decreases": self.decreases,
+        }
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        error_rate: float = 0.5,
+        min_requests: int = 10,
+        window_seconds: float = 30.0,
+        cooldown_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.short_circuited = 0
+        self.trips = 0
+        self._probes = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self.opened_at >= self.cooldown_seconds:
+            self.state = self.HALF_OPEN
+            self._probes = 0
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and self._probes < self.half_open_probes:
+            self._probes += 1
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._close()
+            return
+        self._record(True)
+
+    def record_failure(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        self._record(False)
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        if len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) >= self.error_rate:
+            self._open()
+
+    def record_cancelled(self) -> None:
+        """Give back a half-open probe slot when the probing call was cancelled."""
+        if self.state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def _record(self, ok: bool) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._outcomes.clear()
+
+    def _close(self) -> None:
+        self.state = self.CLOSED
+        self._probes = 0
+        self._outcomes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        return {
+            "state": self.state,
+            "window_requests": len(self._outcomes),
+            "window_error_rate": (failures / len(self._outcomes)) if self._outcomes else 0.0,
+            "trips": self.trips,
+            "short_circuited": self.short_circuited,
+        }
+
+
+class ProviderGuard:
+    """Breaker + adaptive limiter + call timeout for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        limiter: Optional[AdaptiveLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        call_timeout: Optional[float] = None,
+        queue_timeout: Optional[float] = None,
+    ):
+        self.name = name
+        self.limiter = limiter or AdaptiveLimiter(
+            initial=float(os.getenv("LLM_CONCURRENCY_INITIAL", "8")),
+            max_limit=float(os.getenv("LLM_CONCURRENCY_MAX", "64")),
+            latency_target=float(os.getenv("LLM_LATENCY_TARGET", "10")),
+        )
+        self.breaker = breaker or CircuitBreaker(
+            error_rate=float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5")),
+            min_requests=int(os.getenv("LLM_BREAKER_MIN_REQUESTS", "10")),
+            window_seconds=float(os.getenv("LLM_BREAKER_WINDOW", "30")),
+            cooldown_seconds=float(os.getenv("LLM_BREAKER_COOLDOWN", "30")),
+        )
+        self.call_timeout = call_timeout if call_timeout is not None else float(os.getenv("LLM_CALL_TIMEOUT", "30"))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv("LLM_QUEUE_TIMEOUT", "5"))
+
+    @asynccontextmanager
+    async def protect(self) -> AsyncIterator[None]:
+        """Admit one call: raises CircuitOpenError / BackpressureError instead of waiting on a sick provider."""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit open")
+        try:
+            await self.limiter.acquire(self.queue_timeout)
+        except BaseException:
+            self.breaker.record_cancelled()
+            raise
+
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.limiter.release(time.monotonic() - started, overloaded=is_throttled(e))
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancellation or a closed stream: free the slot without judging the provider
+            self.limiter.release(time.monotonic() - started, overloaded=False)
+            self.breaker.record_cancelled()
+            raise
+        else:
+            self.limiter.release(time.monotonic() - started, overloaded=False)
+            self.breaker.record_success()
+
+    async def run(self, coro):
+        """Await ``coro`` under this guard with the per-call timeout applied."""
+        try:
+            async with self.protect():
+                return await asyncio.wait_for(coro, self.call_timeout)
+        finally:
+            coro.close()  # no-op once awaited; avoids a never-awaited warning when rejected
+
+    def stats(self) -> Dict[str, Any]:
+        return {"breaker": self.breaker.stats(), "limiter": self.limiter.stats()}
@@ -0,0 +1,63 @@
+"""
+Routing Module - Live per-provider latency and error tracking for LLM routing.
+"""
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .metrics import RollingWindow
+
+
+class ProviderStats:
+    """Rolling latency percentiles and error rate for one provider."""
+
+    def __init__(self, window: int = 256, error_window_seconds: float = 60.0):
+        self.latency = RollingWindow(window)
+        self.error_window_seconds = error_window_seconds
+        self._outcomes: Deque[Tuple[float, bool]] = deque(maxlen=window)
+
+    def record(self, latency: Optional[float], ok: bool) -> None:
+        if ok and latency is not None:
+            self.latency.observe(latency)
+        self._outcomes.append((time.monotonic(), ok))
+
+    def error_rate(self) -> float:
+        cutoff = time.monotonic() - self.error_window_seconds
+        recent = [ok for ts, ok in self._outcomes if ts >= cutoff]
+        if not recent:
+            return 0.0
+        return sum(1 for ok in recent if not ok) / len(recent)
+
+    def expected_latency(self) -> Optional[float]:
+        """p50 inflated by the error rate (expected time to a good answer); None until sampled."""
+        p50 = self.latency.percentile(0.50)
+        if p50 is None:
+            return None
+        return p50 / max(1.0 - self.error_rate(), 0.05)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "samples": self.latency.count,
+            "p50": self.latency.percentile(0.50),
+            "p95": self.latency.percentile(0.95),
+            "error_rate": round(self.error_rate(), 3),
+        }
+
+
+def rank_providers(
+    candidates: Iterable[str],
+    stats: Dict[str, ProviderStats],
+    preferred: Optional[str] = None,
+) -> List[str]:
+    """Order candidates fastest first.
+
+    Providers without samples rank first so they get explored; ties go to
+    ``preferred``, then to the original candidate order.
+    """
+    def sort_key(item):
+        index, model = item
+        expected = stats[model].expected_latency() if model in stats else None
+        return (expected if expected is not None else 0.0, model != preferred, index)
+
+    return [model for _, model in sorted(enumerate(candidates), key=sort_key)]
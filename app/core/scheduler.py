@@ -0,0 +1,357 @@
+"""
+Scheduler Module - Fires due reminders, alarms and meetings from the tasks table.
+
+Pending tasks due within the next ``slots * tick_seconds`` are held in a hashed
+timing wheel (O(1) insert, O(1) per tick plus the number of expired tasks).
+Everything further out stays in the tasks table, which acts as the wheel's
+coarse overflow level: it is paged in by keyset cursor on (due_at, id) as the
+horizon advances, and the cursor is persisted so a restart resumes where the
+previous process stopped. With several workers each one may hold the same
+task; a worker only delivers the rows it atomically moved out of "pending".
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import task_cache
+from .external_integrations import ExternalIntegrations
+from .logging import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_timestamp(value: datetime) -> float:
+    return (value - _EPOCH).total_seconds()
+
+
+class TimingWheel:
+    """Single-level hashed timing wheel covering ``slots`` ticks ahead of the current tick."""
+
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 3600, start: Optional[float] = None):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self._buckets: List[List[Any]] = [[] for _ in range(slots)]
+        self._current_tick = int((start if start is not None else 0.0) // tick_seconds)
+        self._size = 0
+
+    @property
+    def span_seconds(self) -> float:
+        return self.tick_seconds * self.slots
+
+    def horizon(self) -> float:
+        """Latest timestamp the wheel can currently accept."""
+        return (self._current_tick + self.slots) * self.tick_seconds - 1e-6
+
+    def add(self, due_ts: float, item: Any) -> bool:
+        """Insert an item; returns False when it lies beyond the wheel's horizon."""
+        tick = max(int(due_ts // self.tick_seconds), self._current_tick)
+        if tick >= self._current_tick + self.slots:
+            return False
+        self._buckets[tick % self.slots].append(item)
+        self._size += 1
+        return True
+
+    def advance(self, now_ts: float) -> List[Any]:
+        """Move the wheel up to ``now_ts`` and return every item that expired on the way."""
+        now_tick = int(now_ts // self.tick_seconds)
+        expired: List[Any] = []
+        steps = min(now_tick - self._current_tick + 1, self.slots)
+        for offset in range(max(steps, 0)):
+            bucket_index = (self._current_tick + offset) % self.slots
+            bucket = self._buckets[bucket_index]
+            if bucket:
+                expired.extend(bucket)
+                self._buckets[bucket_index] = []
+        if now_tick >= self._current_tick:
+            self._current_tick = now_tick + 1
+        self._size -= len(expired)
+        return expired
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class TaskDispatcher:
+    """Delivers a fired task through the configured external integration."""
+
+    def __init__(self, integrations: Optional[ExternalIntegrations] = None):
+        self.integrations = integrations or ExternalIntegrations()
+        self.default_channel = os.getenv("SCHEDULER_CHANNEL", "log")
+        self.webhook_url = os.getenv("SCHEDULER_WEBHOOK_URL")
+
+    def dispatch(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        parameters = task.get("parameters") or {}
+        channel = parameters.get("channel") or self.default_channel
+        task_type = task.get("task_type") or "reminder"
+        message = parameters.get("message") or task.get("description", "")
+
+        if channel == "email":
+            contact = parameters.get("contact")
+            if not contact:
+                return {"status": "error", "message": "No contact for email delivery"}
+            subject = f"{task_type.capitalize()}: {message[:60]}"
+            return self.integrations.get_integration("email").send_email(contact, subject, message)
+
+        if channel == "webhook":
+            if not self.webhook_url:
+                return {"status": "error", "message": "SCHEDULER_WEBHOOK_URL not set"}
+            return self.integrations.get_integration("webhook").post_webhook(self.webhook_url, task)
+
+        logger.info(f"Scheduled {task_type} fired: {message}", extra={"extra_fields": {"task_id": task.get("id")}})
+        return {"status": "success", "channel": "log"}
+
+
+class TaskScheduler:
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        dispatcher: Optional[TaskDispatcher] = None,
+        tick_seconds: Optional[float] = None,
+        slots: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        name: str = "default",
+    ):
+        self._session_factory = session_factory
+        self.dispatcher = dispatcher or TaskDispatcher()
+        self.tick_seconds = tick_seconds if tick_seconds is not None else float(os.getenv("SCHEDULER_TICK_SECONDS", "1"))
+        self.slots = slots if slots is not None else int(os.getenv("SCHEDULER_WHEEL_SLOTS", "3600"))
+        self.batch_size = batch_size if batch_size is not None else int(os.getenv("SCHEDULER_BATCH_SIZE", "10000"))
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "16"))
+        self.name = name
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.wheel = TimingWheel(self.tick_seconds, self.slots, start=_to_timestamp(datetime.utcnow()))
+        # Keyset cursor: every pending task at or before (due_at, id) is already in the wheel
+        self.cursor: Tuple[Optional[datetime], int] = (None, 0)
+        self.last_fired_at: Optional[datetime] = None
+        self.fired = 0
+        self.failed = 0
+        self.claimed_elsewhere = 0
+        self._restored = False
+        self._saved_cursor: Tuple[Optional[datetime], int] = (None, 0)
+        self._runner: Optional[asyncio.Task] = None
+
+    @property
+    def session_factory(self):
+        if self._session_factory is None:
+            from .database import async_session
+            self._session_factory = async_session
+        return self._session_factory
+
+    # ------------------------------
+    # Public API
+    # ------------------------------
+    def schedule(self, task_id: int, due_at: datetime) -> bool:
+        """Track a newly created task if it is due within the wheel's horizon.
+
+        A window load racing with the insert may add the same id again; both
+        copies land in the same tick and the row is only fired once.
+        """
+        return self.wheel.add(_to_timestamp(due_at), task_id)
+
+    async def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Restore state if needed, page in the window, and fire everything due. Returns tasks fired."""
+        now = now or datetime.utcnow()
+        if not self._restored:
+            await self._restore_state()
+        await self._load_window(now)
+        due_ids = self.wheel.advance(_to_timestamp(now))
+        if not due_ids:
+            return 0
+        return await self._fire(due_ids, now)
+
+    def stats(self) -> Dict[str, Any]:
+        cursor_due, cursor_id = self.cursor
+        return {
+            "running": self._runner is not None,
+            "in_wheel": len(self.wheel),
+            "horizon_seconds": self.wheel.span_seconds,
+            "fired": self.fired,
+            "failed": self.failed,
+            "claimed_elsewhere": self.claimed_elsewhere,
+            "cursor_due_at": cursor_due.isoformat() if cursor_due else None,
+            "cursor_task_id": cursor_id,
+            "last_fired_at": self.last_fired_at.isoformat() if self.last_fired_at else None,
+        }
+
+    # ------------------------------
+    # Internals
+    # ------------------------------
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler tick failed: {e}")
+            await asyncio.sleep(self.tick_seconds)
+
+    async def _restore_state(self) -> None:
+        from sqlalchemy import select
+        from .database import SchedulerState, Task
+
+        async with self.session_factory() as session:
+            state = await session.get(SchedulerState, self.name)
+            if state is not None and state.cursor_due_at is not None:
+                self.cursor = (state.cursor_due_at, state.cursor_task_id)
+                self._saved_cursor = self.cursor
+                self.last_fired_at = state.last_fired_at
+                # Re-arm tasks that were loaded but not fired before the last shutdown
+                result = await session.execute(
+                    select(Task.id, Task.due_at)
+                    .where(Task.status == "pending", Task.due_at.is_not(None), Task.due_at <= state.cursor_due_at)
+                    .order_by(Task.due_at, Task.id)
+                )
+                for task_id, due_at in result.all():
+                    if (due_at, task_id) <= self.cursor:
+                        self.wheel.add(_to_timestamp(due_at), task_id)
+        self._restored = True
+
+    async def _load_window(self, now: datetime) -> None:
+        from sqlalchemy import and_, or_, select
+        from .database import Task
+
+        horizon = _EPOCH + timedelta(seconds=self.wheel.horizon())
+        while True:
+            cursor_due, cursor_id = self.cursor
+            if cursor_due is not None and cursor_due >= horizon:
+                return
+            query = select(Task.id, Task.due_at).where(
+                Task.status == "pending",
+                Task.due_at.is_not(None),
+                Task.due_at <= horizon,
+            )
+            if cursor_due is not None:
+                query = query.where(or_(
+                    Task.due_at > cursor_due,
+                    and_(Task.due_at == cursor_due, Task.id > cursor_id),
+                ))
+            query = query.order_by(Task.due_at, Task.id).limit(self.batch_size)
+
+            async with self.session_factory() as session:
+                rows = (await session.execute(query)).all()
+
+            for task_id, due_at in rows:
+                self.wheel.add(_to_timestamp(due_at), task_id)
+            if rows:
+                last_id, last_due = rows[-1]
+                self.cursor = (last_due, last_id)
+            if len(rows) < self.batch_size:
+                # Window fully loaded; move the cursor to the horizon so new inserts
+                # up to that point go straight into the wheel via schedule()
+                if self.cursor[0] is None or self.cursor[0] < horizon:
+                    self.cursor = (horizon, 0)
+                if self.cursor != self._saved_cursor:
+                    await self._save_state()
+                return
+
+    async def _fire(self, task_ids: List[int], now: datetime) -> int:
+        from sqlalchemy import select, update
+        from .database import Task
+
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(Task).where(Task.id.in_(task_ids)).order_by(Task.due_at, Task.id)
+            )
+            tasks = result.scalars().all()
+
+        # Skip tasks deleted, completed or rescheduled since they were loaded
+        due = [t for t in tasks if t.status == "pending" and t.due_at is not None and t.due_at <= now]
+        for task in tasks:
+            if task.status == "pending" and task.due_at is not None and task.due_at > now:
+                self.wheel.add(_to_timestamp(task.due_at), task.id)
+
+        # Claim before sending: another worker holding the same task gets rowcount 0 and skips it
+        ready = []
+        async with self.session_factory() as session:
+            for task in due:
+                claim = await session.execute(
+                    update(Task)
+                    .where(Task.id == task.id, Task.status == "pending", Task.due_at <= now)
+                    .values(status="fired")
+                )
+                if claim.rowcount:
+                    ready.append(task)
+            await session.commit()
+        self.claimed_elsewhere += len(due) - len(ready)
+
+        outcomes = await asyncio.gather(*(self._dispatch(task) for task in ready))
+
+        failed_ids = [task.id for task, ok in zip(ready, outcomes) if not ok]
+        if failed_ids:
+            async with self.session_factory() as session:
+                await session.execute(
+                    update(Task).where(Task.id.in_(failed_ids), Task.status == "fired").values(status="failed")
+                )
+                await session.commit()
+
+        for task in ready:
+            task_cache.invalidate(task.id)
+        fired = sum(1 for ok in outcomes if ok)
+        self.fired += fired
+        self.failed += len(outcomes) - fired
+        if ready:
+            self.last_fired_at = now
+            await self._save_state()
+        return fired
+
+    async def _dispatch(self, task) -> bool:
+        try:
+            parameters = json.loads(task.payload) if task.payload else {}
+        except json.JSONDecodeError:
+            parameters = {}
+        data = {
+            "id": task.id,
+            "description": task.description,
+            "task_type": task.task_type,
+            "due_at": task.due_at.isoformat(),
+            "parameters": parameters,
+        }
+        async with self._semaphore:
+            try:
+                result = await asyncio.to_thread(self.dispatcher.dispatch, data)
+            except Exception as e:
+                logger.error(f"Dispatch failed for task {task.id}: {e}")
+                return False
+        return result.get("status") in ("success", "stub")
+
+    async def _save_state(self) -> None:
+        from .database import SchedulerState
+
+        cursor_due, cursor_id = self.cursor
+        async with self.session_factory() as session:
+            state = await session.get(SchedulerState, self.name)
+            if state is None:
+                state = SchedulerState(name=self.name)
+                session.add(state)
+            state.cursor_due_at = cursor_due
+            state.cursor_task_id = cursor_id
+            state.last_fired_at = self.last_fired_at
+            await session.commit()
+        self._saved_cursor = self.cursor
+
+
+# Global instance
+task_scheduler = TaskScheduler()
+metrics.register("scheduler", task_scheduler.stats)
@@ -0,0 +1,343 @@
+"""
+Search Index Module - Local BM25 full-text search over our own corpora.
+
+Documents (tasks, memory entries, summarized texts and files dropped into
+``SEARCH_DOCS_DIR``) are tokenized into an inverted index whose postings are
+kept per term as growable NumPy arrays of document ids and term frequencies,
+so adding a document appends to a few arrays and a query scores whole
+postings lists at once. Replaced or removed documents are tombstoned and
+squeezed out by an occasional compaction. Nothing leaves the process.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .logging import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+TEXT_EXTENSIONS = (".txt", ".md", ".rst", ".csv", ".json", ".html", ".htm", ".log", ".py", ".yaml", ".yml")
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+class _Postings:
+    """Document ids (ascending) and term frequencies of one term, with amortized O(1) append."""
+
+    __slots__ = ("ids", "tfs", "size")
+
+    def __init__(self):
+        self.ids = np.empty(4, dtype=np.int32)
+        self.tfs = np.empty(4, dtype=np.uint16)
+        self.size = 0
+
+    def append(self, doc_id: int, tf: int) -> None:
+        if self.size == len(self.ids):
+            self.ids = np.resize(self.ids, 2 * self.size)
+            self.tfs = np.resize(self.tfs, 2 * self.size)
+        self.ids[self.size] = doc_id
+        self.tfs[self.size] = min(tf, 65535)
+        self.size += 1
+
+
+class SearchIndex:
+    """Incrementally updated inverted index ranked with Okapi BM25.
+
+    Documents are addressed by a caller-chosen ``key``; adding an existing
+    key replaces the document. ``owner`` restricts a document to searches
+    made for that owner; documents without one are visible to everyone.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, snippet_chars: int = 300):
+        self.k1 = k1
+        self.b = b
+        self.snippet_chars = snippet_chars
+        self._lock = threading.Lock()
+        self._terms: Dict[str, _Postings] = {}
+        self._ids: Dict[str, int] = {}
+        self._keys: List[Optional[str]] = []
+        self._docs: List[Optional[Tuple[str, str, str]]] = []  # (source, title, snippet)
+        self._lengths = np.zeros(1024, dtype=np.float32)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._owners = np.zeros(1024, dtype=np.int32)
+        self._owner_codes: Dict[str, int] = {}
+        self._sources = np.zeros(1024, dtype=np.int16)
+        self._source_codes: Dict[str, int] = {}
+        self._scores = np.zeros(1024, dtype=np.float32)  # reusable accumulator, all zero between queries
+        self._total_length = 0.0
+        self._live = 0
+        self.queries = 0
+        self.compactions = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ids
+
+    def add(self, key: str, text: str, source: str = "doc", title: str = "", owner: Optional[str] = None) -> None:
+        """Index ``text`` under ``key``, replacing any previous document with that key."""
+        counts: Dict[str, int] = {}
+        for token in tokenize(f"{title} {text}"):
+            counts[token] = counts.get(token, 0) + 1
+        snippet = " ".join(str(text).split())[:self.snippet_chars]
+        with self._lock:
+            self._remove(key)
+            doc_id = len(self._keys)
+            self._ensure_capacity(doc_id + 1)
+            self._keys.append(key)
+            self._docs.append((source, title or snippet[:80], snippet))
+            self._ids[key] = doc_id
+            length = sum(counts.values())
+            self._lengths[doc_id] = length
+            self._alive[doc_id] = True
+            self._owners[doc_id] = self._owner_code(owner)
+            self._sources[doc_id] = self._source_codes.setdefault(source, len(self._source_codes))
+            self._total_length += length
+            self._live += 1
+            for token, tf in counts.items():
+                postings = self._terms.get(token)
+                if postings is None:
+                    postings = self._terms[token] = _Postings()
+                postings.append(doc_id, tf)
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def remove_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._ids if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        sources: Optional[Iterable[str]] = None,
+        owner: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Top-``k`` documents for ``query`` as dicts with key, source, title, snippet and score."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        sources = set(sources) if sources else None
+        with self._lock:
+            self.queries += 1
+            if not self._live or not tokens:
+                return []
+            avgdl = self._total_length / self._live
+            scores = self._scores
+            candidates = []
+            for token in tokens:
+                postings = self._terms.get(token)
+                if postings is None:
+                    continue
+                ids = postings.ids[:postings.size]
+                tfs = postings.tfs[:postings.size].astype(np.float32)
+                df = min(postings.size, self._live)  # postings may still hold tombstoned documents
+                idf = math.log(1.0 + (self._live - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * self._lengths[ids] / avgdl)
+                contribution = idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+                # Scores are positive, so a zero marks a document this query has not touched yet
+                candidates.append(ids[scores[ids] == 0])
+                scores[ids] += contribution
+            if not candidates:
+                return []
+            candidates = np.concatenate(candidates)
+            candidate_scores = scores[candidates]
+            scores[candidates] = 0
+            keep = self._alive[candidates]
+            if owner is None:
+                keep &= self._owners[candidates] == 0
+            else:
+                keep &= np.isin(self._owners[candidates], (0, self._owner_codes.get(owner, -1)))
+            if sources is not None:
+                codes = [self._source_codes[source] for source in sources if source in self._source_codes]
+                keep &= np.isin(self._sources[candidates], codes)
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+            if not len(candidates):
+                return []
+            k = min(k, len(candidates))
+            best = np.argpartition(-candidate_scores, k - 1)[:k]
+            best = best[np.argsort(-candidate_scores[best], kind="stable")]
+            results = []
+            for i in best:
+                doc_id = int(candidates[i])
+                source, title, snippet = self._docs[doc_id]
+                results.append({
+                    "key": self._keys[doc_id],
+                    "source": source,
+                    "title": title,
+                    "snippet": snippet,
+                    "score": round(float(candidate_scores[i]), 4),
+                })
+            return results
+
+    def compact(self) -> None:
+        """Drop tombstoned documents from the postings and renumber the rest."""
+        with self._lock:
+            self._compact()
+
+    def _remove(self, key: str) -> bool:
+        doc_id = self._ids.pop(key, None)
+        if doc_id is None:
+            return False
+        self._alive[doc_id] = False
+        self._total_length -= float(self._lengths[doc_id])
+        self._live -= 1
+        self._keys[doc_id] = None
+        self._docs[doc_id] = None
+        dead = len(self._keys) - self._live
+        if dead > 1024 and dead > self._live // 4:
+            self._compact()
+        return True
+
+    def _compact(self) -> None:
+        n = len(self._keys)
+        alive = self._alive[:n]
+        remap = np.cumsum(alive, dtype=np.int64).astype(np.int32) - 1
+        for token in list(self._terms):
+            postings = self._terms[token]
+            ids = postings.ids[:postings.size]
+            mask = alive[ids]
+            if not mask.any():
+                del self._terms[token]
+                continue
+            postings.ids = remap[ids[mask]]
+            postings.tfs = postings.tfs[:postings.size][mask]
+            postings.size = len(postings.ids)
+        self._keys = [key for key in self._keys if key is not None]
+        self._docs = [doc for doc in self._docs if doc is not None]
+        self._ids = {key: i for i, key in enumerate(self._keys)}
+        live = len(self._keys)
+        self._lengths[:live] = self._lengths[:n][alive]
+        self._owners[:live] = self._owners[:n][alive]
+        self._sources[:live] = self._sources[:n][alive]
+        self._alive[:live] = True
+        self._alive[live:n] = False
+        self.compactions += 1
+
+    def _ensure_capacity(self, size: int) -> None:
+        if size <= len(self._lengths):
+            return
+        capacity = max(size, 2 * len(self._lengths))
+        self._lengths = np.resize(self._lengths, capacity)
+        self._owners = np.resize(self._owners, capacity)
+        self._sources = np.resize(self._sources, capacity)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._alive = alive
+        self._scores = np.zeros(capacity, dtype=np.float32)
+
+    def _owner_code(self, owner: Optional[str]) -> int:
+        if owner is None:
+            return 0
+        return self._owner_codes.setdefault(owner, len(self._owner_codes) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        postings = sum(p.size for p in self._terms.values())
+        return {
+            "documents": self._live,
+            "terms": len(self._terms),
+            "postings": postings,
+            "postings_bytes": postings * 6,
+            "queries": self.queries,
+            "compactions": self.compactions,
+        }
+
+
+class DirectoryCorpus:
+    """Keeps the index in step with the text files under ``root``, re-reading only changed files."""
+
+    def __init__(self, index: SearchIndex, root: str, max_file_bytes: int = 1_000_000, rescan_seconds: float = 30.0):
+        self.index = index
+        self.root = root
+        self.max_file_bytes = max_file_bytes
+        self.rescan_seconds = rescan_seconds
+        self._mtimes: Dict[str, float] = {}
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> int:
+        """Index new and modified files and drop deleted ones; returns files (re)indexed."""
+        with self._lock:
+            if not force and time.monotonic() - self._scanned_at < self.rescan_seconds:
+                return 0
+            self._scanned_at = time.monotonic()
+            seen = {}
+            changed = 0
+            for directory, _, files in os.walk(self.root):
+                for name in files:
+                    path = os.path.join(directory, name)
+                    if not name.lower().endswith(TEXT_EXTENSIONS):
+                        continue
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    if stat.st_size > self.max_file_bytes:
+                        continue
+                    relative = os.path.relpath(path, self.root)
+                    seen[relative] = stat.st_mtime
+                    if self._mtimes.get(relative) == stat.st_mtime:
+                        continue
+                    try:
+                        with open(path, encoding="utf-8", errors="replace") as f:
+                            text = f.read()
+                    except OSError as e:
+                        logger.warning(f"Could not index {path}: {e}")
+                        continue
+                    self.index.add(f"file:{relative}", text, source="file", title=relative)
+                    changed += 1
+            for relative in set(self._mtimes) - set(seen):
+                self.index.remove(f"file:{relative}")
+            self._mtimes = seen
+            return changed
+
+
+async def index_tasks(index: SearchIndex) -> int:
+    """Index every stored task; later changes are indexed by the task endpoints."""
+    from sqlalchemy.future import select
+    from .database import Task, async_session
+
+    async with async_session() as session:
+        result = await session.execute(select(Task.id, Task.description, Task.task_type, Task.status))
+        rows = result.all()
+    for task_id, description, task_type, status in rows:
+        index_task(index, task_id, description, task_type, status)
+    return len(rows)
+
+
+def index_task(index: SearchIndex, task_id: int, description: str, task_type: Optional[str], status: Optional[str]) -> None:
+    title = f"Task {task_id} ({task_type or 'task'}, {status or 'pending'})"
+    index.add(f"task:{task_id}", description, source="task", title=title)
+
+
+# Global instances
+search_index = SearchIndex(
+    k1=float(os.getenv("SEARCH_BM25_K1", "1.2")),
+    b=float(os.getenv("SEARCH_BM25_B", "0.75")),
+)
+docs_corpus = DirectoryCorpus(
+    search_index,
+    os.getenv("SEARCH_DOCS_DIR", "data/docs"),
+    max_file_bytes=int(os.getenv("SEARCH_MAX_FILE_BYTES", "1000000")),
+    rescan_seconds=float(os.getenv("SEARCH_RESCAN_SECONDS", "30")),
+)
+metrics.register("search_index", search_index.stats)
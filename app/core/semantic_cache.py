@@ -0,0 +1,148 @@
+"""
+Semantic Cache Module - Answers paraphrased prompts from earlier LLM responses.
+
+Prompts are embedded through the EmbedCore pipeline and kept in a small
+per-tenant, per-model matrix of unit vectors. A lookup is one matrix-vector
+product; the closest cached prompt is returned when its cosine similarity
+clears the threshold.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EmbedFn = Callable[[str, str], Awaitable[Optional[Sequence[float]]]]
+
+
+async def embed_prompt(tenant: str, text: str) -> Optional[Sequence[float]]:
+    """Embed via the /embed pipeline; None when EmbedCore is unavailable (hash fallbacks are not semantic)."""
+    from ..routers.embed import embed_text
+    return await asyncio.to_thread(embed_text, text, tenant)
+
+
+class _TenantIndex:
+    """Fixed-capacity ring of unit vectors; the oldest entry is overwritten when full."""
+
+    def __init__(self, capacity: int, dim: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.outputs: List[Optional[str]] = [None] * capacity
+        self.expires_at = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+        self.next_slot = 0
+
+    def search(self, query: np.ndarray, now: float) -> Tuple[Optional[str], float]:
+        if self.size == 0:
+            return None, 0.0
+        scores = self.vectors[:self.size] @ query
+        scores[self.expires_at[:self.size] <= now] = -1.0
+        best = int(np.argmax(scores))
+        return self.outputs[best], float(scores[best])
+
+    def add(self, vector: np.ndarray, output: str, expires_at: float) -> None:
+        slot = self.next_slot
+        self.vectors[slot] = vector
+        self.outputs[slot] = output
+        self.expires_at[slot] = expires_at
+        self.next_slot = (slot + 1) % len(self.outputs)
+        self.size = min(self.size + 1, len(self.outputs))
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        embed_fn: EmbedFn = embed_prompt,
+        threshold: float = 0.92,
+        max_entries_per_tenant: int = 512,
+        max_tenants: int = 1000,
+        ttl: float = 3600.0,
+    ):
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries_per_tenant = max_entries_per_tenant
+        self.max_tenants = max_tenants
+        self.ttl = ttl
+        # (tenant, model) -> index, least recently used first
+        self._indexes: "OrderedDict[Tuple[str, str], _TenantIndex]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.evicted_tenants = 0
+
+    async def _embed(self, tenant: str, prompt: str) -> Optional[np.ndarray]:
+        try:
+            raw = await self.embed_fn(tenant, prompt)
+        except Exception:
+            raw = None
+        if raw is None or len(raw) == 0:
+            self.skipped += 1
+            return None
+        vector = np.asarray(raw, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            self.skipped += 1
+            return None
+        return vector / norm
+
+    async def lookup(self, tenant: str, model: str, prompt: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """Return (cached output or None, prompt vector). Pass the vector to ``store`` to avoid re-embedding."""
+        vector = await self._embed(tenant, prompt)
+        if vector is None:
+            return None, None
+        index = self._indexes.get((tenant, model))
+        if index is not None and index.vectors.shape[1] == vector.shape[0]:
+            self._indexes.move_to_end((tenant, model))
+            output, score = index.search(vector, time.monotonic())
+            if output is not None and score >= self.threshold:
+                self.hits += 1
+                return output, vector
+        self.misses += 1
+        return None, vector
+
+    def store(self, tenant: str, model: str, vector: Optional[np.ndarray], output: str) -> None:
+        if vector is None:
+            return
+        key = (tenant, model)
+        index = self._indexes.get(key)
+        if index is None or index.vectors.shape[1] != vector.shape[0]:
+            index = _TenantIndex(self.max_entries_per_tenant, vector.shape[0])
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_tenants:
+                self._indexes.popitem(last=False)
+                self.evicted_tenants += 1
+        self._indexes.move_to_end(key)
+        index.add(vector, output, time.monotonic() + self.ttl)
+
+    def clear(self, tenant: Optional[str] = None) -> None:
+        if tenant is None:
+            self._indexes.clear()
+            return
+        for key in [k for k in self._indexes if k[0] == tenant]:
+            del self._indexes[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "threshold": self.threshold,
+            "namespaces": len(self._indexes),
+            "entries": sum(index.size for index in self._indexes.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "skipped_no_embedding": self.skipped,
+            "evicted_tenants": self.evicted_tenants,
+        }
+
+
+def build_semantic_cache() -> Optional[SemanticCache]:
+    if os.getenv("LLM_SEMANTIC_CACHE", "false").lower() != "true":
+        return None
+    return SemanticCache(
+        threshold=float(os.getenv("LLM_SEMANTIC_THRESHOLD", "0.92")),
+        max_entries_per_tenant=int(os.getenv("LLM_SEMANTIC_MAX_ENTRIES", "512")),
+        max_tenants=int(os.getenv("LLM_SEMANTIC_MAX_TENANTS", "1000")),
+        ttl=float(os.getenv("LLM_SEMANTIC_TTL", os.getenv("LLM_CACHE_TTL", "3600"))),
+    )
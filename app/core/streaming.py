@@ -0,0 +1,80 @@
+"""
+Streaming Module - Server-Sent Events and NDJSON framing for token and progress streams.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from fastapi.responses import StreamingResponse
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    """Frame one SSE message; ``data`` is JSON-encoded onto a single line."""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+
+def ndjson_event(data: Any, event: Optional[str] = None) -> str:
+    """Frame one NDJSON line; the event name goes in an ``event`` field."""
+    return json.dumps(dict(data, event=event) if event else data) + "\n"
+
+
+async def token_events(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Wrap a token iterator as ``token`` events followed by a ``done`` event with the full text."""
+    parts = []
+    async for token in tokens:
+        parts.append(token)
+        yield sse_event({"token": token}, event="token")
+    yield sse_event({"response": "".join(parts)}, event="done")
+
+
+async def callback_events(
+    run: Callable[[Callable[[str, Dict[str, Any]], Awaitable[None]]], Awaitable[Any]],
+    frame: Callable[[Any, Optional[str]], str] = sse_event,
+) -> AsyncIterator[str]:
+    """Run ``run(on_event)`` in the background and yield every event it emits, framed.
+
+    A failure becomes an ``error`` event. If the client goes away the run is
+    cancelled, so abandoned work stops using the server.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def on_event(event: str, data: Dict[str, Any]) -> None:
+        await queue.put((event, data))
+
+    async def produce() -> None:
+        try:
+            await run(on_event)
+        except Exception as e:
+            await queue.put(("error", {"error": str(e)}))
+        finally:
+            await queue.put(done)
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            event, data = item
+            yield frame(data, event)
+    finally:
+        task.cancel()
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def ndjson_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -4,7 +4,7 @@ Provides stable, structured summaries with entity extraction and key points.
 """
 
 import re
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any
 from datetime import datetime
 
 class SummaryFlow:
@@ -74,5 +74,41 @@ class SummaryFlow:
             "version": "summaryflow_v1"
         }
 
+    def generate_summary_stream(self, chunks: Iterable[str], max_entities: int = 50) -> Dict[str, Any]:
+        """Summarize text arriving in chunks (e.g. a large file) without holding it all; same schema plus ``chunks``."""
+        first_sentence = last_sentence = ""
+        key_points: List[str] = []
+        entities: Dict[str, set] = {}
+        word_count = sentence_count = chunk_count = 0
+
+        for chunk in chunks:
+            chunk_count += 1
+            sentences = [s.strip() for s in re.split(r'[.!?]+', chunk) if s.strip()]
+            if sentences:
+                first_sentence = first_sentence or sentences[0]
+                last_sentence = sentences[-1]
+            sentence_count += len(sentences)
+            word_count += len(chunk.split())
+            if len(key_points) < 5:
+                key_points.extend(self.extract_key_points(chunk)[:5 - len(key_points)])
+            for entity_type, found in self.extract_entities(chunk).items():
+                bucket = entities.setdefault(entity_type, set())
+                bucket.update(found[:max(max_entities - len(bucket), 0)])
+
+        summary_text = first_sentence
+        if last_sentence and last_sentence != first_sentence:
+            summary_text += " " + last_sentence
+
+        return {
+            "summary": summary_text,
+            "key_points": key_points,
+            "entities": {entity_type: sorted(found) for entity_type, found in entities.items()},
+            "word_count": word_count,
+            "sentence_count": sentence_count,
+            "chunks": chunk_count,
+            "timestamp": datetime.now().isoformat(),
+            "version": "summaryflow_v1"
+        }
+
 # Global instance
 summary_flow = SummaryFlow()
\ No newline at end of file
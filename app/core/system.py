@@ -1,6 +1,7 @@
 from .bhiv_core import BHIVCore
 from .bhiv_reasoner import BHIVReasoner
 from .decision_hub import DecisionHub
+from .search_index import search_index
 from ..memory.memory_manager import MemoryManager
 from ..agents.planner_agent import PlannerAgent
 from ..agents.researcher_agent import ResearcherAgent
@@ -14,7 +15,7 @@ from ..tools.file_tool import FileTool
 from ..tools.automation_tool import AutomationTool
 
 # Initialize Components
-memory_manager = MemoryManager()
+memory_manager = MemoryManager(search_index=search_index)
 
 agents = {
     "planner": PlannerAgent(),
@@ -25,7 +26,7 @@ agents = {
 }
 
 tools = {
-    "search": SearchTool(),
+    "search": SearchTool(search_index),
     "web_browser": WebBrowserTool(),
     "calculator": CalculatorTool(),
     "file": FileTool(),
@@ -0,0 +1,435 @@
+"""
+Vector Index Module - Approximate nearest-neighbour search over embeddings.
+
+Each user namespace is an IVF-flat index: unit vectors are kept in a
+memory-mapped float32 file, k-means centroids partition them into inverted
+lists, and a query scores only the vectors of the ``nprobe`` closest lists.
+Until a namespace holds enough vectors to train centroids it is searched
+exhaustively. Ids and metadata are kept in a JSON snapshot plus an
+append-only JSONL log of later changes, so opening a namespace maps the
+vectors instead of reading them and replays only the log tail. Replaced and
+deleted items leave dead rows; once they outnumber the live ones the
+namespace is rewritten into a new generation of files, switched to by
+rewriting the header.
+"""
+
+import json
+import os
+import re
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .logging import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class _Namespace:
+    def __init__(self, directory: str, nprobe: int, train_min: int):
+        self.directory = directory
+        self.nprobe = nprobe
+        self.train_min = train_min
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self.count = 0
+        self.vectors: Optional[np.memmap] = None
+        self.assign: Optional[np.memmap] = None
+        self.alive = np.zeros(0, dtype=bool)
+        self.ids: Dict[str, int] = {}
+        self.row_ids: List[Optional[str]] = []
+        self.metadata: List[Optional[Dict[str, Any]]] = []
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        self.list_sizes: List[int] = []
+        self.trained_on = 0
+        self.generation = 0
+        self.log_lines = 0
+        self.compactions = 0
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _data_path(self, name: str, generation: Optional[int] = None) -> str:
+        """Path of a per-generation file: ``vectors.f32`` is ``vectors.<n>.f32`` from generation 1 on."""
+        generation = self.generation if generation is None else generation
+        if generation:
+            stem, ext = name.split(".", 1)
+            name = f"{stem}.{generation}.{ext}"
+        return self._path(name)
+
+    # -- persistence -------------------------------------------------------
+
+    def _load(self) -> None:
+        try:
+            with open(self._path("index.json")) as f:
+                header = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.dim, self.capacity = header["dim"], header["capacity"]
+        self.trained_on = header.get("trained_on", 0)
+        self.generation = header.get("generation", 0)
+        self._map()
+        try:
+            with open(self._data_path("snapshot.json")) as f:
+                snapshot = json.load(f)
+            self.row_ids, self.metadata = snapshot["row_ids"], snapshot["metadata"]
+            self.count = len(self.row_ids)
+            self.ids = {item_id: row for row, item_id in enumerate(self.row_ids) if item_id is not None}
+            self.alive[:self.count] = np.fromiter((item_id is not None for item_id in self.row_ids), dtype=bool, count=self.count)
+        except (OSError, ValueError, KeyError):
+            pass
+        try:
+            with open(self._data_path("items.jsonl")) as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        continue  # tolerate a torn final line
+                    self.log_lines += 1
+                    if op["op"] == "add":
+                        self._set_row(op["row"], op["id"], op.get("meta") or {})
+                    else:
+                        self._forget(op["id"])
+        except OSError:
+            pass
+        if os.path.exists(self._path("centroids.npy")):
+            self.centroids = np.load(self._path("centroids.npy"))
+            self._build_lists()
+        self._maybe_snapshot()
+
+    def _map(self) -> None:
+        mode = "r+" if os.path.exists(self._data_path("vectors.f32")) else "w+"
+        self.vectors = np.memmap(self._data_path("vectors.f32"), dtype=np.float32, mode=mode, shape=(self.capacity, self.dim))
+        self.assign = np.memmap(self._data_path("assign.i32"), dtype=np.int32, mode=mode, shape=(self.capacity,))
+        alive = np.zeros(self.capacity, dtype=bool)
+        alive[:len(self.alive)] = self.alive[:self.capacity]
+        self.alive = alive
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(1024, self.capacity)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.assign.flush()
+            self.vectors = self.assign = None
+        for name, itemsize in (("vectors.f32", 4 * self.dim), ("assign.i32", 4)):
+            with open(self._data_path(name), "ab") as f:
+                f.truncate(capacity * itemsize)
+        self.capacity = capacity
+        self._write_header()
+        self._map()
+
+    def _write_header(self) -> None:
+        tmp = self._path("index.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"dim": self.dim, "capacity": self.capacity, "trained_on": self.trained_on, "generation": self.generation}, f)
+        os.replace(tmp, self._path("index.json"))
+
+    def _append_log(self, ops: List[Dict[str, Any]]) -> None:
+        with open(self._data_path("items.jsonl"), "a") as f:
+            f.writelines(json.dumps(op, default=str) + "\n" for op in ops)
+        self.log_lines += len(ops)
+
+    def _maybe_snapshot(self) -> None:
+        # Amortized: the log may grow as long as the snapshot before it is rewritten
+        if self.log_lines > max(10000, len(self.ids)):
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        """Fold the log into the snapshot; replaying leftovers after a crash here is harmless."""
+        if self.dim is None or not self.log_lines:
+            return
+        self._write_snapshot(self._data_path("snapshot.json"), self.row_ids, self.metadata)
+        open(self._data_path("items.jsonl"), "w").close()
+        self.log_lines = 0
+
+    @staticmethod
+    def _write_snapshot(path: str, row_ids: List[Optional[str]], metadata: List[Optional[Dict[str, Any]]]) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"row_ids": row_ids, "metadata": metadata}, f, default=str)
+        os.replace(tmp, path)
+
+    def _maybe_compact(self) -> None:
+        # Amortized: rewriting costs O(live rows) and only happens once as many rows have died
+        if self.count - len(self.ids) > self.count // 2:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the live rows densely into the next generation of files and drop the old ones.
+
+        The header names the current generation, so a crash before it is
+        rewritten leaves the old files in use and one after it the new.
+        """
+        live = np.nonzero(self.alive[:self.count])[0]
+        generation = self.generation + 1
+        capacity = 1024
+        while capacity < len(live):
+            capacity *= 2
+        vectors = np.memmap(self._data_path("vectors.f32", generation), dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        assign = np.memmap(self._data_path("assign.i32", generation), dtype=np.int32, mode="w+", shape=(capacity,))
+        for start in range(0, len(live), 65536):
+            block = live[start:start + 65536]
+            vectors[start:start + len(block)] = self.vectors[block]
+            assign[start:start + len(block)] = self.assign[block]
+        vectors.flush()
+        assign.flush()
+        row_ids = [self.row_ids[row] for row in live.tolist()]
+        metadata = [self.metadata[row] for row in live.tolist()]
+        self._write_snapshot(self._data_path("snapshot.json", generation), row_ids, metadata)
+        open(self._data_path("items.jsonl", generation), "w").close()
+
+        old = self.generation
+        self.vectors = self.assign = None
+        self.generation, self.capacity = generation, capacity
+        self._write_header()
+        for name in ("vectors.f32", "assign.i32", "snapshot.json", "items.jsonl"):
+            try:
+                os.remove(self._data_path(name, old))
+            except OSError:
+                pass
+
+        self.vectors, self.assign = vectors, assign
+        self.row_ids, self.metadata = row_ids, metadata
+        self.count = len(row_ids)
+        self.ids = {item_id: row for row, item_id in enumerate(row_ids)}
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.alive[:self.count] = True
+        self.log_lines = 0
+        self.compactions += 1
+        if self.centroids is not None:
+            self._build_lists()
+
+    # -- bookkeeping ---------------------------------------------------------
+
+    def _set_row(self, row: int, item_id: str, meta: Dict[str, Any]) -> None:
+        self._forget(item_id)
+        while len(self.row_ids) <= row:
+            self.row_ids.append(None)
+            self.metadata.append(None)
+        self.ids[item_id] = row
+        self.row_ids[row] = item_id
+        self.metadata[row] = meta
+        self.alive[row] = True
+        self.count = max(self.count, row + 1)
+
+    def _forget(self, item_id: str) -> bool:
+        row = self.ids.pop(item_id, None)
+        if row is None:
+            return False
+        self.alive[row] = False
+        self.row_ids[row] = None
+        self.metadata[row] = None
+        return True
+
+    def _build_lists(self) -> None:
+        nlist = len(self.centroids)
+        rows = np.nonzero(self.alive[:self.count])[0]
+        assign = np.asarray(self.assign[rows])
+        rows = rows[assign >= 0]
+        assign = assign[assign >= 0]
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        sorted_rows = rows[order].astype(np.int64)
+        self.lists = [sorted_rows[bounds[i]:bounds[i + 1]].copy() for i in range(nlist)]
+        self.list_sizes = [len(rows) for rows in self.lists]
+
+    def _add_to_lists(self, rows: np.ndarray, clusters: np.ndarray) -> None:
+        for row, cluster in zip(rows.tolist(), clusters.tolist()):
+            size = self.list_sizes[cluster]
+            rows_of_list = self.lists[cluster]
+            if size == len(rows_of_list):
+                rows_of_list = self.lists[cluster] = np.resize(rows_of_list, max(8, 2 * size))
+            rows_of_list[size] = row
+            self.list_sizes[cluster] = size + 1
+
+    def _train(self) -> None:
+        """Spherical k-means on a sample of the live vectors, then reassign every row."""
+        live = np.nonzero(self.alive[:self.count])[0]
+        nlist = int(min(4096, max(1, np.sqrt(len(live)))))
+        rng = np.random.default_rng(len(live))
+        sample = np.asarray(self.vectors[np.sort(rng.choice(live, size=min(len(live), 40 * nlist), replace=False))])
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(8):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+        for start in range(0, self.count, 65536):
+            block = np.asarray(self.vectors[start:start + 65536])
+            self.assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        self.assign.flush()
+        self.centroids = centroids
+        np.save(self._path("centroids.npy"), centroids)
+        self.trained_on = len(live)
+        self._write_header()
+        self._build_lists()
+        logger.info(f"Trained vector index {self.directory}: {nlist} lists over {len(live)} vectors")
+
+    # -- public API ------------------------------------------------------------
+
+    def upsert(self, items: Sequence[Tuple[str, Sequence[float], Dict[str, Any]]]) -> int:
+        if not items:
+            return 0
+        matrix = np.asarray([vector for _, vector, _ in items], dtype=np.float32)
+        if matrix.ndim != 2:
+            raise ValueError("All vectors of one request must have the same length")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Expected vectors of length {self.dim}, got {matrix.shape[1]}")
+            start = self.count
+            rows = np.arange(start, start + len(items))
+            self._grow(start + len(items))
+            self.vectors[start:start + len(items)] = matrix
+            if self.centroids is not None:
+                clusters = np.argmax(matrix @ self.centroids.T, axis=1)
+                self.assign[start:start + len(items)] = clusters
+            else:
+                self.assign[start:start + len(items)] = -1
+            self.vectors.flush()
+            self.assign.flush()
+            ops = []
+            for row, (item_id, _, meta) in zip(rows.tolist(), items):
+                self._set_row(row, item_id, meta or {})
+                ops.append({"op": "add", "id": item_id, "row": row, "meta": meta or {}})
+            self._append_log(ops)
+            if self.centroids is not None:
+                self._add_to_lists(rows, clusters)
+            if len(self.ids) >= max(self.train_min, 4 * self.trained_on):
+                self._train()
+            self._maybe_compact()
+            self._maybe_snapshot()
+        return len(items)
+
+    def delete(self, item_ids: Iterable[str]) -> int:
+        with self._lock:
+            removed = [item_id for item_id in item_ids if self._forget(item_id)]
+            if removed:
+                self._append_log([{"op": "del", "id": item_id} for item_id in removed])
+                self._maybe_compact()
+                self._maybe_snapshot()
+        return len(removed)
+
+    def search(self, vector: Sequence[float], k: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        query = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        with self._lock:
+            if self.dim is None or not self.ids:
+                return []
+            if len(query) != self.dim:
+                raise ValueError(f"Expected a query of length {self.dim}, got {len(query)}")
+            query = query / norm if norm else query
+            if self.centroids is None:
+                rows = np.nonzero(self.alive[:self.count])[0]
+            else:
+                nprobe = min(self.nprobe, len(self.centroids))
+                probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+                rows = np.concatenate([self.lists[c][:self.list_sizes[c]] for c in probe])
+                rows = rows[self.alive[rows]]
+            if not len(rows):
+                return []
+            scores = np.asarray(self.vectors[rows]) @ query
+            results = []
+            # Take the best candidates first; widen only when filters reject too many
+            take = min(len(rows), k if not filters else 4 * k)
+            while True:
+                best = np.argpartition(-scores, take - 1)[:take]
+                best = best[np.argsort(-scores[best], kind="stable")]
+                results = []
+                for i in best:
+                    row = int(rows[i])
+                    meta = self.metadata[row]
+                    if filters and any(meta.get(key) != value for key, value in filters.items()):
+                        continue
+                    results.append({"id": self.row_ids[row], "score": float(scores[i]), "metadata": meta})
+                    if len(results) == k:
+                        return results
+                if take == len(rows):
+                    return results
+                take = min(len(rows), take * 4)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vectors": len(self.ids),
+            "rows": self.count,
+            "compactions": self.compactions,
+            "dim": self.dim,
+            "lists": len(self.centroids) if self.centroids is not None else 0,
+        }
+
+
+class VectorStore:
+    """Per-namespace IVF-flat indexes under ``base_dir``, opened on first use."""
+
+    def __init__(self, base_dir: str, nprobe: int = 8, train_min: int = 1024):
+        self.base_dir = base_dir
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock()
+        self.queries = 0
+
+    def namespace(self, name: str, create: bool = True) -> Optional[_Namespace]:
+        """The open namespace ``name``; without ``create``, None when it was never written."""
+        with self._lock:
+            index = self._namespaces.get(name)
+            if index is None:
+                safe = re.sub(r"[^A-Za-z0-9_.-]", "_", name)[:48]
+                directory = os.path.join(self.base_dir, f"{safe}-{hashlib.sha1(name.encode()).hexdigest()[:10]}")
+                if not create and not os.path.isdir(directory):
+                    return None
+                index = self._namespaces[name] = _Namespace(directory, self.nprobe, self.train_min)
+            return index
+
+    def upsert(self, namespace: str, items: Sequence[Tuple[str, Sequence[float], Dict[str, Any]]]) -> int:
+        """Insert or replace ``(id, vector, metadata)`` items."""
+        return self.namespace(namespace).upsert(items)
+
+    def delete(self, namespace: str, item_ids: Iterable[str]) -> int:
+        index = self.namespace(namespace, create=False)
+        return index.delete(item_ids) if index is not None else 0
+
+    def search(self, namespace: str, vector: Sequence[float], k: int = 10, filters: Optional[Dict[str, Any]] = None):
+        """Top-``k`` items by cosine similarity whose metadata equals every ``filters`` entry."""
+        self.queries += 1
+        index = self.namespace(namespace, create=False)
+        return index.search(vector, k, filters) if index is not None else []
+
+    def snapshot(self) -> None:
+        """Snapshot every open namespace, so the next start replays no log."""
+        for index in list(self._namespaces.values()):
+            with index._lock:
+                index.snapshot()
+
+    def stats(self) -> Dict[str, Any]:
+        namespaces = list(self._namespaces.values())
+        return {
+            "namespaces_open": len(namespaces),
+            "vectors": sum(len(index.ids) for index in namespaces),
+            "queries": self.queries,
+        }
+
+
+# Global instance
+vector_store = VectorStore(
+    os.getenv("VECTOR_INDEX_DIR", "data/vector_index"),
+    nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "8")),
+    train_min=int(os.getenv("VECTOR_INDEX_TRAIN_MIN", "1024")),
+)
+metrics.register("vector_index", vector_store.stats)
@@ -6,6 +6,7 @@ ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(ROOT_DIR)
 
 import os
+import asyncio
 from datetime import datetime
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -22,18 +23,10 @@ load_dotenv(dotenv_path=os.path.join(ROOT_DIR, '.env'))
 
  
 
-# Initialize Sentry if enabled
-if os.getenv("SENTRY_DSN"):
-    import sentry_sdk
-    sentry_sdk.init(
-        dsn=os.getenv("SENTRY_DSN"),
-        traces_sample_rate=1.0,
-        environment=os.getenv("ENV", "development"),
-    )
-
 # Local imports
 from .core.logging import setup_logging, get_logger
 from .core.security import authenticate_user, rate_limit, audit_log
+from .core.metrics import metrics as component_metrics
 
 from app.routers import (
     summarize,
@@ -49,6 +42,7 @@ from app.routers import (
     external_app,
     bhiv,
     assistant,
+    jobs,
 )
 
 # Setup logging
@@ -56,15 +50,68 @@ setup_logging()
 logger = get_logger(__name__)
 
 
+def init_sentry() -> None:
+    """Initialize Sentry if enabled; deferred to startup so importing the app stays cheap."""
+    if not os.getenv("SENTRY_DSN"):
+        return
+    import sentry_sdk
+    sentry_sdk.init(
+        dsn=os.getenv("SENTRY_DSN"),
+        traces_sample_rate=1.0,
+        environment=os.getenv("ENV", "development"),
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    init_sentry()
+
     try:
         from .core.database import create_tables
         await create_tables()
     except Exception as e:
         print(f"[lifespan] Database init skipped due to error: {e}")
+
+    try:
+        from .core.search_index import index_tasks, search_index
+        await index_tasks(search_index)
+    except Exception as e:
+        logger.warning(f"Task search indexing skipped: {e}")
+
+    scheduler = None
+    if os.getenv("SCHEDULER_ENABLED", "true").lower() == "true":
+        from .core.scheduler import task_scheduler as scheduler
+        await scheduler.start()
+
+    job_queue = None
+    if os.getenv("JOBS_ENABLED", "true").lower() == "true":
+        from .core.jobs import job_queue
+        await job_queue.start()
+
+    warmup = None
+    if os.getenv("PROVIDER_PRELOAD", "false").lower() == "true":
+        # Warm provider SDK clients in the background instead of on the first request
+        from .core.providers import providers
+        warmup = asyncio.create_task(asyncio.to_thread(providers.preload))
+
     yield
 
+    if scheduler is not None:
+        await scheduler.stop()
+    if job_queue is not None:
+        await job_queue.stop()
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+
+    from .core.page_fetcher import page_fetcher
+    await page_fetcher.aclose()
+
+    from .core.vector_index import vector_store
+    await asyncio.to_thread(vector_store.snapshot)
+
+    from .core.embedding_log import embedding_log_writer
+    await embedding_log_writer.flush()
+
 
 # Add API Key Scheme for Swagger UI
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
@@ -179,6 +226,7 @@ app.include_router(external_llm.router, prefix="/api", tags=["External LLM"])
 app.include_router(external_app.router, prefix="/api", tags=["External App"])
 app.include_router(bhiv.router, prefix="/api", tags=["BHIV"])
 app.include_router(assistant.router, prefix="/api", tags=["Assistant"])
+app.include_router(jobs.router, prefix="/api", tags=["Jobs"])
 
 
 # ------------------------------
@@ -209,7 +257,8 @@ async def metrics():
             "total": psutil.disk_usage('/').total,
             "free": psutil.disk_usage('/').free,
             "percent": psutil.disk_usage('/').percent
-        }
+        },
+        "components": component_metrics.collect()
     }
 
 
@@ -1,28 +1,256 @@
 import json
 import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+_ENTRY_KEYS = {"user_id", "session_id", "query", "result", "ts"}
+
+
+def hashed_embedding(text: str, dim: int = 256) -> np.ndarray:
+    """Signed feature hashing of words and word bigrams into a unit vector; fast, local and stable across runs."""
+    words = _TOKEN_RE.findall(text.lower())
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        h = zlib.crc32(feature.encode())
+        vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class _UserMemory:
+    """The most recent ``max_capacity`` entries of one user, as a ring of embeddings plus metadata.
+
+    The ring starts small and doubles as it fills; it only wraps once it
+    has reached ``max_capacity``.
+    """
+
+    INITIAL_CAPACITY = 16
+
+    def __init__(self, max_capacity: int, dim: int):
+        self.max_capacity = max_capacity
+        capacity = min(self.INITIAL_CAPACITY, max_capacity)
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.sessions: List[Optional[str]] = [None] * capacity
+        self.queries: List[Optional[str]] = [None] * capacity
+        self.results: List[Any] = [None] * capacity
+        self.size = 0
+        self.next_slot = 0
+
+    def _grow(self) -> None:
+        # Not wrapped yet, so the entries fill slots 0..size-1 in order
+        capacity = min(2 * len(self.queries), self.max_capacity)
+        extra = capacity - len(self.queries)
+        self.vectors = np.concatenate([self.vectors, np.zeros((extra, self.vectors.shape[1]), dtype=np.float32)])
+        self.timestamps = np.concatenate([self.timestamps, np.zeros(extra, dtype=np.float64)])
+        for name in ("sessions", "queries", "results"):
+            getattr(self, name).extend([None] * extra)
+        self.next_slot = self.size
+
+    def add(self, vector: np.ndarray, entry: Dict[str, Any]) -> None:
+        if self.size == len(self.queries) < self.max_capacity:
+            self._grow()
+        slot = self.next_slot
+        self.vectors[slot] = vector
+        self.timestamps[slot] = entry["ts"]
+        self.sessions[slot] = entry["session_id"]
+        self.queries[slot] = entry["query"]
+        self.results[slot] = entry["result"]
+        self.next_slot = (slot + 1) % len(self.queries)
+        self.size = min(self.size + 1, len(self.queries))
+
 
 class MemoryManager:
-    def __init__(self):
-        self.long_term_file = "app/memory/long_term.json"
-        self.short_term_file = "app/memory/short_term.json"
-        self.traits_file = "app/memory/traits.json"
-        self.user_profile_file = "app/memory/user_profile.json"
+    """Per-user, per-session conversation memory.
+
+    Writes are appended to a JSONL log; each user's most recent entries are
+    kept in memory as embeddings, so retrieval scores a bounded number of
+    entries no matter how long the log grows. Only the ``MEMORY_MAX_USERS``
+    most recently active users stay in memory; others are reloaded from the
+    log when they return. Relevance is cosine similarity
+    plus a recency bonus that halves every ``MEMORY_RECENCY_HALF_LIFE``
+    seconds, plus a bonus for entries from the same session.
+    """
+
+    def __init__(self, base_dir: str = "app/memory", embed_fn=hashed_embedding, search_index=None):
+        self.long_term_file = os.path.join(base_dir, "long_term.json")
+        self.short_term_file = os.path.join(base_dir, "short_term.json")
+        self.traits_file = os.path.join(base_dir, "traits.json")
+        self.user_profile_file = os.path.join(base_dir, "user_profile.json")
+        self.log_file = os.path.join(base_dir, "memory_log.jsonl")
+        self.embed_fn = embed_fn
+        # Optional full-text index that mirrors the retained entries, scoped to their user
+        self.search_index = search_index
+        self.top_k = int(os.getenv("MEMORY_TOP_K", "5"))
+        self.max_entries_per_user = int(os.getenv("MEMORY_MAX_ENTRIES_PER_USER", "1000"))
+        self.recency_half_life = float(os.getenv("MEMORY_RECENCY_HALF_LIFE", "86400"))
+        self.recency_weight = float(os.getenv("MEMORY_RECENCY_WEIGHT", "0.2"))
+        self.session_weight = float(os.getenv("MEMORY_SESSION_WEIGHT", "0.1"))
+        self.max_users = int(os.getenv("MEMORY_MAX_USERS", "1000"))
         # Ensure files exist
         for file in [self.long_term_file, self.short_term_file, self.traits_file, self.user_profile_file]:
             if not os.path.exists(file):
                 with open(file, 'w') as f:
                     json.dump({}, f)
+        self._users: "OrderedDict[str, _UserMemory]" = OrderedDict()  # least recently active first
+        self._entry_counts: Dict[str, int] = {}  # entries logged per user, loaded or not
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._load()
 
-    def retrieve_context(self, input_data):
-        # Use embeddings + vector DB - simulate
-        with open(self.short_term_file, 'r') as f:
-            short_term = json.load(f)
-        return short_term
+    def retrieve_context(self, input_data) -> Dict[str, Any]:
+        """Top-k memories of the caller for this query, oldest first, as {past query: answer}."""
+        user_id, session_id = self.scope(input_data)
+        query_vector = self.embed_fn(self._query_text(input_data))
+        with self._lock:
+            memory = self._user(user_id)
+            if memory is None or memory.size == 0:
+                return {}
+            n = memory.size
+            scores = memory.vectors[:n] @ query_vector
+            age = np.maximum(time.time() - memory.timestamps[:n], 0.0)
+            scores += self.recency_weight * np.power(0.5, age / self.recency_half_life)
+            scores += self.session_weight * np.fromiter(
+                (session == session_id for session in memory.sessions[:n]), dtype=bool, count=n
+            )
+            k = min(self.top_k, n)
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(memory.timestamps[best], kind="stable")]
+            return {memory.queries[i]: memory.results[i] for i in best}
 
     def update(self, query, result):
-        # Store conversations + preferences
-        with open(self.short_term_file, 'r') as f:
-            data = json.load(f)
-        data[str(query)] = result
-        with open(self.short_term_file, 'w') as f:
-            json.dump(data, f)
\ No newline at end of file
+        """Store conversations + preferences: one appended log line and one ring slot."""
+        user_id, session_id = self.scope(query)
+        entry = {
+            "user_id": user_id,
+            "session_id": session_id,
+            "query": self._query_text(query),
+            "result": result,
+            "ts": time.time(),
+        }
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            self._user(user_id)  # reload an evicted user before the new entry lands in their ring
+            with open(self.log_file, 'a') as f:
+                f.write(line + "\n")
+            self._remember(entry)
+
+    def _user(self, user_id: str) -> Optional[_UserMemory]:
+        """The user's ring, reloaded from the log if it was evicted; None for a user with no entries."""
+        memory = self._users.get(user_id)
+        if memory is not None:
+            self._users.move_to_end(user_id)
+            return memory
+        if not self._entry_counts.get(user_id):
+            return None
+        memory = None
+        for entry in self._entries():
+            if entry["user_id"] == user_id:
+                vector = self._embed_entry(entry)
+                if memory is None:
+                    memory = _UserMemory(self.max_entries_per_user, len(vector))
+                memory.add(vector, entry)
+        self.reloads += 1
+        if memory is not None:
+            self._keep(user_id, memory)
+        return memory
+
+    def _keep(self, user_id: str, memory: _UserMemory) -> None:
+        self._users[user_id] = memory
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+    def _embed_entry(self, entry: Dict[str, Any]) -> np.ndarray:
+        return self.embed_fn(f"{entry['query']}\n{str(entry['result'])[:500]}")
+
+    def _remember(self, entry: Dict[str, Any]) -> None:
+        user_id = entry["user_id"]
+        count = self._entry_counts.get(user_id, 0)
+        self._entry_counts[user_id] = count + 1
+        if self.search_index is not None:
+            # Keyed by ring slot, so an evicted entry is replaced in the index too
+            self.search_index.add(
+                f"memory:{user_id}:{count % self.max_entries_per_user}", str(entry["result"]),
+                source="memory", title=entry["query"], owner=user_id,
+            )
+        memory = self._users.get(user_id)
+        if memory is None and count:
+            return  # evicted while loading; reloaded from the log on next use
+        vector = self._embed_entry(entry)
+        if memory is None:
+            memory = _UserMemory(self.max_entries_per_user, len(vector))
+            self._keep(user_id, memory)
+        else:
+            self._users.move_to_end(user_id)
+        memory.add(vector, entry)
+
+    def _entries(self) -> Iterator[Dict[str, Any]]:
+        with open(self.log_file) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # tolerate a torn final line
+                if isinstance(entry, dict) and _ENTRY_KEYS <= entry.keys():
+                    yield entry
+
+    def _load(self) -> None:
+        if not os.path.exists(self.log_file):
+            self._import_short_term()
+            return
+        lines = 0
+        for entry in self._entries():
+            self._remember(entry)
+            lines += 1
+        retained = sum(min(count, self.max_entries_per_user) for count in self._entry_counts.values())
+        if lines > 2 * max(retained, 1):
+            self._rewrite_log()
+
+    def _import_short_term(self) -> None:
+        """One-time migration of the old flat {query: result} file."""
+        try:
+            with open(self.short_term_file) as f:
+                legacy = json.load(f)
+        except (OSError, ValueError):
+            legacy = {}
+        now = time.time()
+        entries = [
+            {"user_id": "default_user", "session_id": "default", "query": query, "result": result, "ts": now}
+            for query, result in legacy.items()
+        ]
+        for entry in entries:
+            self._remember(entry)
+        with open(self.log_file, 'w') as f:
+            f.writelines(json.dumps(entry, default=str) + "\n" for entry in entries)
+
+    def _rewrite_log(self) -> None:
+        """Compact the log down to each user's most recent ``max_entries_per_user`` entries."""
+        skip = {user_id: max(count - self.max_entries_per_user, 0) for user_id, count in self._entry_counts.items()}
+        tmp = self.log_file + ".tmp"
+        with open(tmp, 'w') as f:
+            for entry in self._entries():
+                if skip.get(entry["user_id"]):
+                    skip[entry["user_id"]] -= 1
+                    continue
+                f.write(json.dumps(entry, default=str) + "\n")
+        os.replace(tmp, self.log_file)
+
+    @staticmethod
+    def _query_text(input_data) -> str:
+        return input_data.query if hasattr(input_data, 'query') else str(input_data)
+
+    @staticmethod
+    def scope(input_data):
+        """(user_id, session_id) of a request: its fields, then its context, then the defaults."""
+        context = getattr(input_data, 'context', None)
+        context = context if isinstance(context, dict) else {}
+        user_id = getattr(input_data, 'user_id', None) or context.get("user_id") or "default_user"
+        session_id = getattr(input_data, 'session_id', None) or context.get("session_id") or "default"
+        return str(user_id), str(session_id)
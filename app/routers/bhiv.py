@@ -1,5 +1,9 @@
+import asyncio
+from typing import Literal, Optional
+
 from fastapi import APIRouter
 from pydantic import BaseModel
+from ..core.streaming import callback_events, ndjson_event, ndjson_response, sse_event, sse_response
 from ..core.system import bhiv
 
 router = APIRouter()
@@ -7,8 +11,33 @@ router = APIRouter()
 class BHIVRequest(BaseModel):
     query: str
     context: dict = {}
+    stream: bool = False  # Emit plan, step-start, step-result and final events as they happen
+    format: Literal["sse", "ndjson"] = "sse"
+    deadline: Optional[float] = None  # Seconds for the run (capped by BHIV_DEADLINE); late steps are dropped
+    user_id: Optional[str] = None  # Scopes memory; falls back to context["user_id"]
+    session_id: Optional[str] = None
+
+class CacheInvalidateRequest(BaseModel):
+    query: Optional[str] = None  # Omit to drop every cached plan and step
 
 @router.post("/bhiv/run")
 async def run_bhiv(request: BHIVRequest):
-    result = await bhiv.process(request)
-    return {"bhiv_output": result}
\ No newline at end of file
+    deadline = None
+    if request.deadline is not None:
+        deadline = asyncio.get_running_loop().time() + request.deadline
+    if request.stream:
+        events = callback_events(
+            lambda on_event: bhiv.process(request, on_event=on_event, deadline=deadline),
+            frame=ndjson_event if request.format == "ndjson" else sse_event,
+        )
+        return ndjson_response(events) if request.format == "ndjson" else sse_response(events)
+    outcome = await bhiv.run(request, deadline=deadline)
+    return {
+        "bhiv_output": outcome["output"],
+        "incomplete": outcome["incomplete"],
+        "unfinished_steps": outcome["unfinished_steps"],
+    }
+
+@router.post("/bhiv/cache/invalidate")
+async def invalidate_bhiv_cache(request: CacheInvalidateRequest):
+    return {"invalidated": bhiv.invalidate(request.query)}
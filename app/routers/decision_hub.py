@@ -25,6 +25,17 @@ async def make_decision(
     if audio_file:
         audio_data = await audio_file.read()
 
+    return await run_decision(input_text, platform, device_context, voice_input, audio_data)
+
+
+async def run_decision(
+    input_text: str,
+    platform: str = "web",
+    device_context: str = "desktop",
+    voice_input: bool = False,
+    audio_data: Optional[bytes] = None,
+):
+    """Route the input, run BHIV when chosen, and compose the response (shared with the job queue)."""
     try:
         decision = await decision_hub.make_decision(
             input_text,
@@ -3,11 +3,19 @@
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import hashlib
 import sys
 import os
 
+import numpy as np
+
+from ..core.embedding_cache import embedding_cache
+from ..core.embedding_log import embedding_log_writer
+from ..core.vector_index import vector_store
+
 # Add embed_core to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'embed_core'))
 
@@ -21,7 +29,92 @@ except ImportError:
 router = APIRouter()
 
 # Global cache for embeddings
-cache = {}
+cache = embedding_cache
+
+# EmbedCore is synchronous; batches of cache misses run here instead of on the event loop
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("EMBED_WORKERS", "4")), thread_name_prefix="embed")
+
+
+def _cache_key(text: str, user_id: str) -> bytes:
+    return hashlib.md5((text + user_id).encode()).digest()  # Include user_id in hash for security
+
+
+def _fallback_embedding(text: str) -> List[float]:
+    digest = hashlib.sha256(text.encode()).digest()
+    return [int(b) / 255.0 for b in digest]
+
+
+def _embed_batch(texts: List[str], user_id: str, session_id: str, platform: str) -> List[Optional[Tuple[list, list]]]:
+    """(embedding, obfuscated embedding) per text from EmbedCore; None where it failed."""
+    pairs = []
+    for text in texts:
+        try:
+            result = process_message(user_id, session_id, platform, text)
+        except Exception:
+            result = {}
+        if result.get("status") == "success":
+            pairs.append((result["embedding"], result["obfuscated_embedding"]))
+        else:
+            pairs.append(None)
+    return pairs
+
+
+async def resolve_embeddings(
+    texts: List[str],
+    user_id: str = "default_user",
+    session_id: str = "default_session",
+    platform: str = "web",
+    fallbacks: Optional[Set[str]] = None,
+) -> List[Tuple[list, list]]:
+    """(embedding, obfuscated embedding) for each text, in order.
+
+    Duplicate texts are resolved once, cached ones are looked up together,
+    and the misses go to EmbedCore in batches on the embed thread pool.
+    Texts EmbedCore cannot embed get a hash fallback, which is not cached
+    and, when a ``fallbacks`` set is passed, is added to it.
+    """
+    unique = list(dict.fromkeys(texts))
+    keys = {text: _cache_key(text, user_id) for text in unique}
+    cached = cache.get_many(keys.values())
+    resolved = {text: cached[keys[text]] for text in unique if keys[text] in cached}
+    misses = [text for text in unique if text not in resolved]
+    if misses:
+        loop = asyncio.get_running_loop()
+        batches = [misses[i:i + EMBED_BATCH_SIZE] for i in range(0, len(misses), EMBED_BATCH_SIZE)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(_executor, _embed_batch, batch, user_id, session_id, platform)
+            for batch in batches
+        ))
+        embedded = []
+        for batch, pairs in zip(batches, results):
+            for text, pair in zip(batch, pairs):
+                if pair is None:
+                    fallback = _fallback_embedding(text)
+                    resolved[text] = (fallback, fallback)
+                    if fallbacks is not None:
+                        fallbacks.add(text)
+                else:
+                    cache.put(keys[text], *pair)
+                    resolved[text] = pair
+                    embedded.append(pair[1])
+        # Only obfuscated vectors are logged, and only fresh EmbedCore results
+        embedding_log_writer.submit(user_id, session_id, platform, embedded)
+    return [resolved[text] for text in texts]
+
+
+def embed_text(text: str, user_id: str = "default_user", session_id: str = "default_session", platform: str = "web") -> Optional[List[float]]:
+    """Obfuscated EmbedCore embedding for one text, or None if EmbedCore is unavailable."""
+    key = _cache_key(text, user_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached[1]
+    pair = _embed_batch([text], user_id, session_id, platform)[0]
+    if pair is None:
+        return None
+    cache.put(key, *pair)
+    return pair[1]
+
 
 class EmbedRequest(BaseModel):
     texts: List[str]
@@ -36,6 +129,57 @@ class SimilarityRequest(BaseModel):
     user_id: str = "default_user"
     session_id: str = "default_session"
     platform: str = "web"
+    top_k: Optional[int] = None  # return only the k best matches per row instead of the full matrix
+
+
+def _unit_rows(vectors, dim: int) -> np.ndarray:
+    """Stack vectors (truncated to ``dim``) into a float32 matrix of unit rows; zero rows stay zero."""
+    matrix = np.array([vector[:dim] for vector in vectors], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def cosine_matrix(emb1, emb2) -> np.ndarray:
+    """N x M cosine similarities with one matmul; vectors of different lengths are compared on their common prefix."""
+    dim = min(min(len(v) for v in emb1), min(len(v) for v in emb2))
+    return _unit_rows(emb1, dim) @ _unit_rows(emb2, dim).T
+
+
+def top_k_rows(similarities: np.ndarray, k: int):
+    """Per row, the ``k`` best columns as [{"index", "score"}], best first."""
+    k = min(k, similarities.shape[1])
+    best = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    scores = np.take_along_axis(similarities, best, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    best = np.take_along_axis(best, order, axis=1)
+    scores = np.take_along_axis(scores, order, axis=1)
+    return [
+        [{"index": int(j), "score": float(score)} for j, score in zip(row_best, row_scores)]
+        for row_best, row_scores in zip(best, scores)
+    ]
+
+
+class IndexItem(BaseModel):
+    id: str
+    text: str
+    metadata: Dict[str, Any] = {}
+
+
+class IndexRequest(BaseModel):
+    items: List[IndexItem]
+    user_id: str = "default_user"
+    session_id: str = "default_session"
+    platform: str = "web"
+
+
+class SearchRequest(BaseModel):
+    query: str
+    k: int = 10
+    filters: Dict[str, Any] = {}  # metadata fields that must match exactly
+    user_id: str = "default_user"
+    session_id: str = "default_session"
+    platform: str = "web"
 
 
 @router.post("/embed")
@@ -43,82 +187,72 @@ async def generate_embeddings(request: EmbedRequest):
     if not request.texts:
         return {"embeddings": [], "obfuscated_embeddings": []}
 
-    embeddings = []
-    obfuscated_embeddings = []
-
-    for text in request.texts:
-        text_hash = hashlib.md5((text + request.user_id).encode()).hexdigest()  # Include user_id in hash for security
-        if text_hash in cache:
-            embedding, obfuscated = cache[text_hash]
-        else:
-            try:
-                result = process_message(request.user_id, request.session_id, request.platform, text)
-                if result["status"] == "success":
-                    embedding = result["embedding"]
-                    obfuscated = result["obfuscated_embedding"]
-                    cache[text_hash] = (embedding, obfuscated)
-                else:
-                    # Fallback to basic embedding if EmbedCore fails
-                    raise Exception(result.get("error_message", "EmbedCore failed"))
-            except Exception as e:
-                digest = hashlib.sha256(text.encode()).digest()
-                embedding = [int(b) / 255.0 for b in digest]
-                obfuscated = embedding
-
-        embeddings.append(embedding)
-        obfuscated_embeddings.append(obfuscated)
-
-    return {"embeddings": embeddings, "obfuscated_embeddings": obfuscated_embeddings}
+    pairs = await resolve_embeddings(request.texts, request.user_id, request.session_id, request.platform)
+    return {
+        "embeddings": [embedding for embedding, _ in pairs],
+        "obfuscated_embeddings": [obfuscated for _, obfuscated in pairs],
+    }
 
 
 @router.post("/embed/similarity")
 async def compute_similarity(request: SimilarityRequest):
+    if request.top_k is not None and request.top_k < 1:
+        raise HTTPException(status_code=422, detail="top_k must be at least 1")
     if not request.texts1 or not request.texts2:
-        return {"similarities": []}
-
-    # Get embeddings using the embed endpoint logic
-    emb1 = []
-    for text in request.texts1:
-        text_hash = hashlib.md5((text + request.user_id).encode()).hexdigest()
-        if text_hash in cache:
-            embedding, _ = cache[text_hash]
-        else:
-            try:
-                result = process_message(request.user_id, request.session_id, request.platform, text)
-                if result["status"] == "success":
-                    embedding = result["obfuscated_embedding"]  # Use obfuscated for similarity
-                    cache[text_hash] = (result["embedding"], embedding)
-                else:
-                    raise Exception(result.get("error_message", "EmbedCore failed"))
-            except Exception as e:
-                digest = hashlib.sha256(text.encode()).digest()
-                embedding = [int(b) / 255.0 for b in digest]
-        emb1.append(embedding)
-
-    emb2 = []
-    for text in request.texts2:
-        text_hash = hashlib.md5((text + request.user_id).encode()).hexdigest()
-        if text_hash in cache:
-            embedding, _ = cache[text_hash]
-        else:
-            try:
-                result = process_message(request.user_id, request.session_id, request.platform, text)
-                if result["status"] == "success":
-                    embedding = result["obfuscated_embedding"]
-                    cache[text_hash] = (result["embedding"], embedding)
-                else:
-                    raise Exception(result.get("error_message", "EmbedCore failed"))
-            except Exception as e:
-                digest = hashlib.sha256(text.encode()).digest()
-                embedding = [int(b) / 255.0 for b in digest]
-        emb2.append(embedding)
-
-    # Compute pairwise cosine similarities
-    def cosine(a, b):
-        dot = sum(x * y for x, y in zip(a, b))
-        na = math.sqrt(sum(x * x for x in a))
-        nb = math.sqrt(sum(y * y for y in b))
-        return (dot / (na * nb)) if na and nb else 0.0
-    similarities = [[cosine(x, y) for y in emb2] for x in emb1]
-
-    return {"similarities": similarities}
+        return {"top_k": []} if request.top_k else {"similarities": []}
+
+    # One resolver call for both sides, so texts appearing in both are embedded once
+    pairs = await resolve_embeddings(
+        request.texts1 + request.texts2, request.user_id, request.session_id, request.platform
+    )
+    # Use obfuscated embeddings for similarity
+    emb1 = [obfuscated for _, obfuscated in pairs[:len(request.texts1)]]
+    emb2 = [obfuscated for _, obfuscated in pairs[len(request.texts1):]]
+
+    similarities = cosine_matrix(emb1, emb2)
+    if request.top_k:
+        return {"top_k": top_k_rows(similarities, request.top_k)}
+    return {"similarities": similarities.tolist()}
+
+
+@router.post("/embed/index")
+async def index_items(request: IndexRequest):
+    """Embed items and add them (or replace them, by id) in the caller's vector index."""
+    fallbacks: Set[str] = set()
+    pairs = await resolve_embeddings(
+        [item.text for item in request.items], request.user_id, request.session_id, request.platform, fallbacks
+    )
+    if fallbacks:
+        # Hash fallbacks are not semantic and would fix the namespace to their length
+        raise HTTPException(status_code=503, detail="EmbedCore unavailable")
+    items = [(item.id, obfuscated, item.metadata) for item, (_, obfuscated) in zip(request.items, pairs)]
+    try:
+        indexed = await asyncio.to_thread(vector_store.upsert, request.user_id, items)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"indexed": indexed}
+
+
+@router.delete("/embed/index/{item_id}")
+async def delete_item(item_id: str, user_id: str = "default_user"):
+    if not await asyncio.to_thread(vector_store.delete, user_id, [item_id]):
+        raise HTTPException(status_code=404, detail="Item not found")
+    return {"deleted": item_id}
+
+
+@router.post("/embed/search")
+async def search_items(request: SearchRequest):
+    """Nearest indexed items to the query text within the caller's namespace."""
+    if request.k < 1:
+        raise HTTPException(status_code=422, detail="k must be at least 1")
+    fallbacks: Set[str] = set()
+    (_, query_vector), = await resolve_embeddings(
+        [request.query], request.user_id, request.session_id, request.platform, fallbacks
+    )
+    if fallbacks:
+        raise HTTPException(status_code=503, detail="EmbedCore unavailable")
+    try:
+        results = await asyncio.to_thread(vector_store.search, request.user_id, query_vector, request.k, request.filters)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"results": results}
@@ -3,14 +3,19 @@ from pydantic import BaseModel
 
 # FIXED IMPORT ✔
 from ..core.llm_bridge import llm_bridge
+from ..core.streaming import sse_response, token_events
 
 router = APIRouter()
 
 class LLMRequest(BaseModel):
     prompt: str
     model: str = "uniguru"  # uniguru, chatgpt, groq, gemini, mistral
+    stream: bool = False  # Server-Sent Events: "token" events, then a "done" event
+    user_id: str = "default_user"  # Scopes the semantic response cache
 
 @router.post("/external_llm")
 async def call_external_llm(request: LLMRequest):
-    response = await llm_bridge.call_llm(request.model, request.prompt)
+    if request.stream:
+        return sse_response(token_events(llm_bridge.stream_llm(request.model, request.prompt)))
+    response = await llm_bridge.call_llm(request.model, request.prompt, tenant=request.user_id)
     return {"response": response}
@@ -0,0 +1,91 @@
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from ..core.jobs import FINISHED, JobQueueFullError, job_queue
+from ..core.system import bhiv
+from .bhiv import BHIVRequest
+from .decision_hub import run_decision
+
+router = APIRouter()
+
+
+async def _run_bhiv_job(payload: Dict[str, Any]):
+    outcome = await bhiv.run(BHIVRequest(**payload))
+    return {
+        "bhiv_output": outcome["output"],
+        "incomplete": outcome["incomplete"],
+        "unfinished_steps": outcome["unfinished_steps"],
+    }
+
+
+async def _run_decision_job(payload: Dict[str, Any]):
+    return await run_decision(
+        payload["input_text"],
+        payload.get("platform", "web"),
+        payload.get("device_context", "desktop"),
+        payload.get("voice_input", False),
+    )
+
+
+def _validate_bhiv_payload(payload: Dict[str, Any]) -> None:
+    BHIVRequest(**payload)  # pydantic's ValidationError is a ValueError
+
+
+def _validate_decision_payload(payload: Dict[str, Any]) -> None:
+    if not isinstance(payload.get("input_text"), str) or not payload["input_text"].strip():
+        raise ValueError("decision jobs need a non-empty input_text")
+
+
+job_queue.register("bhiv", _run_bhiv_job, _validate_bhiv_payload)
+job_queue.register("decision", _run_decision_job, _validate_decision_payload)
+
+
+class JobRequest(BaseModel):
+    kind: str  # "bhiv" (BHIVRequest fields) or "decision" (input_text, platform, device_context)
+    payload: Dict[str, Any] = {}
+    priority: int = 0  # Higher runs first
+    webhook_url: Optional[str] = None  # POSTed the job status and result when it finishes; public http(s) hosts only
+
+
+def _status(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: job[key] for key in ("id", "kind", "status", "priority", "error", "created_at", "started_at", "finished_at")}
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    try:
+        await job_queue.validate(request.kind, request.payload, request.webhook_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not job_queue.started:
+        # Nothing would ever run it (JOBS_ENABLED=false, or startup has not finished)
+        raise HTTPException(status_code=503, detail="Job workers are not running")
+    try:
+        job = await job_queue.submit(request.kind, request.payload, request.priority, request.webhook_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job["id"], "status": job["status"]}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _status(job)
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] not in FINISHED:
+        # Not done yet: 202 with the current status so clients keep polling
+        return JSONResponse(status_code=202, content=_status(job))
+    return {**_status(job), "result": job["result"]}
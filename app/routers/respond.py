@@ -1,23 +1,35 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from ..core.llm_bridge import llm_bridge
+from ..core.prompt_builder import PromptBuilder
+from ..core.streaming import sse_response, token_events
 from ..core.system import bhiv
 
 router = APIRouter()
+prompt_builder = PromptBuilder("respond")
 
 class RespondRequest(BaseModel):
     query: str
     context: dict = {}
     model: str = "uniguru"
     decision: str = "respond"
+    stream: bool = False  # Server-Sent Events for direct LLM responses
+    route: bool = False  # Let the bridge pick the fastest healthy provider, "model" is a preference
+    user_id: str = "default_user"  # Scopes the semantic response cache
 
 @router.post("/respond")
 async def generate_response(request: RespondRequest):
     try:
         if request.decision == "bhiv_core":
             return await bhiv.process(request)
-        prompt = f"Context: {request.context}\nQuery: {request.query}\nProvide a helpful response."
-        response = await llm_bridge.call_llm(request.model, prompt)
+        prompt = prompt_builder.render(
+            "Context: {context}\nQuery: {query}\nProvide a helpful response.",
+            query=request.query,
+            context=request.context,
+        )
+        if request.stream:
+            return sse_response(token_events(llm_bridge.stream_llm(request.model, prompt, route=request.route)))
+        response = await llm_bridge.call_llm(request.model, prompt, route=request.route, tenant=request.user_id)
         return {"response": response}
     except Exception as e:
         return {"error": f"Failed to generate response: {str(e)}"}
@@ -1,14 +1,39 @@
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, Optional
+
 from fastapi import APIRouter
 from pydantic import BaseModel
 from ..core.summaryflow import summary_flow
+from ..core.search_index import search_index
 
 router = APIRouter()
 
+# Oldest summaries of a user leave the search index past this many
+SUMMARY_INDEX_MAX_PER_USER = int(os.getenv("SEARCH_SUMMARY_MAX_PER_USER", "100"))
+_summary_keys: Dict[str, "OrderedDict[str, None]"] = {}
+
 class SummarizeRequest(BaseModel):
     text: str
+    user_id: Optional[str] = None  # Summaries are only indexed for search, privately, when set
+
+
+def index_summary(user_id: str, text: str, title: str) -> None:
+    key = f"summary:{user_id}:" + hashlib.sha1(text.encode()).hexdigest()
+    keys = _summary_keys.setdefault(user_id, OrderedDict())
+    keys[key] = None
+    keys.move_to_end(key)
+    search_index.add(key, text, source="summary", title=title, owner=user_id)
+    while len(keys) > SUMMARY_INDEX_MAX_PER_USER:
+        search_index.remove(keys.popitem(last=False)[0])
+
 
 @router.post("/summarize")
 async def summarize_text(request: SummarizeRequest):
     """Generate stable summary JSON schema using SummaryFlow."""
     result = summary_flow.generate_summary(request.text)
+    # Summarized documents become searchable by the researcher's SearchTool, for their owner only
+    if request.user_id:
+        index_summary(request.user_id, request.text, result["summary"][:80])
     return result
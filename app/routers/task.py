@@ -1,4 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 try:
     from sqlalchemy.ext.asyncio import AsyncSession  # type: ignore
@@ -10,6 +14,9 @@ except Exception:
 from typing import List, Optional, Dict, Any
 
 from ..core.taskflow import task_flow
+from ..core.cache import task_cache
+from ..core.scheduler import task_scheduler
+from ..core.search_index import index_task, search_index
 
 router = APIRouter()
 
@@ -25,6 +32,9 @@ class TaskClassificationRequest(BaseModel):
 
 class TaskRequest(BaseModel):
     description: str
+    task_type: Optional[str] = None
+    due_at: Optional[datetime] = None  # UTC; reminders/alarms/meetings fire at this time
+    parameters: Dict[str, Any] = {}
 
 
 class TaskUpdate(BaseModel):
@@ -38,6 +48,38 @@ class TaskResponse(BaseModel):
     status: str
     created_at: str
     updated_at: str
+    task_type: Optional[str] = None
+    due_at: Optional[str] = None
+
+
+def _task_response(task) -> TaskResponse:
+    return TaskResponse(
+        id=task.id,
+        description=task.description,
+        status=task.status,
+        created_at=task.created_at.isoformat(),
+        updated_at=task.updated_at.isoformat(),
+        task_type=task.task_type,
+        due_at=task.due_at.isoformat() if task.due_at else None
+    )
+
+
+def _task_etag(task_response: TaskResponse) -> str:
+    """Strong ETag derived from every field the client can see."""
+    return '"' + hashlib.sha1(task_response.model_dump_json().encode()).hexdigest() + '"'
+
+
+def _to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
 
 
 @router.post("/task")
@@ -52,18 +94,21 @@ if _SQLALCHEMY_OK:
 
     @router.post("/tasks", response_model=TaskResponse)
     async def create_task(request: TaskRequest, db: AsyncSession = Depends(get_db)):
-        task = Task(description=request.description)
+        task = Task(
+            description=request.description,
+            task_type=request.task_type,
+            due_at=_to_naive_utc(request.due_at),
+            payload=json.dumps(request.parameters) if request.parameters else None
+        )
         db.add(task)
         await db.commit()
         await db.refresh(task)
 
-        return TaskResponse(
-            id=task.id,
-            description=task.description,
-            status=task.status,
-            created_at=task.created_at.isoformat(),
-            updated_at=task.updated_at.isoformat()
-        )
+        if task.due_at is not None:
+            task_scheduler.schedule(task.id, task.due_at)
+        index_task(search_index, task.id, task.description, task.task_type, task.status)
+
+        return _task_response(task)
 
 
     @router.get("/tasks", response_model=List[TaskResponse])
@@ -71,33 +116,36 @@ if _SQLALCHEMY_OK:
         result = await db.execute(select(Task))
         tasks = result.scalars().all()
 
-        return [
-            TaskResponse(
-                id=t.id,
-                description=t.description,
-                status=t.status,
-                created_at=t.created_at.isoformat(),
-                updated_at=t.updated_at.isoformat()
-            )
-            for t in tasks
-        ]
+        return [_task_response(t) for t in tasks]
 
 
     @router.get("/tasks/{task_id}", response_model=TaskResponse)
-    async def get_task_by_id(task_id: int, db: AsyncSession = Depends(get_db)):
-        result = await db.execute(select(Task).where(Task.id == task_id))
-        task = result.scalar_one_or_none()
-
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
-
-        return TaskResponse(
-            id=task.id,
-            description=task.description,
-            status=task.status,
-            created_at=task.created_at.isoformat(),
-            updated_at=task.updated_at.isoformat()
-        )
+    async def get_task_by_id(
+        task_id: int,
+        http_request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_db),
+    ):
+        cached = task_cache.get(task_id)
+        if cached is None:
+            # An update or delete that lands while we read makes this row stale; set() then skips it
+            version = task_cache.version(task_id)
+            result = await db.execute(select(Task).where(Task.id == task_id))
+            task = result.scalar_one_or_none()
+
+            if not task:
+                raise HTTPException(status_code=404, detail="Task not found")
+
+            task_response = _task_response(task)
+            cached = (task_response, _task_etag(task_response))
+            task_cache.set(task_id, cached, version=version)
+
+        task_response, etag = cached
+        if _etag_matches(http_request.headers.get("If-None-Match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        response.headers["ETag"] = etag
+        return task_response
 
 
     @router.put("/tasks/{task_id}", response_model=TaskResponse)
@@ -123,15 +171,11 @@ if _SQLALCHEMY_OK:
                 .values(**update_data)
             )
             await db.commit()
+            task_cache.invalidate(task_id)
             await db.refresh(task)
+            index_task(search_index, task.id, task.description, task.task_type, task.status)
 
-        return TaskResponse(
-            id=task.id,
-            description=task.description,
-            status=task.status,
-            created_at=task.created_at.isoformat(),
-            updated_at=task.updated_at.isoformat()
-        )
+        return _task_response(task)
 
 
     @router.delete("/tasks/{task_id}")
@@ -144,5 +188,7 @@ if _SQLALCHEMY_OK:
 
         await db.execute(delete(Task).where(Task.id == task_id))
         await db.commit()
+        task_cache.invalidate(task_id)
+        search_index.remove(f"task:{task_id}")
 
         return {"message": "Task deleted successfully"}
@@ -3,12 +3,10 @@ import base64
 import hashlib
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, field_validator
-from openai import OpenAI
 
-router = APIRouter()
+from ..core.providers import providers
 
-# Initialize OpenAI client once
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+router = APIRouter()
 
 # Valid voice list for OpenAI TTS
 VALID_VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
@@ -65,6 +63,10 @@ async def text_to_speech(request: TTSRequest):
     # 2. Generate TTS via OpenAI
     # --------------------------
     try:
+        # Built (and the SDK imported) on the first TTS request rather than at startup
+        client = providers.get("openai_sync")
+        if client is None:
+            raise RuntimeError("OpenAI SDK is not installed")
         response = client.audio.speech.create(
             model=request.model,
             voice=request.voice,
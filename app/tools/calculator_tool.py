@@ -1,8 +1,28 @@
+import re
+
+from .expression import ExpressionError, compile_expression
+
+# Longest run of arithmetic characters, for queries like "what is 2 * (3 + 4)?"
+_ARITHMETIC_RE = re.compile(r"[\d.(][\d\s.+\-*/%^()eE]*")
+
+
 class CalculatorTool:
-    async def run(self, query):
-        # Simulate calculation
+    async def run(self, query, **variables):
+        """Evaluate an arithmetic expression safely; array ``variables`` are evaluated element-wise."""
         try:
-            result = eval(query)  # Simple eval for demo
+            result = compile_expression(self._expression(query, variables)).evaluate(**variables)
             return f"Calculated: {result}"
-        except:
-            return "Invalid calculation"
\ No newline at end of file
+        except ExpressionError:
+            return "Invalid calculation"
+
+    @staticmethod
+    def _expression(query, variables):
+        query = str(query)
+        if variables:
+            return query
+        try:
+            compile_expression(query)
+            return query
+        except ExpressionError:
+            candidates = [match.strip() for match in _ARITHMETIC_RE.findall(query)]
+            return max(candidates, key=len) if candidates else query
@@ -0,0 +1,289 @@
+"""
+Expression Module - Safe arithmetic expression engine.
+
+Expressions are tokenized and parsed into a small AST that only admits
+numbers, named variables, whitelisted operators and whitelisted functions;
+nothing is ever handed to ``eval``. The AST is compiled into nested closures
+(with constant sub-expressions folded), and compiled expressions are kept in
+an LRU cache so a repeated formula is parsed once. Variables may be NumPy
+arrays, which evaluates the formula element-wise over the whole batch.
+
+Integer results are capped at ``CALC_MAX_INT_BITS`` bits and arrays at
+``CALC_MAX_ELEMENTS`` elements, so inputs like ``9 ** 9 ** 9`` fail fast
+instead of pinning a worker.
+"""
+
+import math
+import operator
+import os
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, List, Tuple
+
+import numpy as np
+
+MAX_EXPRESSION_LENGTH = int(os.getenv("CALC_MAX_EXPRESSION_LENGTH", "1000"))
+MAX_DEPTH = 64
+MAX_INT_BITS = int(os.getenv("CALC_MAX_INT_BITS", "4096"))
+MAX_ELEMENTS = int(os.getenv("CALC_MAX_ELEMENTS", "10000000"))
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that cannot be parsed, are not allowed, or exceed the limits."""
+
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+    r"|(?P<name>[A-Za-z_][A-Za-z_0-9]*)"
+    r"|(?P<op>\*\*|//|[-+*/%^(),])"
+    r")"
+)
+
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+# name -> (function, number of arguments; None for variadic)
+FUNCTIONS: Dict[str, Tuple[Callable, Any]] = {
+    "abs": (np.abs, 1),
+    "sqrt": (np.sqrt, 1),
+    "exp": (np.exp, 1),
+    "log": (np.log, 1),
+    "log10": (np.log10, 1),
+    "log2": (np.log2, 1),
+    "sin": (np.sin, 1),
+    "cos": (np.cos, 1),
+    "tan": (np.tan, 1),
+    "asin": (np.arcsin, 1),
+    "acos": (np.arccos, 1),
+    "atan": (np.arctan, 1),
+    "atan2": (np.arctan2, 2),
+    "hypot": (np.hypot, 2),
+    "floor": (np.floor, 1),
+    "ceil": (np.ceil, 1),
+    "round": (np.round, 1),
+    "min": (lambda *args: _reduce(np.minimum, args), None),
+    "max": (lambda *args: _reduce(np.maximum, args), None),
+}
+
+_BINARY = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "%": operator.mod,
+}
+
+# Binding power for infix operators; ** is right-associative and binds tighter than unary minus
+_PRECEDENCE = {"+": 10, "-": 10, "*": 20, "/": 20, "//": 20, "%": 20, "**": 40}
+
+
+def _reduce(func, args):
+    if not args:
+        raise ExpressionError("min/max need at least one argument")
+    result = args[0]
+    for arg in args[1:]:
+        result = func(result, arg)
+    return result
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if match is None or match.end() == position:
+            raise ExpressionError(f"Unexpected character {text[position:].strip()[:1]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        tokens.append((kind, "**" if value == "^" else value))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Precedence-climbing parser producing tuples: ("num", v), ("var", name), ("neg", x), ("bin", op, a, b), ("call", name, args)."""
+
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError("Empty expression")
+        node = self.expression(0, 0)
+        if self.position != len(self.tokens):
+            raise ExpressionError(f"Unexpected {self.tokens[self.position][1]!r}")
+        return node
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        kind, token = self.peek()
+        if kind is None or (value is not None and token != value):
+            raise ExpressionError(f"Expected {value!r}" if value else "Unexpected end of expression")
+        self.position += 1
+        return kind, token
+
+    def expression(self, min_precedence: int, depth: int):
+        if depth > MAX_DEPTH:
+            raise ExpressionError("Expression nested too deeply")
+        left = self.unary(depth)
+        while True:
+            kind, token = self.peek()
+            precedence = _PRECEDENCE.get(token) if kind == "op" else None
+            if precedence is None or precedence < min_precedence:
+                return left
+            self.take()
+            # Right-associative for **, left-associative otherwise
+            right = self.expression(precedence if token == "**" else precedence + 1, depth + 1)
+            left = ("bin", token, left, right)
+
+    def unary(self, depth: int):
+        kind, token = self.peek()
+        if kind == "op" and token in ("-", "+"):
+            self.take()
+            # -2 ** 2 == -(2 ** 2), as in Python
+            operand = self.expression(_PRECEDENCE["**"], depth + 1)
+            return ("neg", operand) if token == "-" else operand
+        return self.atom(depth)
+
+    def atom(self, depth: int):
+        kind, token = self.take()
+        if kind == "number":
+            value = float(token) if any(c in token for c in ".eE") else int(token)
+            return ("num", value)
+        if kind == "name":
+            if self.peek()[1] == "(":
+                if token not in FUNCTIONS:
+                    raise ExpressionError(f"Unknown function {token!r}")
+                self.take("(")
+                args = []
+                if self.peek()[1] != ")":
+                    args.append(self.expression(0, depth + 1))
+                    while self.peek()[1] == ",":
+                        self.take(",")
+                        args.append(self.expression(0, depth + 1))
+                self.take(")")
+                arity = FUNCTIONS[token][1]
+                if arity is not None and len(args) != arity:
+                    raise ExpressionError(f"{token}() takes {arity} argument(s)")
+                return ("call", token, args)
+            if token in CONSTANTS:
+                return ("num", CONSTANTS[token])
+            return ("var", token)
+        if token == "(":
+            node = self.expression(0, depth + 1)
+            self.take(")")
+            return node
+        raise ExpressionError(f"Unexpected {token!r}")
+
+
+def _check_int(value):
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise ExpressionError(f"Result exceeds {MAX_INT_BITS} bits")
+    return value
+
+
+def _power(base, exponent):
+    if isinstance(base, np.ndarray) or isinstance(exponent, np.ndarray):
+        # Element-wise in floating point: bounded time whatever the exponent
+        return np.power(np.asarray(base, dtype=np.float64), exponent)
+    if isinstance(base, int) and isinstance(exponent, int) and exponent >= 0:
+        if abs(base) > 1 and exponent * math.log2(abs(base)) > MAX_INT_BITS:
+            raise ExpressionError(f"Result exceeds {MAX_INT_BITS} bits")
+        return base ** exponent
+    try:
+        return math.pow(base, exponent)
+    except OverflowError:
+        raise ExpressionError("Result too large")
+    except ValueError:
+        raise ExpressionError("Power is not a real number")
+
+
+def _compile(node) -> Tuple[Callable[[Dict[str, Any]], Any], FrozenSet[str]]:
+    """Turn an AST node into (closure over a variables dict, names it reads)."""
+    kind = node[0]
+    if kind == "num":
+        value = node[1]
+        return (lambda env: value), frozenset()
+    if kind == "var":
+        name = node[1]
+        return (lambda env: env[name]), frozenset([name])
+
+    if kind == "neg":
+        operand, names = _compile(node[1])
+        fn = lambda env: -operand(env)
+    elif kind == "bin":
+        op = node[1]
+        left, left_names = _compile(node[2])
+        right, right_names = _compile(node[3])
+        names = left_names | right_names
+        if op == "**":
+            fn = lambda env: _power(left(env), right(env))
+        else:
+            func = _BINARY[op]
+            fn = lambda env: _check_int(func(left(env), right(env)))
+    else:  # call
+        func = FUNCTIONS[node[1]][0]
+        compiled = [_compile(arg) for arg in node[2]]
+        args = [arg for arg, _ in compiled]
+        names = frozenset().union(*(arg_names for _, arg_names in compiled))
+        fn = lambda env: func(*[arg(env) for arg in args])
+
+    if not names:
+        # Constant sub-expression: evaluate once at compile time
+        value = _run(fn, {})
+        return (lambda env: value), names
+    return fn, names
+
+
+def _run(fn, env):
+    try:
+        with np.errstate(all="ignore"):
+            return fn(env)
+    except ZeroDivisionError:
+        raise ExpressionError("Division by zero")
+    except (OverflowError, MemoryError):
+        raise ExpressionError("Result too large")
+    except TypeError as e:
+        raise ExpressionError(str(e))
+
+
+class CompiledExpression:
+    def __init__(self, source: str):
+        self.source = source
+        self._fn, names = _compile(_Parser(tokenize(source)).parse())
+        self.variables = tuple(sorted(names))
+
+    def evaluate(self, **variables: Any) -> Any:
+        """Evaluate with the given variables; NumPy arrays (or lists) are evaluated element-wise."""
+        missing = [name for name in self.variables if name not in variables]
+        if missing:
+            raise ExpressionError(f"Unknown name(s): {', '.join(missing)}")
+        env = {}
+        for name in self.variables:
+            value = variables[name]
+            if isinstance(value, (list, tuple, np.ndarray)):
+                value = np.asarray(value, dtype=np.float64)
+                if value.size > MAX_ELEMENTS:
+                    raise ExpressionError(f"Array larger than {MAX_ELEMENTS} elements")
+            elif not isinstance(value, (int, float, np.number)) or isinstance(value, bool):
+                raise ExpressionError(f"{name} must be a number or an array of numbers")
+            env[name] = value
+        result = _run(self._fn, env)
+        return result.item() if isinstance(result, np.generic) else result
+
+
+@lru_cache(maxsize=int(os.getenv("CALC_CACHE_SIZE", "1024")))
+def compile_expression(source: str) -> CompiledExpression:
+    """Parse and compile ``source`` once; repeated formulas come from the LRU cache."""
+    return CompiledExpression(source.strip())
+
+
+def evaluate(source: str, **variables: Any) -> Any:
+    return compile_expression(source).evaluate(**variables)
@@ -1,5 +1,202 @@
+import asyncio
+import mmap
+import os
+import re
+import shlex
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..core.summaryflow import summary_flow
+
+# Bytes scanned between returning already-read pages of a mapping to the OS
+RELEASE_WINDOW = 64 * 1024 * 1024
+
+
+class FileAccessError(PermissionError):
+    """Raised for paths outside the FileTool root."""
+
+
+@contextmanager
+def _mapped(path: str):
+    """Read-only mapping of ``path``; yields None for empty files, which cannot be mapped."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield None
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mm
+        finally:
+            mm.close()
+
+
+def _release(mm: mmap.mmap, start: int, end: int) -> int:
+    """Drop the resident pages of ``mm[start:end]`` so scanning a huge file keeps a flat RSS; returns the new start."""
+    start -= start % mmap.PAGESIZE
+    end -= end % mmap.PAGESIZE
+    if end > start and hasattr(mmap, "MADV_DONTNEED"):
+        mm.madvise(mmap.MADV_DONTNEED, start, end - start)
+    return max(start, end)
+
+
 class FileTool:
+    """Reads, greps and summarizes files under ``root`` via memory mapping, never loading a whole file."""
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_read_bytes: Optional[int] = None,
+        max_line_bytes: int = 64 * 1024,
+        max_output_chars: Optional[int] = None,
+    ):
+        # A directory of its own: data/ also holds jobs.db, memory.json and the page cache
+        self.root = os.path.realpath(root or os.getenv("FILE_TOOL_ROOT", "data/files"))
+        os.makedirs(self.root, exist_ok=True)
+        self.max_read_bytes = max_read_bytes or int(os.getenv("FILE_TOOL_MAX_READ_BYTES", str(1024 * 1024)))
+        self.max_line_bytes = max_line_bytes
+        self.max_output_chars = max_output_chars or int(os.getenv("FILE_TOOL_MAX_OUTPUT_CHARS", "8000"))
+
+    def resolve(self, path: str) -> str:
+        """Absolute real path of ``path`` (relative to the root); symlinks may not escape the root."""
+        full = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([full, self.root]) != self.root:
+            raise FileAccessError(f"{path} is outside the file tool root")
+        return full
+
+    def read_range(self, path: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        """Bytes ``[offset, offset + length)``, capped at ``max_read_bytes``."""
+        length = self.max_read_bytes if length is None else min(length, self.max_read_bytes)
+        with _mapped(self.resolve(path)) as mm:
+            if mm is None or offset >= len(mm):
+                return b""
+            return mm[max(offset, 0):offset + length]
+
+    def iter_lines(self, path: str, start: int = 0) -> Iterator[Tuple[int, str]]:
+        """Yield ``(byte offset, line)`` from ``start`` on; lines longer than ``max_line_bytes`` are split."""
+        with _mapped(self.resolve(path)) as mm:
+            if mm is None:
+                return
+            size = len(mm)
+            position = released = max(start, 0)
+            while position < size:
+                end = mm.find(b"\n", position, position + self.max_line_bytes)
+                end = min(size, position + self.max_line_bytes) if end == -1 else end + 1
+                yield position, mm[position:end].decode("utf-8", errors="replace").rstrip("\r\n")
+                position = end
+                if position - released >= RELEASE_WINDOW:
+                    released = _release(mm, released, position)
+
+    def iter_chunks(self, path: str, chunk_bytes: int = 1024 * 1024) -> Iterator[str]:
+        """Yield the file as text chunks of about ``chunk_bytes``, split at line ends where possible."""
+        with _mapped(self.resolve(path)) as mm:
+            if mm is None:
+                return
+            size = len(mm)
+            position = released = 0
+            while position < size:
+                end = min(position + chunk_bytes, size)
+                if end < size:
+                    newline = mm.rfind(b"\n", position, end)
+                    end = newline + 1 if newline != -1 else end
+                yield mm[position:end].decode("utf-8", errors="replace")
+                position = end
+                if position - released >= RELEASE_WINDOW:
+                    released = _release(mm, released, position)
+
+    def grep(self, path: str, pattern: str, max_matches: int = 100, ignore_case: bool = False) -> List[Dict[str, Any]]:
+        """Regex matches with their byte offsets and the line they occur on.
+
+        The file is scanned in line-aligned windows of ``RELEASE_WINDOW`` bytes
+        so pages can be released between them; a match cannot span two windows.
+        """
+        regex = re.compile(pattern.encode(), re.IGNORECASE if ignore_case else 0)
+        results = []
+        with _mapped(self.resolve(path)) as mm:
+            if mm is None:
+                return results
+            size = len(mm)
+            position = 0
+            while position < size and len(results) < max_matches:
+                window_end = mm.find(b"\n", min(position + RELEASE_WINDOW, size))
+                window_end = size if window_end == -1 else window_end + 1
+                for start, end in self._spans(regex, mm, position, window_end, max_matches - len(results)):
+                    lower = max(0, start - self.max_line_bytes)
+                    line_start = mm.rfind(b"\n", lower, start) + 1 or lower
+                    line_end = mm.find(b"\n", end, end + self.max_line_bytes)
+                    line_end = min(size, end + self.max_line_bytes) if line_end == -1 else line_end
+                    results.append({
+                        "offset": start,
+                        "end": end,
+                        "line_offset": line_start,
+                        "match": mm[start:min(end, start + self.max_line_bytes)].decode("utf-8", errors="replace"),
+                        "line": mm[line_start:line_end].decode("utf-8", errors="replace").rstrip("\r"),
+                    })
+                _release(mm, position, window_end)
+                position = window_end
+        return results
+
+    @staticmethod
+    def _spans(regex, mm: mmap.mmap, pos: int, endpos: int, limit: int) -> List[Tuple[int, int]]:
+        # Plain spans only: match objects export the mapping's buffer, which would block close()
+        spans = []
+        for match in regex.finditer(mm, pos, endpos):
+            spans.append(match.span())
+            if len(spans) >= limit:
+                break
+        return spans
+
+    def summarize(self, path: str, chunk_bytes: int = 1024 * 1024) -> Dict[str, Any]:
+        """SummaryFlow summary of the whole file, fed chunk by chunk."""
+        result = summary_flow.generate_summary_stream(self.iter_chunks(path, chunk_bytes))
+        result["path"] = path
+        return result
+
+    def stat(self, path: str) -> Dict[str, Any]:
+        stat = os.stat(self.resolve(path))
+        return {"path": path, "size": stat.st_size, "modified": stat.st_mtime}
+
     async def run(self, query):
-        # Simulate file operations
-        result = f"File operation for: {query}"
-        return result
\ No newline at end of file
+        """
+        Text interface for agents: ``read <path> [offset] [length]``, ``lines <path> [start_offset] [count]``,
+        ``grep <pattern> <path> [max_matches]``, ``summarize <path>`` or ``stat <path>``.
+        """
+        try:
+            return self._truncate(await asyncio.to_thread(self._dispatch, shlex.split(str(query))))
+        except (FileAccessError, FileNotFoundError, IsADirectoryError, re.error, ValueError) as e:
+            return f"File operation failed: {e}"
+
+    def _dispatch(self, args: List[str]) -> str:
+        if len(args) < 2:
+            raise ValueError("expected '<read|lines|grep|summarize|stat> <path> ...'")
+        command, rest = args[0].lower(), args[1:]
+        if command == "read":
+            offset = int(rest[1]) if len(rest) > 1 else 0
+            length = int(rest[2]) if len(rest) > 2 else None
+            return self.read_range(rest[0], offset, length).decode("utf-8", errors="replace")
+        if command == "lines":
+            start = int(rest[1]) if len(rest) > 1 else 0
+            count = int(rest[2]) if len(rest) > 2 else 50
+            lines = []
+            for offset, line in self.iter_lines(rest[0], start):
+                if len(lines) >= count:
+                    break
+                lines.append(f"{offset}: {line}")
+            return "\n".join(lines)
+        if command == "grep":
+            if len(rest) < 2:
+                raise ValueError("expected 'grep <pattern> <path>'")
+            limit = int(rest[2]) if len(rest) > 2 else 20
+            matches = self.grep(rest[1], rest[0], max_matches=limit)
+            return "\n".join(f"{m['offset']}: {m['line']}" for m in matches) or "No matches."
+        if command == "summarize":
+            result = self.summarize(rest[0])
+            points = "".join(f"\n- {point}" for point in result["key_points"])
+            return f"{result['summary']} ({result['word_count']} words){points}"
+        if command == "stat":
+            return str(self.stat(rest[0]))
+        raise ValueError(f"unknown file operation {command!r}")
+
+    def _truncate(self, text: str) -> str:
+        if len(text) <= self.max_output_chars:
+            return text
+        return text[:self.max_output_chars] + "\n[truncated]"
@@ -1,13 +1,26 @@
+import asyncio
+import os
+
+from ..core.search_index import DirectoryCorpus, SearchIndex, docs_corpus, search_index
+
+
 class SearchTool:
-    async def run(self, query):
+    def __init__(self, index: SearchIndex = search_index, corpus: DirectoryCorpus = docs_corpus, top_k: int = None):
+        self.index = index
+        self.corpus = corpus
+        self.top_k = top_k or int(os.getenv("SEARCH_TOP_K", "5"))
+
+    async def run(self, query, user_id=None, sources=None):
         """
-        Simulates a search engine.
-        In production, this would connect to Google/Bing API.
+        Search the local BM25 index (tasks, memories, summaries and SEARCH_DOCS_DIR files).
+        Memory entries are only returned when searching for their ``user_id``.
         """
-        # Mock results for demonstration
-        return f"""
-        [Search Results for '{query}']
-        1. result_source_a.com: Information about {query} suggests that it is a complex topic.
-        2. wiki_data.org: {query} is defined as a process of...
-        3. news_daily.com: Recent updates on {query} show significant progress.
-        """
\ No newline at end of file
+        if self.corpus is not None:
+            await asyncio.to_thread(self.corpus.refresh)
+        results = await asyncio.to_thread(self.index.search, str(query), self.top_k, sources, user_id)
+        if not results:
+            return f"[Search Results for '{query}']\nNo matching local documents."
+        lines = [f"[Search Results for '{query}']"]
+        for rank, result in enumerate(results, 1):
+            lines.append(f"{rank}. ({result['source']}) {result['title']}: {result['snippet']}")
+        return "\n".join(lines)
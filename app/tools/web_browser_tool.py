@@ -1,5 +1,35 @@
+import asyncio
+import re
+
+import httpx
+
+from ..core.page_fetcher import PageFetcher, page_fetcher
+
+_URL_RE = re.compile(r"https?://[^\s<>\"')]+")
+
+
 class WebBrowserTool:
+    def __init__(self, fetcher: PageFetcher = page_fetcher, max_pages: int = 3, concurrency: int = 3):
+        self.fetcher = fetcher
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+
     async def run(self, query):
-        # Simulate browsing
-        result = f"Browsed web for: {query}"
-        return result
\ No newline at end of file
+        """Fetch the URLs mentioned in ``query`` concurrently (pooled and cached) and return their text."""
+        urls = list(dict.fromkeys(_URL_RE.findall(str(query))))[:self.max_pages]
+        if not urls:
+            return f"No URL to browse in: {query}"
+        semaphore = asyncio.Semaphore(self.concurrency)
+        sections = await asyncio.gather(*(self._section(url, semaphore) for url in urls))
+        return "\n\n".join(sections)
+
+    async def _section(self, url: str, semaphore: asyncio.Semaphore) -> str:
+        try:
+            async with semaphore:
+                page = await self.fetcher.fetch(url)
+        except (httpx.HTTPError, ValueError, LookupError) as e:
+            return f"[{url}] could not be fetched: {e}"
+        header = f"[{page['url']}] {page['title']}".rstrip()
+        if page["status"] != 200:
+            header += f" (HTTP {page['status']})"
+        return f"{header}\n{page['text']}"
@@ -2,6 +2,19 @@ CREATE TABLE tasks (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     description TEXT NOT NULL,
     status VARCHAR(50) DEFAULT 'pending',
+    task_type VARCHAR(50),
+    due_at DATETIME,
+    payload TEXT,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+);
+
+CREATE INDEX ix_tasks_status_due_at ON tasks (status, due_at);
+
+CREATE TABLE scheduler_state (
+    name VARCHAR(50) PRIMARY KEY,
+    cursor_due_at DATETIME,
+    cursor_task_id INTEGER DEFAULT 0,
+    last_fired_at DATETIME,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,89 @@
+"""
+Show that FileTool scans multi-gigabyte files in constant memory.
+
+Writes a --size-gb synthetic log file under a temporary root, then times a
+full line iteration, a regex grep and a chunked summary while sampling the
+process RSS. Exits non-zero when RSS grows more than --budget-mb over the
+baseline, so it can gate CI.
+
+    python scripts/benchmark_file_tool.py --size-gb 2 --budget-mb 256
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.tools.file_tool import FileTool
+
+LINE = b"2024-05-01T12:00:00Z INFO request handled in 12ms for user@example.com path=/api/respond status=200\n"
+
+
+def write_log(path, size_bytes):
+    block = LINE * 10000
+    with open(path, "wb") as f:
+        written = 0
+        while written < size_bytes:
+            f.write(block)
+            written += len(block)
+        f.write(b"2024-05-01T12:00:01Z ERROR upstream timeout after 30000ms\n")
+
+
+class RSSSampler(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.process = psutil.Process()
+        self.peak = self.process.memory_info().rss
+        self.running = True
+
+    def run(self):
+        while self.running:
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(0.01)
+
+
+def measure(name, fn, baseline):
+    sampler = RSSSampler()
+    sampler.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    sampler.running = False
+    sampler.join()
+    growth = (sampler.peak - baseline) / 2 ** 20
+    print(f"{name:<10} {elapsed:>8.2f}s  peak RSS +{growth:.0f} MB  -> {result}")
+    return growth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-gb", type=float, default=2.0, help="size of the generated file")
+    parser.add_argument("--budget-mb", type=float, default=None, help="fail if RSS grows more than this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "big.log")
+        write_log(path, int(args.size_gb * 2 ** 30))
+        tool = FileTool(root=root)
+        baseline = psutil.Process().memory_info().rss
+        print(f"file: {os.path.getsize(path) / 2 ** 30:.2f} GiB, baseline RSS {baseline / 2 ** 20:.0f} MB")
+
+        growth = max(
+            measure("lines", lambda: sum(1 for _ in tool.iter_lines("big.log")), baseline),
+            measure("grep", lambda: len(tool.grep("big.log", r"ERROR .*timeout")), baseline),
+            measure("summarize", lambda: tool.summarize("big.log", chunk_bytes=4 * 2 ** 20)["word_count"], baseline),
+        )
+
+    if args.budget_mb is not None and growth > args.budget_mb:
+        print(f"FAIL memory budget {args.budget_mb:.0f} MB exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
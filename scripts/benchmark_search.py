@@ -0,0 +1,61 @@
+"""
+Measure indexing throughput and query latency of the local BM25 search index.
+
+Builds an index of --docs synthetic documents (Zipf-distributed vocabulary)
+and times --queries random queries, printing p50/p95/max. Exits non-zero
+when p95 exceeds --budget milliseconds, so it can gate CI.
+
+    python scripts/benchmark_search.py --docs 1000000 --budget 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.search_index import SearchIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100_000, help="documents to index")
+    parser.add_argument("--words", type=int, default=40, help="words per document")
+    parser.add_argument("--vocabulary", type=int, default=50_000, help="distinct words")
+    parser.add_argument("--queries", type=int, default=200, help="queries to time")
+    parser.add_argument("--budget", type=float, default=None, help="fail if p95 query latency exceeds this (ms)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vocabulary = [f"w{i}" for i in range(args.vocabulary)]
+    ranks = np.minimum(rng.zipf(1.2, size=(args.docs, args.words)), args.vocabulary) - 1
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    for doc_id, row in enumerate(ranks):
+        index.add(f"doc:{doc_id}", " ".join(vocabulary[r] for r in row))
+    elapsed = time.perf_counter() - started
+    print(f"indexed {args.docs} docs in {elapsed:.1f}s ({args.docs / elapsed:,.0f} docs/s)")
+    print(index.stats())
+
+    latencies = []
+    for _ in range(args.queries):
+        terms = rng.integers(0, min(args.vocabulary, 5000), size=3)
+        query = " ".join(vocabulary[t] for t in terms)
+        started = time.perf_counter()
+        index.search(query, k=10)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"query ms: p50 {latencies[len(latencies) // 2]:.2f}  p95 {p95:.2f}  max {latencies[-1]:.2f}")
+
+    if args.budget is not None and p95 > args.budget:
+        print(f"FAIL query budget {args.budget:.1f}ms exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
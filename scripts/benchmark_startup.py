@@ -0,0 +1,64 @@
+"""
+Measure cold-start import time of the API, per module.
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter
+(best of --runs) and prints the slowest modules by cumulative time. Exits
+non-zero when the total exceeds --budget seconds, so it can gate CI.
+
+    python scripts/benchmark_startup.py --top 25 --budget 2.5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us)} from ``-X importtime`` output."""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        timings[module.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure(target):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {target} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="app.main", help="module to import")
+    parser.add_argument("--runs", type=int, default=3, help="keep the fastest of N runs")
+    parser.add_argument("--top", type=int, default=20, help="modules to list")
+    parser.add_argument("--budget", type=float, default=None, help="fail if total import time exceeds this (seconds)")
+    args = parser.parse_args()
+
+    runs = [measure(args.target) for _ in range(max(args.runs, 1))]
+    best = min(runs, key=lambda timings: timings.get(args.target, (0, 0))[1])
+    total = best.get(args.target, (0, 0))[1] / 1e6
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for module, (self_us, cumulative_us) in sorted(best.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
+    print(f"\nimport {args.target}: {total:.3f}s (best of {len(runs)})")
+
+    if args.budget is not None and total > args.budget:
+        print(f"FAIL startup budget {args.budget:.3f}s exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measure build time, query latency and recall of the IVF-flat vector index.
+
+Inserts --vectors clustered synthetic vectors into a namespace under a
+temporary directory, then times --queries searches and compares their
+top-10 with exact brute-force results. Exits non-zero when p95 latency
+exceeds --budget milliseconds, so it can gate CI.
+
+    python scripts/benchmark_vector_index.py --vectors 1000000 --dim 128 --budget 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.vector_index import VectorStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=200_000, help="vectors to index")
+    parser.add_argument("--dim", type=int, default=128, help="vector length")
+    parser.add_argument("--queries", type=int, default=200, help="queries to time")
+    parser.add_argument("--nprobe", type=int, default=8, help="inverted lists scanned per query")
+    parser.add_argument("--budget", type=float, default=None, help="fail if p95 query latency exceeds this (ms)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(1000, args.dim)).astype(np.float32)
+
+    def sample(n):
+        return centers[rng.integers(0, len(centers), size=n)] + 0.3 * rng.normal(size=(n, args.dim)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        store = VectorStore(base_dir, nprobe=args.nprobe)
+        started = time.perf_counter()
+        for start in range(0, args.vectors, 10_000):
+            batch = sample(min(10_000, args.vectors - start))
+            store.upsert("bench", [(f"v{start + i}", vector, {}) for i, vector in enumerate(batch)])
+        print(f"indexed {args.vectors} x {args.dim} in {time.perf_counter() - started:.1f}s {store.namespace('bench').stats()}")
+
+        store.snapshot()  # as the app does at shutdown
+        started = time.perf_counter()
+        reopened = VectorStore(base_dir, nprobe=args.nprobe)
+        index = reopened.namespace("bench")
+        print(f"reopened in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        queries = sample(args.queries)
+        latencies, recalls = [], []
+        matrix = np.asarray(index.vectors[:index.count])
+        for query in queries:
+            started = time.perf_counter()
+            found = reopened.search("bench", query, k=10)
+            latencies.append((time.perf_counter() - started) * 1000)
+            exact = np.argsort(-(matrix @ (query / np.linalg.norm(query))))[:10]
+            recalls.append(len({f"v{i}" for i in exact} & {r["id"] for r in found}) / 10)
+
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"query ms: p50 {latencies[len(latencies) // 2]:.2f}  p95 {p95:.2f}  max {latencies[-1]:.2f}")
+    print(f"recall@10: {np.mean(recalls):.3f}")
+
+    if args.budget is not None and p95 > args.budget:
+        print(f"FAIL query budget {args.budget:.1f}ms exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Convert a CSV embedding log into the binary embedding log.
+
+Reads embedding_log.csv (timestamp, user_id, session_id, platform and a JSON
+list per row) and appends its rows to the log directory used by the app.
+The CSV is left in place; remove it once the conversion is checked.
+
+    python scripts/convert_embedding_log.py embedding_log.csv --out data/embedding_log
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.embedding_log import EmbeddingLog, convert_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="?", default="embedding_log.csv", help="CSV log to convert")
+    parser.add_argument("--out", default=os.getenv("EMBEDDING_LOG_DIR", "data/embedding_log"), help="log directory")
+    parser.add_argument("--batch-size", type=int, default=10000, help="rows per append")
+    args = parser.parse_args()
+
+    log = EmbeddingLog(args.out)
+    before = len(log)
+    started = time.perf_counter()
+    converted = convert_csv(args.csv, log, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - started
+    print(f"converted {converted} rows in {elapsed:.2f}s; {args.out} now holds {before + converted} rows of dim {log.dim}")
+    print(f"{os.path.getsize(args.csv)} CSV bytes -> {log.stats()['bytes']} log bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.bhiv_core import BHIVCore, relevant_context
+from app.core.bhiv_reasoner import BHIVReasoner
+from app.core.cache import TTLCache
+
+
+class FakeMemory:
+    def __init__(self):
+        self.data = {"favourite colour": "blue"}
+
+    def retrieve_context(self, input_data):
+        return dict(self.data)
+
+    def update(self, query, result):
+        self.data[str(getattr(query, "query", query))] = result
+
+
+class CountingAgent:
+    def __init__(self, name, calls, output):
+        self.name = name
+        self.calls = calls
+        self.output = output
+
+    async def run(self, subject, context, tools=None):
+        self.calls.append(self.name)
+        return {"agent": self.name, "output": self.output(subject)}
+
+
+def make_core():
+    calls = []
+    plan = {"steps": [{"type": "research", "description": "vitamin d sources"},
+                      {"type": "analyze", "description": "vitamin d benefits"}]}
+    agents = {
+        "planner": CountingAgent("planner", calls, lambda q: plan),
+        "researcher": CountingAgent("researcher", calls, lambda t: f"found {t['description']}"),
+        "analyst": CountingAgent("analyst", calls, lambda t: f"analyzed {t['description']}"),
+        "executor": CountingAgent("executor", calls, lambda t: "done"),
+        "evaluator": CountingAgent("evaluator", calls, lambda steps: f"final from {len(steps)} steps"),
+    }
+    core = BHIVCore(FakeMemory(), agents, tools={}, reasoner=BHIVReasoner(), cache=TTLCache(ttl=60))
+    return core, calls
+
+
+def test_repeated_query_is_served_from_cache():
+    core, calls = make_core()
+
+    first = asyncio.run(core.process("Benefits of Vitamin D?"))
+    assert calls == ["planner", "researcher", "analyst", "evaluator"]
+
+    # The stored answer to this query and a whitespace/case change do not defeat the cache
+    second = asyncio.run(core.process("benefits of   vitamin d"))
+    assert second == first
+    assert len(calls) == 4
+
+
+def test_invalidate_forces_recompute():
+    core, calls = make_core()
+    asyncio.run(core.process("Benefits of Vitamin D?"))
+
+    assert core.invalidate("benefits of vitamin d") == 4
+    asyncio.run(core.process("Benefits of Vitamin D?"))
+    assert len(calls) == 8
+
+
+def test_cached_plans_and_answers_are_not_shared_between_users():
+    from types import SimpleNamespace
+
+    core, calls = make_core()
+    alice = SimpleNamespace(query="Benefits of Vitamin D?", user_id="alice", session_id="s1")
+    bob = SimpleNamespace(query="Benefits of Vitamin D?", user_id="bob", session_id="s1")
+
+    asyncio.run(core.process(alice))
+    asyncio.run(core.process(bob))
+    assert calls == ["planner", "researcher", "analyst", "evaluator"] * 2
+
+    asyncio.run(core.process(alice))
+    assert len(calls) == 8
+
+
+def test_relevant_context_ignores_unrelated_entries():
+    context = {"vitamin d dosage": "1000 IU", "favourite colour": "blue", "Benefits of Vitamin D?": "old answer"}
+    assert relevant_context(context, "benefits of vitamin d") == {"vitamin d dosage": "1000 IU"}
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.bhiv_reasoner import BHIVReasoner, resolve_dependencies
+
+
+class SlowAgent:
+    def __init__(self, name, log, delay=0.05):
+        self.name = name
+        self.log = log
+        self.delay = delay
+
+    async def run(self, task, context, tools=None):
+        self.log.append(("start", task["description"]))
+        await asyncio.sleep(self.delay)
+        self.log.append(("end", task["description"]))
+        return {"agent": self.name, "output": task["description"]}
+
+
+def make_agents(log):
+    return {name: SlowAgent(name, log) for name in ("researcher", "analyst", "executor")}
+
+
+def test_default_dependencies_group_same_type_steps():
+    plan = [
+        {"type": "research"}, {"type": "research"}, {"type": "analyze"},
+        {"type": "execute"}, {"type": "execute", "depends_on": [0]},
+    ]
+    assert resolve_dependencies(plan) == [[], [], [0, 1], [0, 1, 2], [0]]
+
+
+def test_independent_steps_run_concurrently_and_keep_plan_order():
+    log = []
+    plan = [
+        {"type": "research", "description": "r1"},
+        {"type": "research", "description": "r2"},
+        {"type": "research", "description": "r3"},
+        {"type": "analyze", "description": "a1"},
+        {"type": "execute", "description": "e1"},
+    ]
+    reasoner = BHIVReasoner(max_parallel=4)
+
+    started = time.perf_counter()
+    results = asyncio.run(reasoner.run_steps(plan, {}, make_agents(log), tools={}))
+    elapsed = time.perf_counter() - started
+
+    assert [r["output"] for r in results] == ["r1", "r2", "r3", "a1", "e1"]
+    # Critical path is research -> analyze -> execute: three delays, not five
+    assert elapsed < 0.2
+    assert log.index(("start", "a1")) > max(log.index(("end", r)) for r in ("r1", "r2", "r3"))
+    assert log.index(("start", "e1")) > log.index(("end", "a1"))
+
+
+def test_parallelism_limit_is_respected():
+    log = []
+    plan = [{"type": "research", "description": f"r{i}"} for i in range(4)]
+    asyncio.run(BHIVReasoner(max_parallel=1).run_steps(plan, {}, make_agents(log), tools={}))
+    # With one slot every step ends before the next starts
+    assert [event for event, _ in log] == ["start", "end"] * 4
+
+
+class Planner:
+    name = "planner"
+
+    def __init__(self, plan):
+        self.plan = plan
+
+    async def run(self, query, context):
+        return {"agent": self.name, "output": {"steps": self.plan}}
+
+
+class Evaluator:
+    name = "evaluator"
+
+    async def run(self, steps, context):
+        return {"agent": self.name, "output": [step["output"] for step in steps[1:]]}
+
+
+def test_events_and_deadline_synthesize_from_completed_steps():
+    log = []
+    agents = make_agents(log)
+    agents["analyst"].delay = 5  # would blow the deadline
+    agents["planner"] = Planner([
+        {"type": "research", "description": "r1"},
+        {"type": "analyze", "description": "slow"},
+    ])
+    agents["evaluator"] = Evaluator()
+    events = []
+
+    async def scenario():
+        deadline = asyncio.get_running_loop().time() + 0.2
+        return await BHIVReasoner().run("q", {}, agents, {}, on_event=lambda e, d: events.append((e, d)), deadline=deadline)
+
+    started = time.perf_counter()
+    final = asyncio.run(scenario())
+
+    assert time.perf_counter() - started < 1
+    assert final["output"][0] == "r1"
+    assert final["output"][-1].startswith("Incomplete")
+    assert final["incomplete"] is True and final["unfinished_steps"] == 1
+    assert [e for e, _ in events] == ["plan", "step-start", "step-result", "step-start"]
+    assert events[2][1]["index"] == 0 and events[2][1]["output"] == "r1"
+
+
+def test_budget_limits_steps_and_times_out_slow_agents():
+    from app.core.bhiv_reasoner import Budget
+
+    log = []
+    agents = make_agents(log)
+    agents["researcher"].delay = 5
+    agents["planner"] = Planner(
+        [{"type": "research", "description": "slow"}] + [{"type": "analyze", "description": f"a{i}"} for i in range(5)]
+    )
+    agents["evaluator"] = Evaluator()
+    budget = Budget(total=10, agent_timeout=0.1, max_steps=3, evaluator_reserve=1)
+
+    started = time.perf_counter()
+    final = asyncio.run(BHIVReasoner(budget=budget).run("q", {}, agents, {}))
+
+    assert time.perf_counter() - started < 1
+    # One research step timed out and three steps were over the limit
+    assert final["unfinished_steps"] == 4
+    assert final["output"][:2] == ["a0", "a1"]
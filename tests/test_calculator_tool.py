@@ -0,0 +1,60 @@
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.tools.calculator_tool import CalculatorTool
+from app.tools.expression import ExpressionError, compile_expression, evaluate
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("2 + 3 * 4", 14),
+    ("(2 + 3) * 4", 20),
+    ("-2 ** 2", -4),
+    ("2 ** 3 ** 2", 512),
+    ("2^10", 1024),
+    ("7 // 2 + 7 % 2", 4),
+    ("sqrt(16) + max(1, 5, 3)", 9.0),
+    ("1.5e3 / 3", 500.0),
+])
+def test_evaluates_arithmetic(expression, expected):
+    assert evaluate(expression) == expected
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('true')",
+    "().__class__",
+    "open('x')",
+    "2 +",
+    "1 / 0",
+    "9 ** 9 ** 9",
+    "(-8) ** 0.5",
+    "(" * 200 + "1" + ")" * 200,
+])
+def test_rejects_unsafe_invalid_or_runaway_expressions(expression):
+    started = time.perf_counter()
+    with pytest.raises(ExpressionError):
+        evaluate(expression)
+    assert time.perf_counter() - started < 0.5
+
+
+def test_vectorized_evaluation_and_compiled_cache():
+    x = np.linspace(0, 1, 1000)
+    result = evaluate("3 * x ** 2 + offset", x=x, offset=1)
+    assert np.allclose(result, 3 * x ** 2 + 1)
+
+    assert compile_expression("a * b + 1") is compile_expression("a * b + 1")
+    assert compile_expression("a * b + 1").variables == ("a", "b")
+    with pytest.raises(ExpressionError):
+        evaluate("a * b", a=1)
+
+
+def test_calculator_tool_extracts_expression_from_text():
+    tool = CalculatorTool()
+    assert asyncio.run(tool.run("what is 2 * (3 + 4)?")) == "Calculated: 14"
+    assert asyncio.run(tool.run("import os")) == "Invalid calculation"
@@ -0,0 +1,135 @@
+import os
+import sys
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ["API_KEY"] = os.environ.get("API_KEY", "localtest")
+
+from app.core.embedding_cache import EmbeddingCache
+from app.main import app
+from app.routers.embed import cosine_matrix, top_k_rows
+
+client = TestClient(app)
+client.headers.update({"X-API-Key": os.environ["API_KEY"]})
+
+
+def test_cosine_matrix_matches_pairwise_definition():
+    rng = np.random.default_rng(0)
+    a, b = rng.normal(size=(4, 8)).tolist(), rng.normal(size=(3, 8)).tolist()
+    a.append([0.0] * 8)
+    expected = [
+        [float(np.dot(x, y) / (np.linalg.norm(x) * np.linalg.norm(y))) if any(x) else 0.0 for y in b]
+        for x in a
+    ]
+    result = cosine_matrix(a, b)
+    assert result.dtype == np.float32 and result.shape == (5, 3)
+    assert np.allclose(result, expected, atol=1e-6)
+
+    best = top_k_rows(result, 2)
+    assert [entry["index"] for entry in best[0]] == list(np.argsort(-np.array(expected[0]))[:2])
+    assert best[0][0]["score"] >= best[0][1]["score"]
+
+
+def test_similarity_endpoint_returns_matrix_or_top_k():
+    texts = ["alpha", "beta", "gamma"]
+    response = client.post("/api/embed/similarity", json={"texts1": texts, "texts2": texts})
+    assert response.status_code == 200
+    matrix = response.json()["similarities"]
+    assert len(matrix) == 3 and all(abs(matrix[i][i] - 1.0) < 1e-5 for i in range(3))
+
+    response = client.post("/api/embed/similarity", json={"texts1": texts, "texts2": texts, "top_k": 1})
+    assert response.status_code == 200
+    assert [row[0]["index"] for row in response.json()["top_k"]] == [0, 1, 2]
+
+    response = client.post("/api/embed/similarity", json={"texts1": texts, "texts2": texts, "top_k": 0})
+    assert response.status_code == 422
+
+
+def test_resolver_dedupes_batches_and_keeps_order(monkeypatch):
+    import asyncio
+    import threading
+    from app.routers import embed
+
+    calls = []
+
+    def fake_process_message(user_id, session_id, platform, text):
+        calls.append((text, threading.current_thread().name))
+        if text == "broken":
+            return {"status": "error", "error_message": "nope"}
+        vector = [float(len(text)), 1.0]
+        return {"status": "success", "embedding": vector, "obfuscated_embedding": [v * 2 for v in vector]}
+
+    monkeypatch.setattr(embed, "process_message", fake_process_message)
+    monkeypatch.setattr(embed, "cache", EmbeddingCache())
+    monkeypatch.setattr(embed, "EMBED_BATCH_SIZE", 2)
+
+    texts = ["a", "bb", "a", "ccc", "broken", "bb"]
+    pairs = asyncio.run(embed.resolve_embeddings(texts, user_id="u1"))
+    assert [pair[0][0] for pair in pairs[:4]] == [1.0, 2.0, 1.0, 3.0]
+    assert pairs[4][0] == embed._fallback_embedding("broken")
+    assert sorted(text for text, _ in calls) == ["a", "bb", "broken", "ccc"]
+    assert all(name.startswith("embed") for _, name in calls)
+
+    calls.clear()
+    asyncio.run(embed.resolve_embeddings(["ccc", "a", "broken"], user_id="u1"))
+    assert [text for text, _ in calls] == ["broken"]  # fallbacks are not cached
+    asyncio.run(embed.resolve_embeddings(["a"], user_id="u2"))
+    assert [text for text, _ in calls] == ["broken", "a"]  # cache is per user
+
+    response = client.post("/api/embed", json={"texts": ["bb", "a"], "user_id": "u1"})
+    assert response.json()["obfuscated_embeddings"] == [[4.0, 2.0], [2.0, 2.0]]
+
+
+def test_embedding_cache_lru_eviction_and_memory_cap():
+    dim = 384
+    entry = EmbeddingCache().entry_bytes((dim, dim))
+    cache = EmbeddingCache(max_bytes=3 * entry, initial_rows=1)
+    vectors = {key: ([float(key)] * dim, [float(-key)] * dim) for key in range(4)}
+    for key in range(3):
+        cache.put(key, *vectors[key])
+    assert cache.get(0) == vectors[0]  # 0 becomes most recently used
+    cache.put(3, *vectors[3])
+
+    assert 1 not in cache and {0, 2, 3} <= set(cache.get_many([0, 1, 2, 3]))
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["bytes"] <= 3 * entry
+    assert stats["allocated_bytes"] <= 3 * entry + 3 * 8
+
+
+def test_embedding_cache_caps_allocated_memory_across_shapes():
+    cap = 1024 * 1024
+    cache = EmbeddingCache(max_bytes=cap, initial_rows=16)
+    rng = np.random.default_rng(2)
+    for i in range(400):
+        cache.put(("a", i), rng.normal(size=384).tolist(), rng.normal(size=384).tolist())
+    for i in range(400):
+        cache.put(("b", i), rng.normal(size=256).tolist(), rng.normal(size=256).tolist())
+        assert cache.stats()["allocated_bytes"] <= cap
+
+    stats = cache.stats()
+    assert stats["entries"] > 0 and stats["bytes"] <= stats["allocated_bytes"] <= cap
+    assert cache.get(("b", 399)) is not None
+    # Entries evicted from the first shape released its slab memory
+    assert stats["allocated_bytes"] - stats["bytes"] < cap // 2
+
+
+def test_embedding_cache_is_compact_and_int8_is_close():
+    rng = np.random.default_rng(1)
+    dim = 384
+    raw, obfuscated = rng.normal(size=dim).tolist(), rng.normal(size=dim).tolist()
+    # Two Python lists of float objects, as the old dict cache held them
+    list_bytes = 2 * (sys.getsizeof(raw) + dim * sys.getsizeof(1.5))
+
+    full = EmbeddingCache()
+    full.put("k", raw, obfuscated)
+    assert np.allclose(full.get("k")[0], raw, atol=1e-6)
+    assert list_bytes / full.stats()["bytes_per_entry"] > 7
+
+    small = EmbeddingCache(quantize=True)
+    small.put("k", raw, obfuscated)
+    restored = np.array(small.get("k")[1])
+    assert list_bytes / small.stats()["bytes_per_entry"] > 10
+    assert np.max(np.abs(restored - obfuscated)) <= np.max(np.abs(obfuscated)) / 127
@@ -0,0 +1,111 @@
+import asyncio
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.embedding_log import EmbeddingLog, EmbeddingLogWriter, convert_csv
+
+REPO_CSV = os.path.join(os.path.dirname(__file__), '..', 'embedding_log.csv')
+
+
+def test_append_and_zero_copy_views(tmp_path):
+    log = EmbeddingLog(str(tmp_path))
+    log.append_many([
+        (1.0, "alice", "s1", "web", [1.0, 2.0, 3.0]),
+        (2.0, "bob", "s2", "cli", [4.0, 5.0, 6.0]),
+        (3.0, "alice", "s1", "web", [7.0, 8.0, 9.0]),
+    ])
+
+    vectors = log.vectors()
+    assert isinstance(vectors, np.memmap) and not vectors.flags.writeable
+    assert vectors.shape == (3, 3) and vectors.dtype == np.float32
+    assert log.records()["timestamp"].tolist() == [1.0, 2.0, 3.0]
+    assert log.for_user("alice").tolist() == [[1.0, 2.0, 3.0], [7.0, 8.0, 9.0]]
+    assert log.for_user("nobody").shape == (0, 3)
+
+    reopened = EmbeddingLog(str(tmp_path))
+    assert len(reopened) == 3 and reopened.dim == 3
+    row = list(reopened.rows(1, 2))[0]
+    assert (row["user_id"], row["session_id"], row["platform"]) == ("bob", "s2", "cli")
+    assert row["obfuscated_embedding"].tolist() == [4.0, 5.0, 6.0]
+
+
+def test_rejects_mismatched_dim_and_truncates_torn_tail(tmp_path):
+    log = EmbeddingLog(str(tmp_path))
+    log.append_many([(1.0, "u", "s", "web", [0.5, 0.5])])
+    try:
+        log.append_many([(2.0, "u", "s", "web", [0.5, 0.5, 0.5])])
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+    # A crash between the vector and record writes leaves an orphan vector
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(np.zeros(2, dtype="<f4").tobytes() + b"\x00")
+    reopened = EmbeddingLog(str(tmp_path))
+    assert len(reopened) == 1
+    assert os.path.getsize(tmp_path / "vectors.f32") == 8
+    reopened.append_many([(3.0, "v", "s", "web", [1.0, 1.0])])
+    assert reopened.vectors().tolist() == [[0.5, 0.5], [1.0, 1.0]]
+
+
+def test_torn_string_table_line_is_cut_before_the_next_append(tmp_path):
+    log = EmbeddingLog(str(tmp_path))
+    log.append_many([(1.0, "u", "s", "web", [0.5, 0.5])])
+    # A crash mid-append leaves a partial string; no header is needed for the cut
+    os.remove(tmp_path / "header.json")
+    with open(tmp_path / "strings.jsonl", "a") as f:
+        f.write('"half-writ')
+
+    reopened = EmbeddingLog(str(tmp_path))
+    assert reopened.dim is None
+    reopened.append_many([(2.0, "v", "s2", "web", [1.0, 1.0])])
+    again = EmbeddingLog(str(tmp_path))
+    assert [again.string(i) for i in range(5)] == ["u", "s", "web", "v", "s2"]
+
+
+def test_writer_batches_appends_off_the_loop(tmp_path):
+    log = EmbeddingLog(str(tmp_path))
+    calls = []
+    append_many = log.append_many
+    log.append_many = lambda rows: calls.append(len(rows)) or append_many(rows)
+    writer = EmbeddingLogWriter(log, batch_size=4, interval=60)
+
+    async def run():
+        writer.submit("u", "s", "web", [[1.0, 0.0]])
+        writer.submit("u", "s", "web", [[0.0, 1.0], [1.0, 1.0]])
+        assert len(log) == 0  # buffered, nothing written yet
+        writer.submit("u", "s", "web", [[2.0, 2.0]])  # reaches the batch size
+        await asyncio.sleep(0.2)
+        assert calls == [4]
+        writer.submit("u", "s", "web", [[3.0, 3.0]])
+        await writer.flush()  # what shutdown does with a partial batch
+
+    asyncio.run(run())
+    assert calls == [4, 1]
+    assert len(log) == 5 and writer.stats()["written"] == 5
+
+
+def test_disabled_writer_drops_rows(tmp_path):
+    writer = EmbeddingLogWriter(EmbeddingLog(str(tmp_path)), enabled=False)
+    writer.submit("u", "s", "web", [[1.0]])
+    assert writer.stats()["pending"] == 0
+
+
+def test_convert_repo_csv(tmp_path):
+    with open(REPO_CSV, newline="") as f:
+        rows = list(csv.DictReader(f))
+    log = EmbeddingLog(str(tmp_path / "log"))
+    assert convert_csv(REPO_CSV, log) == len(rows)
+
+    assert log.vectors().shape == (len(rows), len(json.loads(rows[0]["obfuscated_embedding"])))
+    for original, converted in zip(rows, log.rows()):
+        assert converted["timestamp"] == original["timestamp"]
+        assert converted["user_id"] == original["user_id"]
+        assert converted["platform"] == original["platform"]
+        assert np.allclose(converted["obfuscated_embedding"], json.loads(original["obfuscated_embedding"]))
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.tools import file_tool
+from app.tools.file_tool import FileAccessError, FileTool
+
+
+@pytest.fixture
+def tool(tmp_path):
+    (tmp_path / "app.log").write_bytes(
+        b"boot ok\nERROR disk full on /dev/sda\nrequest served\nERROR timeout talking to db\n"
+    )
+    (tmp_path / "empty.txt").write_bytes(b"")
+    return FileTool(root=str(tmp_path))
+
+
+def test_paths_are_confined_to_the_root(tool, tmp_path):
+    outside = tmp_path.parent / "secret.txt"
+    outside.write_text("top secret")
+    os.symlink(outside, tmp_path / "link.txt")
+
+    for path in ("../secret.txt", str(outside), "link.txt"):
+        with pytest.raises(FileAccessError):
+            tool.read_range(path)
+    assert "outside the file tool root" in asyncio.run(tool.run("read ../secret.txt"))
+
+
+def test_byte_ranges_lines_and_empty_files(tool):
+    assert tool.read_range("app.log", 0, 4) == b"boot"
+    assert tool.read_range("app.log", 10_000) == b""
+    lines = list(tool.iter_lines("app.log"))
+    assert lines[1] == (8, "ERROR disk full on /dev/sda")
+    assert list(tool.iter_lines("app.log", start=lines[2][0]))[0][1] == "request served"
+    assert list(tool.iter_lines("empty.txt")) == []
+    assert tool.grep("empty.txt", "x") == []
+
+
+def test_grep_returns_offsets_of_matches_and_lines(tool):
+    matches = tool.grep("app.log", r"ERROR (\w+)")
+    assert [m["match"] for m in matches] == ["ERROR disk", "ERROR timeout"]
+    assert matches[0]["offset"] == 8 and matches[0]["line_offset"] == 8
+    assert matches[1]["line"] == "ERROR timeout talking to db"
+    assert tool.read_range("app.log", matches[1]["offset"], 5) == b"ERROR"
+    assert len(tool.grep("app.log", "error", max_matches=1, ignore_case=True)) == 1
+
+
+def test_large_file_is_scanned_in_chunks_with_pages_released(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_tool, "RELEASE_WINDOW", 64 * 1024)
+    released = []
+    original = file_tool._release
+    monkeypatch.setattr(file_tool, "_release", lambda mm, start, end: released.append(end) or original(mm, start, end))
+    line = b"The service handled a request. Contact ops@example.com for access.\n"
+    (tmp_path / "big.log").write_bytes(line * 20000 + b"Final line is important.\n")
+    tool = FileTool(root=str(tmp_path))
+
+    chunks = list(tool.iter_chunks("big.log", chunk_bytes=100_000))
+    assert len(chunks) > 10 and all(chunk.endswith("\n") for chunk in chunks)
+    assert sum(1 for _ in tool.iter_lines("big.log")) == 20001
+    assert released
+
+    summary = tool.summarize("big.log", chunk_bytes=100_000)
+    assert summary["chunks"] == len(chunks)
+    assert summary["word_count"] == 20000 * 9 + 4
+    assert summary["entities"]["email"] == ["ops@example.com"]
+    assert summary["summary"].endswith("Final line is important")
+
+
+def test_run_dispatches_text_commands(tool):
+    assert asyncio.run(tool.run("grep ERROR app.log")).startswith("8: ERROR disk full")
+    assert asyncio.run(tool.run("lines app.log 0 1")) == "0: boot ok"
+    assert "File operation failed" in asyncio.run(tool.run("delete app.log"))
+
+
+def test_default_root_keeps_app_state_out_of_reach(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("FILE_TOOL_ROOT", raising=False)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "memory.json").write_text("{}")
+    tool = FileTool()
+    assert tool.root == os.path.realpath(tmp_path / "data" / "files")
+    with pytest.raises(FileAccessError):
+        tool.resolve("../memory.json")
@@ -114,6 +114,18 @@ def test_voice_to_intent_flow():
     intent_response = client.post("/api/intent", json={"text": text})
     assert intent_response.status_code == 200
 
+def test_external_llm_stream():
+    response = client.post("/api/external_llm", json={"prompt": "Hello stream", "model": "uniguru", "stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: token" in response.text
+    assert "event: done" in response.text
+
+def test_respond_stream():
+    response = client.post("/api/respond", json={"query": "Hello", "context": {}, "stream": True})
+    assert response.status_code == 200
+    assert "event: done" in response.text
+
 def test_multi_llm_routing():
     models = ["uniguru", "chatgpt", "groq", "gemini", "mistral"]
     for model in models:
@@ -122,3 +134,45 @@ def test_multi_llm_routing():
 
 if __name__ == "__main__":
     pytest.main([__file__])
+
+
+def test_stream_callback_events_cancel_on_disconnect():
+    import asyncio
+    from app.core.streaming import callback_events, ndjson_event
+
+    cancelled = []
+
+    async def run(on_event):
+        await on_event("plan", {"steps": []})
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        events = callback_events(run, frame=ndjson_event)
+        first = await events.__anext__()
+        await events.aclose()
+        await asyncio.sleep(0)
+        return first
+
+    assert asyncio.run(scenario()) == '{"steps": [], "event": "plan"}\n'
+    assert cancelled == [True]
+
+
+def test_jobs_reject_unknown_kind_and_missing_job():
+    response = client.post("/api/jobs", json={"kind": "nope", "payload": {}})
+    assert response.status_code == 400
+    assert client.get("/api/jobs/does-not-exist").status_code == 404
+    assert client.get("/api/jobs/does-not-exist/result").status_code == 404
+
+
+def test_jobs_validate_payload_and_webhook_at_submission():
+    assert client.post("/api/jobs", json={"kind": "decision", "payload": {}}).status_code == 400
+    assert client.post("/api/jobs", json={"kind": "bhiv", "payload": {"context": {}}}).status_code == 400
+    hook = {"kind": "decision", "payload": {"input_text": "hi"}, "webhook_url": "http://127.0.0.1:8000/admin"}
+    assert client.post("/api/jobs", json=hook).status_code == 400
+    # A valid job is refused rather than left queued when no workers are running
+    response = client.post("/api/jobs", json={"kind": "decision", "payload": {"input_text": "hi"}})
+    assert response.status_code == 503
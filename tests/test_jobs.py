@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.jobs import FAILED, QUEUED, SUCCEEDED, JobQueue, JobStore, check_webhook_url
+
+
+def test_jobs_run_by_priority_and_persist_results(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queue = JobQueue(JobStore(path), workers=1)
+    order = []
+
+    async def handler(payload):
+        order.append(payload["name"])
+        if payload["name"] == "bad":
+            raise RuntimeError("boom")
+        return {"echo": payload["name"]}
+
+    queue.register("echo", handler)
+
+    async def scenario():
+        # Submitted before the workers start, so priority alone decides the order
+        low = await queue.submit("echo", {"name": "low"}, priority=0)
+        high = await queue.submit("echo", {"name": "high"}, priority=5)
+        bad = await queue.submit("echo", {"name": "bad"}, priority=1)
+        assert (await queue.get(low["id"]))["status"] == QUEUED
+        await queue.start()
+        await queue._queue.join()
+        await queue.stop()
+        return low, high, bad
+
+    low, high, bad = asyncio.run(scenario())
+
+    assert order == ["high", "bad", "low"]
+    # Results survive in a fresh store on the same file
+    store = JobStore(path)
+    assert store.get(high["id"])["status"] == SUCCEEDED
+    assert store.get(high["id"])["result"] == {"echo": "high"}
+    assert store.get(bad["id"])["status"] == FAILED
+    assert store.get(bad["id"])["error"] == "boom"
+
+
+def test_interrupted_jobs_resume_and_webhook_fires(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    queue = JobQueue(store, workers=2)
+    delivered = []
+
+    async def handler(payload):
+        return payload["n"] * 2
+
+    async def send_webhook(job):
+        delivered.append((job["id"], job["status"], job["result"]))
+
+    queue.register("double", handler)
+    queue._send_webhook = send_webhook
+
+    async def scenario():
+        job = await queue.submit("double", {"n": 21}, webhook_url="http://example.invalid/hook")
+        store.update(job["id"], status="running")  # as if the process died mid-run
+        await queue.start()
+        await queue._queue.join()
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert store.get(job["id"])["result"] == 42
+    assert delivered == [(job["id"], SUCCEEDED, 42)]
+
+
+def test_webhook_urls_must_be_public_http_or_allowlisted():
+    check_webhook_url("https://93.184.216.34/hook")
+    for url in ("ftp://93.184.216.34/hook", "http://127.0.0.1/hook", "http://10.0.0.5/hook",
+                "http://169.254.169.254/latest", "http://[::1]/hook", "http://host.invalid/hook"):
+        with pytest.raises(ValueError):
+            check_webhook_url(url)
+    check_webhook_url("http://127.0.0.1:9000/hook", allowed_hosts=["127.0.0.1"])
+    with pytest.raises(ValueError):
+        check_webhook_url("https://93.184.216.34/hook", allowed_hosts=["hooks.example.com"])
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.cache import SQLiteCache, TieredCache, TTLCache
+from app.core.llm_bridge import LLMBridge
+
+
+def test_byte_cap_evicts_oldest_and_rejects_oversized():
+    cache = TTLCache(max_entries=100, ttl=60, max_bytes=10)
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    cache.set("c", "cccc")  # 12 bytes > 10, "a" goes
+    assert cache.get("a") is None
+    assert cache.get("c") == "cccc"
+    cache.set("huge", "x" * 11)
+    assert cache.get("huge") is None
+    stats = cache.stats()
+    assert stats["bytes"] <= 10
+    assert stats["evictions"] == 1
+    assert stats["rejected"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    first = TieredCache(TTLCache(ttl=60), SQLiteCache(path))
+    first.set("k", "answer")
+
+    second = TieredCache(TTLCache(ttl=60), SQLiteCache(path))
+    assert second.get("k") == "answer"
+    assert second.memory.get("k") == "answer"  # promoted on disk hit
+
+    third = TieredCache(TTLCache(ttl=60), SQLiteCache(path))
+    assert asyncio.run(third.aget("k")) == "answer"
+    asyncio.run(third.aset("k2", "later"))
+    assert SQLiteCache(path).get("k2") == "later"
+
+
+def test_disk_reads_do_not_write_and_recency_is_kept_for_eviction(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "c.sqlite"), max_entries=2)
+    disk._EVICT_EVERY = 3
+    disk.set("old", 1)
+    disk.set("new", 2)
+    changes = disk._conn.total_changes
+    assert disk.get("old") == 1
+    assert disk._conn.total_changes == changes  # a hit no longer commits an UPDATE
+    disk.set("newest", 3)  # third write: access times are flushed, then LRU eviction runs
+    assert disk.get("old") == 1 and disk.get("newest") == 3
+    assert disk.get("new") is None
+
+
+def test_fallback_outputs_are_not_cached():
+    bridge = LLMBridge(cache=TieredCache(TTLCache(ttl=60)))
+    bridge.openai_client = None  # forces the provider error path
+
+    output = asyncio.run(bridge.call_llm("chatgpt", "hello"))
+    assert "Mock" in output
+    assert len(bridge.cache) == 0
+
+    asyncio.run(bridge.call_llm("uniguru", "hello"))
+    assert len(bridge.cache) == 1
+
+
+def test_concurrent_identical_prompts_share_one_call():
+    bridge = LLMBridge(cache=TieredCache(TTLCache(ttl=60)))
+    calls = []
+
+    async def slow_provider(model, prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.01)
+        return f"answer to {prompt}", True
+
+    bridge._call_provider = slow_provider
+
+    async def scenario():
+        return await asyncio.gather(*(bridge.call_llm("chatgpt", "news today") for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert results == ["answer to news today"] * 10
+    assert calls == ["news today"]
+    assert bridge.stats()["coalesced_calls"] == 9
+
+
+def test_provider_call_is_cancelled_once_every_caller_gives_up():
+    bridge = LLMBridge(cache=TieredCache(TTLCache(ttl=60)))
+    cancelled = []
+
+    async def hanging_provider(model, prompt):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(prompt)
+            raise
+        return "late", True
+
+    bridge._call_provider = hanging_provider
+
+    async def scenario():
+        callers = [asyncio.wait_for(bridge.call_llm("chatgpt", "slow question"), 0.05) for _ in range(2)]
+        outcomes = await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        return outcomes
+
+    outcomes = asyncio.run(scenario())
+    assert all(isinstance(outcome, asyncio.TimeoutError) for outcome in outcomes)
+    assert cancelled == ["slow question"]
+    assert bridge.stats()["inflight"] == 0
+
+
+def test_stream_yields_tokens_and_caches_full_text():
+    from app.core.metrics import metrics
+
+    bridge = LLMBridge(cache=TieredCache(TTLCache(ttl=60)))
+
+    async def collect():
+        return [token async for token in bridge.stream_llm("uniguru", "stream me")]
+
+    tokens = asyncio.run(collect())
+    assert len(tokens) > 1
+    assert bridge.cache.get(hashlib.sha256(b"uniguru:stream me").hexdigest()) == "".join(tokens)
+    assert metrics.collect()["observations"]["llm.ttft_seconds.uniguru"]["count"] >= 1
+
+
+def test_semantic_cache_answers_paraphrases_per_tenant():
+    from app.core.semantic_cache import SemanticCache
+
+    vectors = {
+        "what's the weather": [1.0, 0.0, 0.1],
+        "tell me the weather": [0.98, 0.02, 0.12],
+        "book a flight": [0.0, 1.0, 0.0],
+    }
+
+    async def fake_embed(tenant, text):
+        return vectors.get(text)
+
+    semantic = SemanticCache(embed_fn=fake_embed, threshold=0.95)
+    bridge = LLMBridge(cache=TieredCache(TTLCache(ttl=60)), semantic_cache=semantic)
+    calls = []
+
+    async def provider(model, prompt):
+        calls.append(prompt)
+        return f"answer to {prompt}", True
+
+    bridge._call_provider = provider
+
+    async def scenario():
+        first = await bridge.call_llm("chatgpt", "what's the weather", tenant="alice")
+        paraphrase = await bridge.call_llm("chatgpt", "tell me the weather", tenant="alice")
+        other_tenant = await bridge.call_llm("chatgpt", "tell me the weather", tenant="bob")
+        unrelated = await bridge.call_llm("chatgpt", "book a flight", tenant="alice")
+        return first, paraphrase, other_tenant, unrelated
+
+    first, paraphrase, other_tenant, unrelated = asyncio.run(scenario())
+    assert paraphrase == first
+    assert other_tenant == "answer to tell me the weather"
+    assert unrelated == "answer to book a flight"
+    assert calls == ["what's the weather", "tell me the weather", "book a flight"]
+    assert semantic.stats()["hits"] == 1
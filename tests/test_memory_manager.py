@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.memory.memory_manager import MemoryManager
+
+
+class Input:
+    def __init__(self, query, user_id="alice", session_id="s1"):
+        self.query = query
+        self.context = {"user_id": user_id, "session_id": session_id}
+
+
+def test_retrieves_relevant_memories_per_user(tmp_path, monkeypatch):
+    monkeypatch.setenv("MEMORY_TOP_K", "2")
+    memory = MemoryManager(base_dir=str(tmp_path))
+    memory.update(Input("how much vitamin d should I take"), "1000 IU a day")
+    memory.update(Input("best pizza in town"), "Luigi's")
+    memory.update(Input("plan a trip to Rome"), "3 days itinerary")
+    memory.update(Input("vitamin d secret", user_id="bob"), "bob's answer")
+
+    context = memory.retrieve_context(Input("vitamin d dosage"))
+    assert "how much vitamin d should I take" in context
+    assert len(context) == 2
+    assert "vitamin d secret" not in context
+    assert memory.retrieve_context(Input("anything", user_id="carol")) == {}
+
+
+def test_log_is_append_only_and_reloaded(tmp_path):
+    memory = MemoryManager(base_dir=str(tmp_path))
+    memory.update(Input("first question"), "first answer")
+    memory.update(Input("second question"), "second answer")
+
+    with open(tmp_path / "memory_log.jsonl") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["query"] for line in lines] == ["first question", "second question"]
+
+    reloaded = MemoryManager(base_dir=str(tmp_path))
+    assert reloaded.retrieve_context(Input("second question")) == memory.retrieve_context(Input("second question"))
+
+
+def test_ring_bounds_entries_and_legacy_file_is_imported(tmp_path, monkeypatch):
+    monkeypatch.setenv("MEMORY_MAX_ENTRIES_PER_USER", "3")
+    monkeypatch.setenv("MEMORY_TOP_K", "10")
+    with open(tmp_path / "short_term.json", "w") as f:
+        json.dump({"legacy question": "legacy answer"}, f)
+
+    memory = MemoryManager(base_dir=str(tmp_path))
+    assert memory.retrieve_context(Input("legacy", user_id="default_user")) == {"legacy question": "legacy answer"}
+
+    for i in range(5):
+        memory.update(Input(f"question {i}"), f"answer {i}")
+    started = time.perf_counter()
+    context = memory.retrieve_context(Input("question"))
+    assert time.perf_counter() - started < 0.1
+    assert list(context) == ["question 2", "question 3", "question 4"]
+
+
+def test_rings_grow_on_demand_and_idle_users_reload_from_the_log(tmp_path, monkeypatch):
+    monkeypatch.setenv("MEMORY_MAX_USERS", "2")
+    monkeypatch.setenv("MEMORY_MAX_ENTRIES_PER_USER", "40")
+    monkeypatch.setenv("MEMORY_TOP_K", "40")
+    memory = MemoryManager(base_dir=str(tmp_path))
+
+    memory.update(Input("only question", user_id="alice"), "only answer")
+    assert len(memory._users["alice"].queries) == 16
+    for i in range(20):
+        memory.update(Input(f"question {i}", user_id="bob"), f"answer {i}")
+    assert len(memory._users["bob"].queries) == 32
+
+    memory.update(Input("carol question", user_id="carol"), "carol answer")
+    assert list(memory._users) == ["bob", "carol"]
+
+    # alice comes back: her entries are read back from the log, and bob is evicted instead
+    assert memory.retrieve_context(Input("only", user_id="alice")) == {"only question": "only answer"}
+    assert memory.reloads == 1
+    assert list(memory._users) == ["carol", "alice"]
+    memory.update(Input("bob again", user_id="bob"), "bob answer")
+    assert len(memory.retrieve_context(Input("question", user_id="bob"))) == 21
+
+    reloaded = MemoryManager(base_dir=str(tmp_path))
+    assert len(reloaded._users) == 2
+    assert reloaded.retrieve_context(Input("carol", user_id="carol")) == {"carol question": "carol answer"}
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.page_fetcher import PageCache, PageFetcher
+from app.tools.web_browser_tool import WebBrowserTool
+
+TRUSTED = ["127.0.0.1"]  # the test server; anything else must resolve to public addresses
+
+ARTICLE = (
+    b"<html><head><title>Release notes</title><style>p {color: red}</style></head>"
+    b"<body><h1>Version 3</h1><script>track()</script><p>Faster &amp; safer search.</p></body></html>"
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits = []
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        type(self).hits.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/article":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self._send(ARTICLE, etag='"v1"')
+        elif self.path == "/huge":
+            self._send(b"<p>" + b"word " * 200_000 + b"</p>")
+        elif self.path.startswith("/slow"):
+            with type(self).lock:
+                type(self).active += 1
+                type(self).peak = max(type(self).peak, type(self).active)
+            time.sleep(0.1)
+            with type(self).lock:
+                type(self).active -= 1
+            self._send(b"<p>slow</p>")
+        elif self.path == "/to-article":
+            self.send_response(302)
+            self.send_header("Location", "/article")
+            self.end_headers()
+        elif self.path == "/to-private":
+            self.send_response(302)
+            self.send_header("Location", "http://10.0.0.1/admin")
+            self.end_headers()
+        elif self.path == "/bogus-charset":
+            self._send(b"<p>caf\xc3\xa9</p>", content_type="text/html; charset=x-bogus")
+        else:
+            self._send(b"<p>missing</p>", status=404)
+
+    def _send(self, body, status=200, etag=None, content_type="text/html; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.hits = []
+    _Handler.peak = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_extracts_text_and_revalidates_with_etag(server, tmp_path):
+    cache = PageCache(str(tmp_path), ttl=60)
+    fetcher = PageFetcher(cache, trusted_hosts=TRUSTED)
+
+    async def scenario():
+        first = await fetcher.fetch(f"{server}/article")
+        fresh = await fetcher.fetch(f"{server}/article")
+        cache.ttl = 0  # everything is stale now: revalidate instead of serving blindly
+        revalidated = await fetcher.fetch(f"{server}/article")
+        await fetcher.aclose()
+        return first, fresh, revalidated
+
+    first, fresh, revalidated = asyncio.run(scenario())
+    assert first["title"] == "Release notes"
+    assert first["text"] == "Version 3\nFaster & safer search."
+    assert not first["cached"] and fresh["cached"] and revalidated["cached"]
+    assert revalidated["text"] == first["text"]
+    assert _Handler.hits == [("/article", None), ("/article", '"v1"')]
+    assert fetcher.stats()["revalidated"] == 1
+
+
+def test_concurrent_fetches_share_a_request_and_respect_per_host_limit(server):
+    fetcher = PageFetcher(per_host=2, trusted_hosts=TRUSTED)
+
+    async def scenario():
+        same = await asyncio.gather(*(fetcher.fetch(f"{server}/article") for _ in range(5)))
+        await asyncio.gather(*(fetcher.fetch(f"{server}/slow/{i}") for i in range(6)))
+        await fetcher.aclose()
+        return same
+
+    same = asyncio.run(scenario())
+    assert len({page["text"] for page in same}) == 1
+    assert [path for path, _ in _Handler.hits].count("/article") == 1
+    assert _Handler.peak <= 2
+
+
+def test_large_pages_are_capped_and_errors_reported(server):
+    fetcher = PageFetcher(max_chars=1000, trusted_hosts=TRUSTED)
+    tool = WebBrowserTool(fetcher)
+
+    async def scenario():
+        page = await fetcher.fetch(f"{server}/huge")
+        output = await tool.run(f"compare {server}/missing and ftp://example.com")
+        await fetcher.aclose()
+        return page, output
+
+    page, output = asyncio.run(scenario())
+    assert page["truncated"] and len(page["text"]) <= 1000
+    assert "(HTTP 404)" in output
+    assert "No URL to browse" in asyncio.run(tool.run("just words"))
+
+
+def test_unknown_charset_falls_back_and_tool_fetches_concurrently(server):
+    fetcher = PageFetcher(trusted_hosts=TRUSTED)
+    tool = WebBrowserTool(fetcher, max_pages=4, concurrency=3)
+
+    async def scenario():
+        page = await fetcher.fetch(f"{server}/bogus-charset")
+        output = await tool.run(" ".join(f"{server}/slow/{i}" for i in range(4)))
+        await fetcher.aclose()
+        return page, output
+
+    page, output = asyncio.run(scenario())
+    assert page["text"] == "caf\u00e9"
+    assert output.count("\nslow") == 4
+    assert 2 <= _Handler.peak <= 3
+
+
+def test_private_hosts_and_redirects_to_them_are_refused(server):
+    fetcher = PageFetcher(trusted_hosts=TRUSTED)
+    tool = WebBrowserTool(PageFetcher())
+
+    async def scenario():
+        followed = await fetcher.fetch(f"{server}/to-article")
+        with pytest.raises(ValueError, match="non-public"):
+            await fetcher.fetch(f"{server}/to-private")
+        with pytest.raises(ValueError, match="non-public"):
+            await fetcher.fetch("http://169.254.169.254/latest/meta-data/")
+        untrusted = await tool.run(f"read {server}/article")
+        await fetcher.aclose()
+        await tool.fetcher.aclose()
+        return followed, untrusted
+
+    followed, untrusted = asyncio.run(scenario())
+    assert followed["title"] == "Release notes" and followed["url"].endswith("/to-article")
+    assert "non-public address" in untrusted
+    assert [path for path, _ in _Handler.hits] == ["/to-article", "/article", "/to-private"]
+
+
+def test_cache_evicts_oldest_pages_past_size_and_age_caps(tmp_path):
+    cache = PageCache(str(tmp_path), max_bytes=3000)
+    for i in range(6):
+        cache.put(f"http://example.com/{i}", f"{i}" * 1000)
+        os.utime(cache._record_path(f"http://example.com/{i}"), (1000 + i, 1000 + i))
+    assert cache.get("http://example.com/0") is None
+    assert cache.get("http://example.com/5")["text"] == "5" * 1000
+    assert sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(tmp_path) for name in names) <= 3000
+
+    cache.max_age = 60  # every record above is dated 1970
+    cache.put("http://example.com/new", "fresh")
+    cache.prune()
+    assert cache.get("http://example.com/5") is None
+    assert cache.get("http://example.com/new")["text"] == "fresh"
+    assert len(os.listdir(tmp_path / "objects")) == 1
@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.prompt_builder import PromptBuilder, estimate_tokens, prompt_stats
+
+
+TEMPLATE = "Query: {query}\nContext: {context}\nFindings: {findings}\nAnswer the query."
+
+
+def test_small_prompts_are_left_intact():
+    prompt = PromptBuilder("test_small", budget=500).render(
+        TEMPLATE, query="Hello", context={"name": "Ada"}, findings=["planner: ok"]
+    )
+    assert "- name: Ada" in prompt
+    assert "- planner: ok" in prompt
+    assert "omitted" not in prompt
+
+
+def test_large_context_is_compacted_to_budget_keeping_relevant_entries():
+    context = {f"note {i}": "filler " * 100 for i in range(40)}
+    context["note about invoices"] = "the invoice total is 42"
+    findings = ["research: " + "data " * 2000]
+
+    prompt = PromptBuilder("test_large", budget=300).render(
+        TEMPLATE, query="what is the invoice total", context=context, findings=findings
+    )
+
+    assert estimate_tokens(prompt) <= 300
+    assert "the invoice total is 42" in prompt
+    assert "entries omitted" in prompt
+    assert "[truncated]" in prompt
+    stats = prompt_stats()["test_large"]
+    assert stats["compacted"] == 1 and stats["dropped_entries"] > 0
+
+
+def test_huge_query_is_capped_at_its_share_of_the_budget():
+    query = "explain " + "word " * 5000
+    prompt = PromptBuilder("test_query", budget=400, query_share=0.5).render(
+        TEMPLATE, query=query, context={"note": "keep me"}, findings=["planner: ok"]
+    )
+
+    assert estimate_tokens(prompt) <= 400
+    assert "...[truncated]" in prompt
+    assert "- note: keep me" in prompt
+    assert prompt_stats()["test_query"]["compacted"] == 1
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+from app.core.providers import ProviderRegistry
+
+
+def test_registry_builds_clients_on_first_use(monkeypatch):
+    monkeypatch.setenv("FAKE_PROVIDER_KEY", "secret")
+    builds = []
+    registry = ProviderRegistry()
+    registry.register("fake", lambda: builds.append(1) or object(), "FAKE_PROVIDER_KEY")
+
+    assert registry.is_configured("fake")
+    assert builds == []
+    client = registry.get("fake")
+    assert registry.get("fake") is client
+    assert builds == [1]
+    assert registry.stats()["fake"]["loaded"] is True
+
+
+def test_registry_reports_unconfigured_and_broken_providers(monkeypatch):
+    monkeypatch.delenv("MISSING_PROVIDER_KEY", raising=False)
+    monkeypatch.setenv("BROKEN_PROVIDER_KEY", "secret")
+
+    def broken():
+        raise ImportError("sdk not installed")
+
+    registry = ProviderRegistry()
+    registry.register("missing", object, "MISSING_PROVIDER_KEY")
+    registry.register("broken", broken, "BROKEN_PROVIDER_KEY")
+
+    assert registry.get("missing") is None
+    assert registry.get("broken") is None
+    assert not registry.is_configured("broken")
+    assert registry.stats()["broken"]["error"] == "sdk not installed"
+
+
+def test_app_import_does_not_load_provider_sdks():
+    env = dict(os.environ, OPENAI_API_KEY="sk-dummy", GROQ_API_KEY="gsk-dummy", SENTRY_DSN="")
+    code = (
+        "import sys, app.main; "
+        "print(sorted(m for m in ('openai', 'groq', 'google.generativeai', 'mistralai', 'sentry_sdk') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
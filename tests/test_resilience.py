@@ -0,0 +1,110 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.resilience import AdaptiveLimiter, CircuitBreaker, CircuitOpenError, ProviderGuard
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_limiter_halves_on_throttle_and_grows_on_success():
+    limiter = AdaptiveLimiter(initial=8, min_limit=1, max_limit=16, decrease_cooldown=0)
+
+    async def scenario():
+        await limiter.acquire()
+        limiter.release(0.1, overloaded=True)
+        assert limiter.limit == 4
+        for _ in range(4):
+            await limiter.acquire()
+            limiter.release(0.1, overloaded=False)
+        assert 4 < limiter.limit <= 5
+
+    asyncio.run(scenario())
+
+
+def test_breaker_opens_fails_fast_and_recovers_via_half_open_probe():
+    breaker = CircuitBreaker(error_rate=0.5, min_requests=4, cooldown_seconds=0.05)
+    guard = ProviderGuard("test", breaker=breaker, call_timeout=1, queue_timeout=1)
+
+    async def failing():
+        raise RateLimited("429 Too Many Requests")
+
+    async def ok():
+        return "ok"
+
+    async def scenario():
+        for _ in range(4):
+            try:
+                await guard.run(failing())
+            except RateLimited:
+                pass
+        assert breaker.state == CircuitBreaker.OPEN
+        try:
+            await guard.run(ok())
+            assert False, "expected fast failure while open"
+        except CircuitOpenError:
+            pass
+
+        await asyncio.sleep(0.06)
+        assert await guard.run(ok()) == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert guard.limiter.inflight == 0
+
+    asyncio.run(scenario())
+
+
+def test_routed_call_hedges_to_faster_provider():
+    from app.core.cache import TieredCache, TTLCache
+    from app.core.llm_bridge import LLMBridge
+
+    bridge = LLMBridge(cache=TieredCache(TTLCache(ttl=60)))
+    bridge.openai_client = object()  # mark chatgpt and groq as configured
+    bridge.groq_client = object()
+    bridge.hedging_enabled = True
+    bridge.hedge_delay = 0.05
+    delays = {"chatgpt": 0.5, "groq": 0.01}
+
+    async def fake_invoke(model, prompt):
+        await asyncio.sleep(delays[model])
+        return f"{model} answer"
+
+    bridge._invoke = fake_invoke
+
+    output = asyncio.run(bridge.call_llm("chatgpt", "route me", route=True))
+    assert output == "groq answer"
+    assert bridge.hedged_calls == 1
+    assert bridge.hedge_wins == 1
+    # The cancelled chatgpt call still counts its elapsed time, so groq now ranks first
+    assert bridge.provider_stats["chatgpt"].latency.percentile(0.5) >= 0.05
+    assert bridge.rank_models("chatgpt")[0] == "groq"
+
+
+def test_routed_stream_uses_the_fastest_provider():
+    from app.core.cache import TieredCache, TTLCache
+    from app.core.llm_bridge import LLMBridge
+
+    bridge = LLMBridge(cache=TieredCache(TTLCache(ttl=60)))
+    bridge.openai_client = object()
+    bridge.groq_client = object()
+    for _ in range(5):
+        bridge.provider_stats["chatgpt"].record(0.5, True)
+        bridge.provider_stats["groq"].record(0.01, True)
+    streamed = []
+
+    async def fake_stream(model, prompt):
+        streamed.append(model)
+        yield f"{model} "
+        yield "answer"
+
+    bridge._stream_provider = fake_stream
+
+    async def collect(route):
+        return "".join([token async for token in bridge.stream_llm("chatgpt", f"stream {route}", route=route)])
+
+    assert asyncio.run(collect(True)) == "groq answer"
+    assert asyncio.run(collect(False)) == "chatgpt answer"
+    assert streamed == ["groq", "chatgpt"]
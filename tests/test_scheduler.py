@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, Task
+from app.core.scheduler import TaskScheduler, TimingWheel
+
+
+class RecordingDispatcher:
+    def __init__(self):
+        self.fired = []
+
+    def dispatch(self, task):
+        self.fired.append(task["id"])
+        return {"status": "success"}
+
+
+def _session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'scheduler.db'}")
+    return engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def test_timing_wheel_expiry_order():
+    wheel = TimingWheel(tick_seconds=1.0, slots=10, start=100.0)
+    assert wheel.add(103.5, "b")
+    assert wheel.add(101.2, "a")
+    assert not wheel.add(150.0, "too-far")
+    assert wheel.advance(102.0) == ["a"]
+    assert wheel.advance(105.0) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_scheduler_fires_due_tasks_and_resumes_from_cursor(tmp_path):
+    async def scenario():
+        engine, factory = _session_factory(tmp_path)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        now = datetime.utcnow()
+        async with factory() as session:
+            session.add_all([
+                Task(description="past", task_type="reminder", due_at=now - timedelta(seconds=5)),
+                Task(description="soon", task_type="alarm", due_at=now + timedelta(seconds=2)),
+                Task(description="later", task_type="meeting", due_at=now + timedelta(days=2)),
+                Task(description="no time"),
+            ])
+            await session.commit()
+
+        dispatcher = RecordingDispatcher()
+        scheduler = TaskScheduler(session_factory=factory, dispatcher=dispatcher, slots=60)
+        assert await scheduler.run_once(now) == 1
+        assert await scheduler.run_once(now + timedelta(seconds=3)) == 1
+        assert dispatcher.fired == [1, 2]
+
+        # A fresh process picks up from the persisted cursor without refiring
+        restarted = TaskScheduler(session_factory=factory, dispatcher=dispatcher, slots=60)
+        assert await restarted.run_once(now + timedelta(seconds=4)) == 0
+
+        async with factory() as session:
+            statuses = {t.description: t.status for t in (await session.execute(Task.__table__.select())).all()}
+        assert statuses == {"past": "fired", "soon": "fired", "later": "pending", "no time": "pending"}
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_each_due_task_is_delivered_by_one_worker_only(tmp_path, monkeypatch):
+    async def scenario():
+        engine, factory = _session_factory(tmp_path)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        now = datetime.utcnow()
+        async with factory() as session:
+            session.add(Task(description="ping", task_type="reminder", due_at=now - timedelta(seconds=1)))
+            await session.commit()
+
+        dispatcher = RecordingDispatcher()
+        workers = [
+            TaskScheduler(session_factory=factory, dispatcher=dispatcher, slots=60, name=f"worker-{i}") for i in range(2)
+        ]
+        # Both load the task and fire on the same tick
+        assert sorted(await asyncio.gather(*(worker.run_once(now) for worker in workers))) == [0, 1]
+        assert dispatcher.fired == [1]
+        assert sum(worker.stats()["claimed_elsewhere"] for worker in workers) == 1
+        await engine.dispose()
+
+    monkeypatch.setenv("SCHEDULER_WHEEL_SLOTS", "7")
+    assert TaskScheduler().slots == 7  # settings are read when the scheduler is built
+    asyncio.run(scenario())
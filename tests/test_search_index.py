@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.search_index import DirectoryCorpus, SearchIndex
+from app.memory.memory_manager import MemoryManager
+from app.tools.search_tool import SearchTool
+
+
+def test_bm25_ranks_by_term_rarity_and_frequency():
+    index = SearchIndex()
+    index.add("a", "quarterly revenue report for the sales team")
+    index.add("b", "revenue revenue revenue forecast")
+    index.add("c", "team offsite planning")
+    for i in range(20):
+        index.add(f"filler:{i}", f"team meeting notes number {i}")
+
+    results = index.search("revenue forecast")
+    assert [r["key"] for r in results] == ["b", "a"]
+    assert results[0]["score"] > results[1]["score"] > 0
+    assert index.search("nothing matches") == []
+
+
+def test_replace_remove_and_compaction_keep_results_consistent():
+    index = SearchIndex()
+    for i in range(3000):
+        index.add(f"doc:{i}", f"common words plus token{i}")
+    index.add("doc:5", "entirely new text about kiwis")
+    assert index.search("token5") == []
+    assert index.search("kiwis")[0]["key"] == "doc:5"
+
+    for i in range(0, 3000, 2):
+        index.remove(f"doc:{i}")
+    assert index.compactions >= 1
+    assert len(index) == 1500
+    assert index.search("token7")[0]["key"] == "doc:7"
+    assert index.search("token8") == []
+    assert len(index.search("common", k=2000)) == 1499  # doc:5 no longer says "common"
+
+
+def test_owner_and_source_filters():
+    index = SearchIndex()
+    index.add("memory:alice:0", "alice likes hiking", source="memory", owner="alice")
+    index.add("task:1", "book hiking trip", source="task")
+
+    assert [r["key"] for r in index.search("hiking")] == ["task:1"]
+    assert {r["key"] for r in index.search("hiking", owner="alice")} == {"memory:alice:0", "task:1"}
+    assert [r["key"] for r in index.search("hiking", owner="alice", sources=["memory"])] == ["memory:alice:0"]
+
+
+def test_directory_corpus_indexes_changed_files_only(tmp_path):
+    index = SearchIndex()
+    corpus = DirectoryCorpus(index, str(tmp_path), rescan_seconds=0)
+    (tmp_path / "notes.md").write_text("migration plan for the billing database")
+    (tmp_path / "image.png").write_bytes(b"\x89PNG")
+
+    assert corpus.refresh() == 1
+    assert corpus.refresh() == 0
+    assert index.search("billing")[0]["key"] == "file:notes.md"
+
+    os.remove(tmp_path / "notes.md")
+    corpus.refresh()
+    assert index.search("billing") == []
+
+
+def test_search_tool_finds_memory_entries_for_their_user(tmp_path):
+    index = SearchIndex()
+    memory = MemoryManager(base_dir=str(tmp_path), search_index=index)
+    memory.update("what is our refund policy", "Refunds are issued within 30 days")
+    tool = SearchTool(index, corpus=None)
+
+    assert "Refunds are issued" in asyncio.run(tool.run("refund policy", user_id="default_user"))
+    assert "No matching local documents" in asyncio.run(tool.run("refund policy"))
+
+
+def test_research_steps_search_the_callers_memories(tmp_path):
+    from app.agents.researcher_agent import ResearcherAgent
+    from app.core.bhiv_reasoner import BHIVReasoner
+
+    index = SearchIndex()
+    memory = MemoryManager(base_dir=str(tmp_path), search_index=index)
+    memory.update(type("Request", (), {"query": "refund policy", "user_id": "alice"})(), "Refunds within 30 days")
+    researcher = ResearcherAgent()
+    prompts = []
+
+    async def call_llm(prompt, model="chatgpt"):
+        prompts.append(prompt)
+        return "summary"
+
+    researcher.call_llm = call_llm
+    plan = [{"type": "research", "description": "refund policy"}]
+    tools = {"search": SearchTool(index, corpus=None)}
+    for user_id in ("alice", "bob"):
+        asyncio.run(BHIVReasoner().run_steps(plan, {}, {"researcher": researcher}, tools, user_id=user_id))
+
+    assert "Refunds within 30 days" in prompts[0]
+    assert "Refunds within 30 days" not in prompts[1]
+
+
+def test_summaries_are_indexed_per_owner_and_capped(monkeypatch):
+    from app.routers import summarize
+
+    index = SearchIndex()
+    monkeypatch.setattr(summarize, "search_index", index)
+    monkeypatch.setattr(summarize, "SUMMARY_INDEX_MAX_PER_USER", 2)
+    monkeypatch.setattr(summarize, "_summary_keys", {})
+    for i in range(3):
+        summarize.index_summary("alice", f"quarterly invoice draft number{i}", f"draft {i}")
+    summarize.index_summary("bob", "bob invoice notes", "notes")
+
+    assert sorted(r["title"] for r in index.search("invoice", owner="alice")) == ["draft 1", "draft 2"]
+    assert index.search("invoice") == []
+    assert [r["title"] for r in index.search("invoice", owner="bob")] == ["notes"]
+
+
+def test_query_latency_on_large_index():
+    index = SearchIndex()
+    for i in range(20000):
+        index.add(f"doc:{i}", f"shared term w{i % 97} w{i % 1013} w{i % 7919}")
+    started = time.perf_counter()
+    for _ in range(20):
+        index.search("shared w5 w17")
+    assert (time.perf_counter() - started) / 20 < 0.05
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ["API_KEY"] = os.environ.get("API_KEY", "localtest")
+
+from fastapi.testclient import TestClient
+
+from app.core.cache import TTLCache, task_cache
+from app.main import app
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" becomes most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expiry():
+    cache = TTLCache(max_entries=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_drops_writes_invalidated_while_reading():
+    cache = TTLCache(max_entries=2, ttl=60)
+    version = cache.version("task")
+    cache.invalidate("task")  # an update commits while the reader waits on the database
+    cache.set("task", "stale row", version=version)
+    assert cache.get("task") is None
+    assert cache.stats()["stale_writes"] == 1
+
+    cache.clear()
+    version = cache.version("task")
+    cache.invalidate("task")
+    cache.invalidate("a")
+    cache.invalidate("b")  # "task" falls out of the version table but must not look unchanged
+    cache.set("task", "stale row", version=version)
+    assert cache.get("task") is None
+
+    version = cache.version("task")
+    cache.set("task", "fresh row", version=version)
+    assert cache.get("task") == "fresh row"
+
+
+def test_task_detail_etag_and_invalidation():
+    with TestClient(app) as client:
+        client.headers.update({"X-API-Key": os.environ["API_KEY"]})
+        created = client.post("/api/tasks", json={"description": "cache me"}).json()
+        task_id = created["id"]
+
+        first = client.get(f"/api/tasks/{task_id}")
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+
+        hits_before = task_cache.hits
+        not_modified = client.get(f"/api/tasks/{task_id}", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert task_cache.hits == hits_before + 1
+
+        client.put(f"/api/tasks/{task_id}", json={"status": "done"})
+        refreshed = client.get(f"/api/tasks/{task_id}", headers={"If-None-Match": etag})
+        assert refreshed.status_code == 200
+        assert refreshed.json()["status"] == "done"
+        assert refreshed.headers["ETag"] != etag
+
+        client.delete(f"/api/tasks/{task_id}")
+        assert client.get(f"/api/tasks/{task_id}").status_code == 404
+
+        components = client.get("/metrics").json()["components"]
+        assert "hits" in components["task_cache"]
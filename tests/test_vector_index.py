@@ -0,0 +1,147 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.vector_index import VectorStore
+
+
+def _clustered(rng, n, dim=16, clusters=20):
+    centers = rng.normal(size=(clusters, dim))
+    return centers[rng.integers(0, clusters, size=n)] + 0.05 * rng.normal(size=(n, dim))
+
+
+def test_flat_search_filters_deletes_and_namespaces(tmp_path):
+    store = VectorStore(str(tmp_path))
+    store.upsert("alice", [
+        ("a", [1.0, 0.0, 0.0], {"kind": "note"}),
+        ("b", [0.9, 0.1, 0.0], {"kind": "task"}),
+        ("c", [0.0, 1.0, 0.0], {"kind": "note"}),
+    ])
+    store.upsert("bob", [("z", [1.0, 0.0, 0.0], {})])
+
+    assert [r["id"] for r in store.search("alice", [1.0, 0.0, 0.0], k=2)] == ["a", "b"]
+    assert [r["id"] for r in store.search("alice", [1.0, 0.0, 0.0], k=2, filters={"kind": "note"})] == ["a", "c"]
+    assert [r["id"] for r in store.search("bob", [1.0, 0.0, 0.0])] == ["z"]
+
+    assert store.delete("alice", ["a"]) == 1
+    store.upsert("alice", [("c", [1.0, 0.05, 0.0], {"kind": "note"})])  # replace by id
+    assert [r["id"] for r in store.search("alice", [1.0, 0.0, 0.0], k=5)] == ["c", "b"]
+
+
+def test_ivf_training_recall_and_reload_from_disk(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = _clustered(rng, 3000)
+    store = VectorStore(str(tmp_path), nprobe=4, train_min=1000)
+    store.upsert("u", [(f"v{i}", vector, {"even": i % 2 == 0}) for i, vector in enumerate(vectors)])
+    store.delete("u", ["v0"])
+    index = store.namespace("u")
+    assert index.centroids is not None and len(index.centroids) > 1
+
+    reopened = VectorStore(str(tmp_path), nprobe=4, train_min=1000)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    hits = 0
+    for i in range(1, 50):
+        found = reopened.search("u", vectors[i], k=10)
+        exact = np.argsort(-(unit @ unit[i]))
+        exact = [f"v{j}" for j in exact if j != 0][:10]
+        hits += len(set(exact) & {r["id"] for r in found})
+    assert hits / (49 * 10) > 0.9
+    assert all(r["metadata"]["even"] for r in reopened.search("u", vectors[1], k=5, filters={"even": True}))
+    assert "v0" not in {r["id"] for r in reopened.search("u", vectors[0], k=50)}
+    assert reopened.namespace("u").stats()["vectors"] == 2999
+
+
+def test_embed_search_endpoint(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.routers import embed
+
+    def fake_process_message(user_id, session_id, platform, text):
+        vector = [float(sum(map(ord, word)) % 7 == i) for word in text.split() for i in range(7)][:7]
+        vector = (vector + [0.0] * 7)[:7] if any(vector) else [1.0] + [0.0] * 6
+        return {"status": "success", "embedding": vector, "obfuscated_embedding": vector}
+
+    monkeypatch.setattr(embed, "process_message", fake_process_message)
+    monkeypatch.setattr(embed, "vector_store", VectorStore(str(tmp_path)))
+    os.environ["API_KEY"] = os.environ.get("API_KEY", "localtest")
+    client = TestClient(app)
+    client.headers.update({"X-API-Key": os.environ["API_KEY"]})
+
+    items = [{"id": "1", "text": "quarterly report", "metadata": {"tag": "finance"}}, {"id": "2", "text": "team lunch"}]
+    assert client.post("/api/embed/index", json={"items": items, "user_id": "u9"}).json() == {"indexed": 2}
+
+    results = client.post("/api/embed/search", json={"query": "quarterly report", "user_id": "u9", "k": 1}).json()["results"]
+    assert results[0]["id"] == "1" and results[0]["metadata"] == {"tag": "finance"}
+    filtered = client.post("/api/embed/search", json={"query": "quarterly report", "user_id": "u9", "filters": {"tag": "x"}})
+    assert filtered.json()["results"] == []
+    assert client.post("/api/embed/search", json={"query": "quarterly report", "user_id": "other"}).json()["results"] == []
+
+    assert client.delete("/api/embed/index/1", params={"user_id": "u9"}).status_code == 200
+    assert client.delete("/api/embed/index/1", params={"user_id": "u9"}).status_code == 404
+
+
+def test_index_and_search_refuse_hash_fallbacks(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.core.embedding_cache import EmbeddingCache
+    from app.main import app
+    from app.routers import embed
+
+    monkeypatch.setattr(embed, "process_message", lambda *args: {"status": "error", "error_message": "EmbedCore down"})
+    monkeypatch.setattr(embed, "cache", EmbeddingCache())
+    store = VectorStore(str(tmp_path))
+    monkeypatch.setattr(embed, "vector_store", store)
+    os.environ["API_KEY"] = os.environ.get("API_KEY", "localtest")
+    client = TestClient(app)
+    client.headers.update({"X-API-Key": os.environ["API_KEY"]})
+
+    response = client.post("/api/embed/index", json={"items": [{"id": "1", "text": "report"}], "user_id": "u"})
+    assert response.status_code == 503
+    assert client.post("/api/embed/search", json={"query": "report", "user_id": "u"}).status_code == 503
+    # Nothing was indexed, so the namespace's dimension is still open for real vectors
+    assert store.namespace("u", create=False) is None
+
+
+def test_snapshot_plus_log_tail_reload(tmp_path):
+    store = VectorStore(str(tmp_path))
+    store.upsert("u", [("a", [1.0, 0.0], {"n": 1}), ("b", [0.0, 1.0], {"n": 2})])
+    store.snapshot()
+    assert os.path.getsize(store.namespace("u")._data_path("items.jsonl")) == 0
+    store.delete("u", ["a"])
+    store.upsert("u", [("c", [1.0, 0.1], {"n": 3})])
+
+    reopened = VectorStore(str(tmp_path))
+    assert [(r["id"], r["metadata"]) for r in reopened.search("u", [1.0, 0.0], k=5)] == [("c", {"n": 3}), ("b", {"n": 2})]
+
+
+def test_replaced_and_deleted_rows_are_compacted(tmp_path):
+    rng = np.random.default_rng(1)
+    store = VectorStore(str(tmp_path), train_min=200)
+    store.upsert("u", [(f"k{i}", rng.normal(size=8), {"i": i}) for i in range(300)])
+    for n in range(3000):
+        store.upsert("u", [("hot", rng.normal(size=8), {"n": n})])
+    store.delete("u", [f"k{i}" for i in range(100)])
+
+    index = store.namespace("u")
+    assert index.stats()["vectors"] == 201
+    assert index.count <= 2 * 201 and len(index.row_ids) == index.count
+    assert index.compactions > 0
+    files = sorted(os.listdir(index.directory))
+    assert len([name for name in files if name.startswith("vectors.")]) == 1
+
+    reopened = VectorStore(str(tmp_path), nprobe=64, train_min=200)  # probe every list: exact counts
+    hot = reopened.search("u", np.ones(8), k=300, filters={"n": 2999})
+    assert [r["id"] for r in hot] == ["hot"]
+    assert reopened.namespace("u").stats()["vectors"] == 201
+    assert len(reopened.search("u", np.ones(8), k=300)) == 201
+
+
+def test_unknown_namespaces_are_not_created(tmp_path):
+    store = VectorStore(str(tmp_path))
+    for user in ("a", "b", "c"):
+        assert store.search(user, [1.0, 0.0]) == []
+        assert store.delete(user, ["x"]) == 0
+    assert os.listdir(tmp_path) == []
+    assert store.stats()["namespaces_open"] == 0